@@ -0,0 +1,55 @@
+import timeit
+
+import raimad as rai
+
+class Row(rai.Compo):
+    def _make(self, num_snowmen=30):
+        for i in range(num_snowmen):
+            self.subcompos.append(
+                rai.Snowman().proxy().rotate(0.1 * i).move(150 * i, 0)
+                )
+
+class Grid(rai.Compo):
+    def _make(self, num_rows=10):
+        for i in range(num_rows):
+            self.subcompos.append(
+                Row().proxy().rotate(0.05).move(0, 300 * i)
+                )
+
+def method_steamroll(proxy):
+    bbox = rai.BBox()
+    for polys in proxy.steamroll().values():
+        for poly in polys:
+            bbox.add_poly(poly)
+    return bbox
+
+def method_hull(proxy):
+    return proxy.bbox
+
+def main():
+    grid = Grid()
+
+    for name, method in (
+            ('steamroll', method_steamroll),
+            ('hull', method_hull),
+            ):
+        proxy = grid.proxy()
+        first_time = timeit.timeit(lambda: method(proxy), number=1)
+        second_time = timeit.timeit(
+            lambda: method(proxy.rotate(0.1)),
+            number=1
+            )
+
+        number = 10
+        repeat_time = timeit.timeit(
+            lambda: method(proxy.rotate(0.1)),
+            number=number
+            )
+
+        print(f"{name} method:")
+        print(f"\tfirst bbox: {first_time:.9f} seconds")
+        print(f"\tsecond bbox: {second_time:.9f} seconds")
+        print(f"\tnext bboxes: {repeat_time / number:.9f} seconds")
+
+if __name__ == '__main__':
+    main()
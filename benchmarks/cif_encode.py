@@ -0,0 +1,64 @@
+import timeit
+
+import raimad as rai
+
+def method_per_vertex(polys, multiplier):
+    """What NoReuse and Reuse used to do: one string per vertex."""
+    def yield_polys():
+        for poly in polys:
+            yield '\tP '
+            for point in poly:
+                yield (
+                    f'{int(point[0] * multiplier)} '
+                    f'{int(point[1] * multiplier)} '
+                    )
+            yield ';\n'
+    return ''.join(yield_polys())
+
+def method_python(polys, multiplier):
+    use_numpy = rai.affine.use_numpy
+    rai.affine.use_numpy = False
+    try:
+        return rai.cif.encode.encode_polys(polys, multiplier)
+    finally:
+        rai.affine.use_numpy = use_numpy
+
+def method_numpy(polys, multiplier):
+    return rai.cif.encode.encode_polys(polys, multiplier)
+
+def main():
+    methods = [
+        ('per_vertex', method_per_vertex),
+        ('python', method_python),
+        ]
+    if rai.affine.HAS_NUMPY:
+        methods.append(('numpy', method_numpy))
+    else:
+        print("numpy not installed, skipping numpy path")
+
+    for num_polys, num_points in (
+            (1000, 4),
+            (100, 50),
+            (10, 2000),
+            ):
+        polys = [
+            rai.Circle(10 + index, num_points=num_points).geoms['root'][0]
+            for index in range(num_polys)
+            ]
+        num_vertices = num_polys * num_points
+        expected = method_per_vertex(polys, 1e2)
+
+        print(f"{num_polys} polygons of {num_points} vertices:")
+        for name, method in methods:
+            assert method(polys, 1e2) == expected
+            number = 10
+            time = min(timeit.repeat(
+                lambda: method(polys, 1e2),
+                number=number,
+                repeat=5,
+                ))
+            rate = num_vertices * number / time
+            print(f"    {name}: {rate / 1e6:.2f} million vertices per second")
+
+if __name__ == '__main__':
+    main()
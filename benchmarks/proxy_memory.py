@@ -0,0 +1,45 @@
+import timeit
+import tracemalloc
+
+import raimad as rai
+
+def make_proxies(compo, number):
+    return [compo.proxy().move(i, 0) for i in range(number)]
+
+def make_marks(proxy, number):
+    return [proxy.marks.center for _ in range(number)]
+
+def measure_bytes(func, *args):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+def main():
+    number = 100000
+    compo = rai.Circle(1)
+    compo.marks.center = (0, 0)
+
+    proxy_bytes = measure_bytes(make_proxies, compo, number)
+    proxy_time = timeit.timeit(
+        lambda: make_proxies(compo, number),
+        number=1
+        )
+
+    proxy = compo.proxy().move(1, 1)
+    mark_bytes = measure_bytes(make_marks, proxy, number)
+    mark_time = timeit.timeit(
+        lambda: make_marks(proxy, number),
+        number=1
+        )
+
+    print(f"Proxies: {proxy_bytes / number:.1f} bytes per proxy")
+    print(f"Proxies: {number / proxy_time:.0f} proxies per second")
+    print(f"Marks: {mark_bytes / number:.1f} bytes per BoundPoint")
+    print(f"Marks: {number / mark_time:.0f} marks per second")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+import timeit
+
+import raimad as rai
+
+def edit_chain(proxy):
+    return (
+        proxy
+        .move(10, 20)
+        .rotate(0.3)
+        .movex(5)
+        .scale(2)
+        .movey(-3)
+        .hflip()
+        .move(1, 1)
+        )
+
+def method_edits(compo):
+    proxy = compo.proxy()
+    edit_chain(proxy)
+    return proxy.transform._affine
+
+def method_copies(proxy):
+    return proxy.shallow_copy().shallow_copy().shallow_copy()
+
+def main():
+    number = 10000
+    compo = rai.Circle(1)
+    proxy = edit_chain(compo.proxy())
+
+    edits_time = timeit.timeit(lambda: method_edits(compo), number=number)
+    copies_time = timeit.timeit(lambda: method_copies(proxy), number=number)
+
+    print(f"Proxy with seven edits: {edits_time / number:.9f} seconds")
+    print(f"Three proxy copies: {copies_time / number:.9f} seconds")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import timeit
+
+import raimad as rai
+
+MATRIX = rai.Transform().rotate(0.3).move(1, 2)._affine
+
+def make_polys(num_polys, num_points):
+    return [
+        rai.Circle(10, num_points=num_points).geoms['root'][0]
+        for _ in range(num_polys)
+        ]
+
+def method_python(polys):
+    return [rai.affine.transform_poly(MATRIX, poly) for poly in polys]
+
+def method_numpy(polys, array):
+    return rai.affine.transform_polys(MATRIX, polys, array)
+
+def method_numpy_convert(polys):
+    rai.affine.NUMPY_MIN_VERTICES = 0
+    return rai.affine.transform_polys(
+        MATRIX,
+        polys,
+        rai.affine.polys_to_array(polys)
+        )
+
+def main():
+    rai.affine.NUMPY_MIN_VERTICES = 0
+
+    for num_polys, num_points in (
+            (1, 4),
+            (1, 16),
+            (1, 64),
+            (1, 200),
+            (1000, 4),
+            (1000, 200),
+            ):
+        polys = make_polys(num_polys, num_points)
+        array = rai.affine.polys_to_array(polys)
+        number = max(1, 100000 // (num_polys * num_points))
+
+        python_time = timeit.timeit(
+            lambda: method_python(polys),
+            number=number
+            )
+        numpy_time = timeit.timeit(
+            lambda: method_numpy(polys, array),
+            number=number
+            )
+        convert_time = timeit.timeit(
+            lambda: method_numpy_convert(polys),
+            number=number
+            )
+
+        print(f"{num_polys} polys with {num_points} points:")
+        print(f"\tPython method: {python_time / number:.9f} seconds")
+        print(f"\tNumPy method: {numpy_time / number:.9f} seconds")
+        print(
+            "\tNumPy method including conversion: "
+            f"{convert_time / number:.9f} seconds"
+            )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+import timeit
+
+import raimad as rai
+
+class Level(rai.Compo):
+    def _make(self, inner, num=4):
+        for i in range(num):
+            self.subcompos.append(
+                inner.proxy().rotate(0.1 * i).move(100 * i, 0)
+                )
+
+def make_hier(depth):
+    compo = rai.Circle(1)
+    for _ in range(depth):
+        compo = Level(compo)
+    return compo
+
+def method_walk_hier(proxy):
+    return sum(1 for _ in proxy.walk_hier())
+
+def method_walk(proxy):
+    return sum(1 for _ in proxy.walk())
+
+def main():
+    proxy = make_hier(6).proxy().move(1, 1)
+
+    for name, method in (
+            ('walk_hier', method_walk_hier),
+            ('walk', method_walk),
+            ):
+        number = 3
+        time = timeit.timeit(lambda: method(proxy), number=number)
+        print(f"{name}: {method(proxy)} nodes, {time / number:.6f} seconds")
+
+if __name__ == '__main__':
+    main()
@@ -97,4 +97,5 @@ if __name__ == "__main__":
     patch_dunder_all("src/raimad/err.py")
     patch_dunder_all("src/raimad/__init__.py")
     patch_dunder_all("src/raimad/cif/__init__.py")
+    patch_dunder_all("src/raimad/gds/__init__.py")
 
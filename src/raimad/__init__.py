@@ -26,10 +26,15 @@ from raimad.helpers import (
     eq,
     sub,
     distance_between,
+    arc_num_points,
+    convex_hull,
     is_lname_valid,
     vec2s,
     )
 from raimad import affine
+from raimad import grid
+from raimad import packedpolys
+from raimad.packedpolys import PackedPolys
 import raimad.iters as iters
 from raimad.iters import (
     overlap,
@@ -64,7 +69,12 @@ from raimad.compo import SubcompoContainer
 from raimad.compo import ProxyableDictList
 from raimad.proxy import Proxy
 from raimad.proxy import LMap
+from raimad.arrayproxy import ArrayProxy
 from raimad.partial import Partial
+from raimad import compocache
+from raimad.compocache import CompoCache
+from raimad import diskcache
+from raimad.diskcache import DiskCache
 from raimad.bbox import AbstractBBox, BBox
 from raimad.boundbbox import BoundBBox
 
@@ -79,9 +89,14 @@ from raimad import typing as t
 
 from raimad import cif
 from raimad.cif.shorthand import export_cif
+from raimad.cif.shorthand import stream_cif
 from raimad.cif.shorthand import export_lyp
+from raimad import gds
+from raimad.gds.shorthand import export_gds
+from raimad.gds.shorthand import stream_gds
 from raimad.svg import export_svg
 from raimad.show import show
+from raimad import sweep
 from raimad import err
 
 from raimad.cif import lyp
@@ -132,9 +147,14 @@ __all__ = [
     "eq",
     "sub",
     "distance_between",
+    "arc_num_points",
+    "convex_hull",
     "is_lname_valid",
     "vec2s",
     "affine",
+    "grid",
+    "packedpolys",
+    "PackedPolys",
     "iters",
     "overlap",
     "nonoverlap",
@@ -163,7 +183,12 @@ __all__ = [
     "ProxyableDictList",
     "Proxy",
     "LMap",
+    "ArrayProxy",
     "Partial",
+    "compocache",
+    "CompoCache",
+    "diskcache",
+    "DiskCache",
     "AbstractBBox",
     "BBox",
     "BoundBBox",
@@ -176,9 +201,14 @@ __all__ = [
     "t",
     "cif",
     "export_cif",
+    "stream_cif",
     "export_lyp",
+    "gds",
+    "export_gds",
+    "stream_gds",
     "export_svg",
     "show",
+    "sweep",
     "err",
     "lyp",
     "fortune",
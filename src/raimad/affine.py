@@ -1,9 +1,33 @@
 """affine.py: operations on affine matrices and other math helpers."""
 
+from itertools import accumulate
 from math import sin, cos, sqrt, atan2
-from typing import Sequence
+from typing import Sequence, TypeAlias, Any
 
-from raimad.types import Vec2, Vec2S, Poly, PolyS, Mat3S, NumS
+from raimad.types import Vec2, Vec2S, Poly, Polys, PolyS, PolysS, Mat3S, NumS
+from raimad import grid
+from raimad.packedpolys import PackedPolys
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    # numpy is optional,
+    # everything works without it, only slower.
+    HAS_NUMPY = False
+
+# Transform polygons in bulk with numpy, if it is installed.
+# Set to False to always use the pure-python implementation.
+use_numpy = HAS_NUMPY
+
+# Below this many vertices,
+# the overhead of calling numpy is larger than what it saves,
+# see benchmarks/transform_polys.py
+NUMPY_MIN_VERTICES = 32
+
+# A list of polygons stored as one (N, 2) numpy array of all vertices,
+# and the number of vertices in every polygon
+PolyArray: TypeAlias = tuple[Any, tuple[int, ...]]
 
 def identity() -> Mat3S:
     """Make 3x3 identity matrix."""
@@ -140,10 +164,14 @@ def around(
     x = float(x)
     y = float(y)
 
-    to_origin = move(-x, -y)
-    from_origin = move(x, y)
-
-    return matmul(from_origin, matrix, to_origin)
+    # Same as `matmul(move(x, y), matrix, move(-x, -y))`,
+    # without the two matrix multiplications
+    (a, b, c), (d, e, f), _ = matrix
+    return (
+        (a, b, c + x - a * x - b * y),
+        (d, e, f + y - d * x - e * y),
+        (0, 0, 1),
+        )
 
 def get_translation(matrix: Mat3S) -> Vec2S:
     """Given an affine matrix, return the corresponding translation."""
@@ -172,13 +200,171 @@ def transform_poly(
         matrix: Mat3S,
         poly: Poly
         ) -> PolyS:
-    """Apply transformation to poly and return new transformed poly."""
-    return [
+    """
+    Apply transformation to poly and return new transformed poly.
+
+    In grid mode (see `rai.grid`), the result is snapped to the grid.
+    """
+    transformed = [
         transform_point(matrix, point)
         for point in poly
         ]
+    if grid.unit is not None:
+        return grid.snap_poly(transformed)
+    return transformed
     # TODO remove "poly name"
 
+def polys_to_array(polys: Polys) -> PolyArray | None:
+    """
+    Convert polygons to a PolyArray for use with `transform_polys`.
+
+    Parameters
+    ----------
+    polys
+        The polygons to convert
+
+    Returns
+    -------
+    PolyArray | None
+        The vertices of all polygons as one (N, 2) numpy array,
+        and the number of vertices in every polygon.
+        None is returned if numpy is not used
+        or if there are too few vertices for numpy to be worth it.
+        The array of packed polygons (see `rai.PackedPolys`)
+        is a view of their coordinates, made without copying.
+    """
+    if not use_numpy:
+        return None
+
+    if isinstance(polys, PackedPolys):
+        if polys.num_vertices < NUMPY_MIN_VERTICES:
+            return None
+        return polys.to_array(), tuple(polys.lengths())
+
+    lengths = tuple(len(poly) for poly in polys)
+    if sum(lengths) < NUMPY_MIN_VERTICES:
+        return None
+
+    vertices = np.array(
+        [point for poly in polys for point in poly],
+        dtype=np.float64,
+        )
+    return vertices, lengths
+
+def transform_polys(
+        matrix: Mat3S,
+        polys: Polys,
+        array: PolyArray | None = None,
+        ) -> PolysS:
+    """
+    Apply transformation to polys and return new transformed polys.
+
+    Parameters
+    ----------
+    matrix
+        The affine matrix to apply
+    polys
+        The polygons to transform
+    array
+        The same polygons, as returned by `polys_to_array`.
+        If given, and numpy is in use,
+        all vertices are transformed in one go with numpy.
+        Converting polygons to an array is expensive,
+        so this is only worth it if the array is reused.
+
+    Returns
+    -------
+    PolysS
+        The transformed polygons.
+        In grid mode (see `rai.grid`), they are snapped to the grid.
+    """
+    if array is None or not use_numpy:
+        return [transform_poly(matrix, poly) for poly in polys]
+
+    vertices, lengths = array
+    transformed = transform_array(matrix, vertices)
+
+    # Going through `tolist` and `zip` is much faster
+    # than converting each point on its own
+    xs, ys = transformed.T.tolist()
+    points = list(zip(xs, ys))
+
+    result = []
+    start = 0
+    for length in lengths:
+        result.append(points[start:start + length])
+        start += length
+    return result
+
+def transform_polys_packed(
+        matrix: Mat3S,
+        polys: Polys,
+        array: PolyArray | None = None,
+        ) -> PackedPolys:
+    """
+    Apply transformation to polys and return them packed.
+
+    This works like `transform_polys`,
+    except that the transformed polygons are packed
+    (see `rai.PackedPolys`),
+    so no tuple is made for any vertex.
+
+    Parameters
+    ----------
+    matrix
+        The affine matrix to apply
+    polys
+        The polygons to transform
+    array
+        The same polygons, as returned by `polys_to_array`
+
+    Returns
+    -------
+    PackedPolys
+        The transformed polygons.
+        In grid mode (see `rai.grid`), they are snapped to the grid.
+    """
+    if isinstance(polys, PackedPolys):
+        return polys.transformed(matrix)
+
+    if array is None or not use_numpy:
+        return PackedPolys(polys).transformed(matrix)
+
+    vertices, lengths = array
+    return PackedPolys.from_arrays(
+        transform_array(matrix, vertices).tobytes(),
+        accumulate(lengths, initial=0),
+        )
+
+def transform_array(matrix: Mat3S, vertices: Any) -> Any:
+    """
+    Apply transformation to an (N, 2) numpy array of vertices.
+
+    Parameters
+    ----------
+    matrix
+        The affine matrix to apply
+    vertices
+        The vertices to transform
+
+    Returns
+    -------
+    numpy.ndarray
+        A new (N, 2) array of the transformed vertices.
+        In grid mode (see `rai.grid`), they are snapped to the grid.
+    """
+    linear = np.array(
+        ((matrix[0][0], matrix[1][0]), (matrix[0][1], matrix[1][1])),
+        dtype=np.float64,
+        )
+    transformed = vertices @ linear
+    transformed += (matrix[0][2], matrix[1][2])
+
+    if grid.unit is not None:
+        transformed = np.floor(transformed / grid.unit + 0.5)
+        transformed *= grid.unit
+    return transformed
+
 def transform_point(
         matrix: Mat3S,
         point: Vec2
@@ -63,7 +63,8 @@ class AnSec(rai.Compo):
             r2: float,
             theta1: float,
             theta2: float,
-            num_points: int = 100,
+            num_points: int | None = None,
+            tolerance: float | None = None,
             ) -> None:
         """
         Construct and AnSec.
@@ -80,6 +81,12 @@ class AnSec(rai.Compo):
             The stop angle
         num_points
             The number of points to use in each arc (inner and outter).
+        tolerance
+            Maximum distance between the polygon and the true arcs.
+            Used to calculate the number of points of each arc
+            if `num_points` is not given.
+            Defaults to `rai.helpers.arc_tolerance`.
+            If that is None too, 100 points are used for each arc.
 
         SeeAlso
         -------
@@ -91,16 +98,38 @@ class AnSec(rai.Compo):
             self.geoms.update({'root': [[]]})
             return
 
-        theta_step = (theta2 - theta1) / num_points
-        angles = tuple(theta1 + theta_step * i for i in range(num_points + 1))
+        if num_points is None and tolerance is None:
+            tolerance = rai.helpers.arc_tolerance
+
+        if num_points is None and tolerance is None:
+            num_points = 100
+
+        # With a tolerance, the inner arc needs fewer points
+        # than the outter arc.
+        arcs = []
+        for radius in (r1, r2):
+            if num_points is None:
+                assert tolerance is not None
+                arc_points = rai.arc_num_points(
+                    radius,
+                    theta2 - theta1,
+                    tolerance,
+                    )
+            else:
+                arc_points = num_points
+
+            theta_step = (theta2 - theta1) / arc_points
+            arcs.append(tuple(
+                theta1 + theta_step * i for i in range(arc_points + 1)
+                ))
 
         self.geoms.update({
             'root': [
                 [
                     rai.polar(arg=angle, mod=radius)
                     for radius, angles in (
-                        (r1, angles),
-                        (r2, angles[::-1]),
+                        (r1, arcs[0]),
+                        (r2, arcs[1][::-1]),
                         # Fun exercise: change the above two tuples to lists
                         # and see what mypy has to say about that
                         )
@@ -120,7 +149,8 @@ class AnSec(rai.Compo):
             theta2: float | None = None,
             thetamid: float | None = None,
             dtheta: float | None = None,
-            num_points: int = 100,
+            num_points: int | None = None,
+            tolerance: float | None = None,
             ) -> Self:
         """
         Produce a new ansec from any valid combination of parameters.
@@ -153,6 +183,9 @@ class AnSec(rai.Compo):
             angle delta or None
         num_points:
             number of points to use per arc (outter and inner)
+        tolerance:
+            maximum distance between the polygon and the true arcs,
+            see `AnSec._make`
 
         Raises
         ------
@@ -178,7 +211,7 @@ class AnSec(rai.Compo):
             dtheta,
             )
 
-        return cls(r1, r2, theta1, theta2, num_points)
+        return cls(r1, r2, theta1, theta2, num_points, tolerance)
 
     @staticmethod
     def interpret_radius(
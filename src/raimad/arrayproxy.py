@@ -0,0 +1,218 @@
+"""arrayproxy.py: home to ArrayProxy class."""
+
+from typing import Any, Iterator
+from hashlib import blake2b
+
+import raimad as rai
+from raimad.types import Vec2, Vec2S, PackableGeomsS
+from raimad.compo import _hash_floats
+
+class ArrayProxy(rai.Proxy):
+    """
+    ArrayProxy: a proxy that places its compo on a regular grid.
+
+    An ArrayProxy stores just one reference to its compo,
+    plus the number of elements and the lattice vectors of the grid,
+    so a 100x100 array costs as little memory as a single proxy
+    until it is steamrolled.
+
+    Element (i, j) of the array is the compo moved by
+    `i * vec_x + j * vec_y`,
+    then transformed and layermapped by this proxy.
+    In other words, the lattice is defined in the coordinate system
+    of the compo, and transforming the ArrayProxy
+    transforms the whole grid.
+    """
+
+    __slots__ = ('num_x', 'num_y', 'vec_x', 'vec_y')
+
+    def __init__(self,
+                 compo: 'rai.typing.CompoLike',
+                 num_x: int,
+                 num_y: int,
+                 vec_x: Vec2,
+                 vec_y: Vec2,
+                 lmap: 'rai.typing.LMapShorthand' = None,
+                 transform: 'rai.typing.Transform | None' = None,
+                 _cif_link: bool = False,
+                 _autogenned: bool = False,
+                 _deepcopied: bool = False,
+                 ):
+        """
+        Create new ArrayProxy.
+
+        Use `Compo.array()` or `Proxy.array()`
+        for the common case of a rectangular grid.
+
+        Parameters
+        ----------
+        compo
+            The compo or proxy that the new proxy will point to
+        num_x
+            Number of elements along `vec_x`
+        num_y
+            Number of elements along `vec_y`
+        vec_x
+            Offset between neighbouring elements along the first axis
+        vec_y
+            Offset between neighbouring elements along the second axis
+        lmap
+            Layer map shorthand for the new proxy
+        transform:
+            Transformation for the new proxy (None for identity transform)
+        """
+        super().__init__(
+            compo,
+            lmap,
+            transform,
+            _cif_link=_cif_link,
+            _autogenned=_autogenned,
+            _deepcopied=_deepcopied,
+            )
+        self.num_x = num_x
+        self.num_y = num_y
+        self.vec_x = rai.vec2s(vec_x)
+        self.vec_y = rai.vec2s(vec_y)
+
+    def lattice(self) -> Iterator[Vec2S]:
+        """
+        Iterate over the offsets of all elements of the array.
+
+        Yields
+        ------
+        Vec2S
+            The offset of every element,
+            in the coordinate system of the compo
+            (i.e. before the transform of this proxy is applied).
+            Elements are yielded row by row.
+        """
+        for j in range(self.num_y):
+            for i in range(self.num_x):
+                yield self._get_offset(i, j)
+
+    def elements(self) -> Iterator['rai.typing.Proxy']:
+        """
+        Iterate over the elements of the array as regular proxies.
+
+        Yields
+        ------
+        rai.typing.Proxy
+            A new proxy for every element of the array,
+            pointing to the same compo as this array,
+            with the same layermap
+            and with a transform that places it on the grid.
+        """
+        for offset in self.lattice():
+            yield rai.Proxy(
+                self.compo,
+                self.lmap.shorthand,
+                rai.Transform().move(offset).compose(self.transform),
+                _autogenned=True,
+                )
+
+    @property
+    def geoms(self) -> PackableGeomsS:
+        """
+        Get the raw geometries of all elements as seen through this proxy.
+
+        Returns
+        -------
+        PackableGeomsS
+            Returns the raw geometries
+            (i.e. NOT geometries defined in subcompos)
+            defined in the CompoLike pointed to by this proxy,
+            repeated for every element of the array.
+        """
+        geoms: PackableGeomsS = {}
+        for element in self.elements():
+            for layer, layer_geoms in element.geoms.items():
+                if layer not in geoms.keys():
+                    geoms[layer] = (
+                        rai.PackedPolys()
+                        if isinstance(layer_geoms, rai.PackedPolys)
+                        else []
+                        )
+                geoms[layer].extend(layer_geoms)
+        return geoms
+
+    def _get_offset(self, i: int, j: int) -> Vec2S:
+        """Get offset of element (i, j) in the coordinate system of compo."""
+        return (
+            i * self.vec_x[0] + j * self.vec_y[0],
+            i * self.vec_x[1] + j * self.vec_y[1],
+            )
+
+    def _get_steamroll_stamp(
+            self,
+            memo: dict[int, Any] | None = None,
+            footprints: bool = False,
+            ) -> Any:
+        """
+        Get a stamp that identifies the steamrolled geometry of this proxy.
+
+        See `Compo._get_steamroll_stamp`.
+        """
+        return (
+            super()._get_steamroll_stamp(memo, footprints),
+            self.num_x,
+            self.num_y,
+            self.vec_x,
+            self.vec_y,
+            )
+
+    def _get_content_hash(
+            self,
+            memo: dict[int, Any],
+            hashes: dict[int, str],
+            ) -> str:
+        """
+        Get the content hash of this array proxy.
+
+        See `Proxy._get_content_hash`.
+        """
+        hasher = blake2b(b'array', digest_size=16)
+        hasher.update(super()._get_content_hash(memo, hashes).encode())
+        _hash_floats(
+            hasher,
+            (self.num_x, self.num_y, *self.vec_x, *self.vec_y),
+            )
+        return hasher.hexdigest()
+
+    def shallow_copy(
+            self,
+            _autogenned: bool = False,
+            _deepcopied: bool = False
+            ) -> 'rai.typing.Proxy':
+        """
+        Make a shallow copy of this array proxy.
+
+        See `Proxy.shallow_copy`.
+        """
+        return self.shallow_copy_reassign(
+            self.compo,
+            _autogenned=_autogenned,
+            _deepcopied=_deepcopied,
+            )
+
+    def shallow_copy_reassign(
+            self,
+            new_compo: 'rai.typing.CompoLike',
+            _autogenned: bool = False,
+            _deepcopied: bool = False,
+            ) -> 'rai.typing.Proxy':
+        """
+        Make a shallow copy of this array proxy and reassign to `new_compo`.
+
+        See `Proxy.shallow_copy_reassign`.
+        """
+        return type(self)(
+            new_compo,
+            self.num_x,
+            self.num_y,
+            self.vec_x,
+            self.vec_y,
+            self.lmap.shorthand,
+            self.transform.copy(),
+            _autogenned=_autogenned,
+            _deepcopied=_deepcopied
+            )
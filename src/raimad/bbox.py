@@ -36,6 +36,8 @@ class AbstractBBox(Generic[T]):
     This is a base class for BoundBBox and BBox.
     """
 
+    __slots__ = ('max_x', 'max_y', 'min_x', 'min_y')
+
     max_x: float
     max_y: float
     min_x: float
@@ -589,6 +591,8 @@ class BBox(AbstractBBox[Vec2S]):
     it is not tied to any proxy.
     """
 
+    __slots__ = ()
+
     def interpolate(
             self,
             x_ratio: float,
@@ -14,6 +14,8 @@ class BoundBBox(rai.AbstractBBox['rai.typing.BoundPoint']):
     `someproxy.bbox.mid_right.to(somepoint)`
     """
 
+    __slots__ = ('_proxy', )
+
     _proxy: 'rai.typing.Proxy'
 
     def __init__(
@@ -31,9 +31,11 @@ class BoundPoint():
     for the transformation.
     """
 
+    __slots__ = ('_x', '_y', '_proxy')
+
     _x: NumS
     _y: NumS
-    proxy: 'rai.typing.Proxy'
+    _proxy: 'rai.typing.Proxy'
 
     def __init__(self, x: Num, y: Num, proxy: 'rai.typing.Proxy'):
         """
@@ -1,6 +1,11 @@
 """Namespace flattening for `rai.cif` module."""
 from . import lname_transformers
+from . import encode
+from . import primitives
 from .noreuse import NoReuse
+from .reuse import Reuse
+from .fragmentcache import FragmentCache
+from .lnametable import LNameTable
 
 # __all__ should contain all re-exported objects
 # (checked by mypy and ruff)
@@ -10,5 +15,10 @@ from .noreuse import NoReuse
 
 __all__ = [
     "lname_transformers",
+    "encode",
+    "primitives",
     "NoReuse",
+    "Reuse",
+    "FragmentCache",
+    "LNameTable",
     ]
@@ -0,0 +1,73 @@
+"""encode.py: fast formatting of polygons as CIF polygon commands."""
+
+from itertools import chain
+from typing import Iterable
+from math import floor
+
+import raimad as rai
+from raimad.types import PackablePolysS
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy is optional, see `rai.affine.use_numpy`
+    pass
+
+def encode_polys(polys: PackablePolysS, multiplier: float) -> str:
+    """
+    Format polygons as CIF polygon commands.
+
+    Coordinates are multiplied by `multiplier`
+    and truncated towards zero
+    (or rounded to the nearest integer in grid mode, see `rai.grid`).
+    All polygons are formatted with a single `%` operation;
+    if numpy is used (see `rai.affine.use_numpy`)
+    and there are enough vertices,
+    the coordinates are scaled and truncated by numpy as well.
+    The coordinates of packed polygons (see `rai.PackedPolys`)
+    are read from their array directly.
+
+    Parameters
+    ----------
+    polys
+        The polygons to format
+    multiplier
+        Coordinates are multiplied by this number
+
+    Returns
+    -------
+    str
+        One indented `P` command for every polygon,
+        each on its own line.
+    """
+    coords: Iterable[float]
+    if isinstance(polys, rai.PackedPolys):
+        lengths = polys.lengths()
+        coords = polys.coords
+    else:
+        lengths = [len(poly) for poly in polys]
+        coords = chain.from_iterable(chain.from_iterable(polys))
+    template = ''.join([
+        '\tP ' + '%d %d ' * length + ';\n'
+        for length in lengths
+        ])
+
+    num_vertices = sum(lengths)
+    if rai.affine.use_numpy and num_vertices >= rai.affine.NUMPY_MIN_VERTICES:
+        if isinstance(polys, rai.PackedPolys):
+            # Copies the whole buffer of coordinates at once
+            array = np.array(polys.coords, np.float64)
+        else:
+            array = np.fromiter(coords, np.float64, num_vertices * 2)
+        array *= multiplier
+        if rai.grid.unit is not None:
+            array += 0.5
+            np.floor(array, out=array)
+        return template % tuple(array.astype(np.int64).tolist())
+
+    if rai.grid.unit is not None:
+        return template % tuple([
+            floor(coord * multiplier + 0.5)
+            for coord in coords
+            ])
+    return template % tuple([coord * multiplier for coord in coords])
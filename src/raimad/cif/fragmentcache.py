@@ -0,0 +1,144 @@
+"""fragmentcache.py: home to FragmentCache class."""
+
+from typing import Any, Hashable, TypeAlias
+from collections import OrderedDict
+from pathlib import Path
+import marshal
+import os
+import tempfile
+
+# CIF code of one routine, as written by `NoReuse`:
+# (
+#   routine number the code was written with,
+#   CIF code of the routine,
+#   fragments of the routines it calls, in the order they are defined,
+#   (RAIMAD layer name, CIF layer name) of every layer
+#       in the entire hierarchy, in the order they were first written,
+#   number of routines in the entire hierarchy,
+#   )
+# Fragments are plain tuples so that they can be saved with `marshal`.
+Fragment: TypeAlias = tuple[
+    int,
+    str,
+    tuple[Any, ...],
+    tuple[tuple[str, str], ...],
+    int,
+    ]
+
+# Bump this whenever the layout of fragments changes,
+# so that files saved by older versions are not loaded.
+FORMAT_VERSION = 2
+
+class FragmentCache:
+    """
+    FragmentCache: reuse CIF code of compos that did not change.
+
+    Pass the same FragmentCache to several exports
+    (`rai.export_cif(compo, fragment_cache=cache)`)
+    and every export after the first
+    only generates CIF code for the compos that changed in the meantime.
+    The cache can be saved to a file with `save`
+    and loaded in another run of Python with `load`,
+    which is what `raimad export --incremental` does.
+
+    The cache holds at most `maxsize` fragments,
+    the least recently used fragments are evicted first.
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+    _fragments: 'OrderedDict[Hashable, Fragment]'
+
+    def __init__(self, maxsize: int = 2 ** 16) -> None:
+        """
+        Create new FragmentCache.
+
+        Parameters
+        ----------
+        maxsize
+            Maximum number of fragments to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._fragments = OrderedDict()
+
+    def __len__(self) -> int:
+        """Get number of fragments in the cache."""
+        return len(self._fragments)
+
+    def clear(self) -> None:
+        """Remove all fragments from the cache."""
+        self._fragments.clear()
+
+    def get(self, key: Hashable) -> Fragment | None:
+        """Get a fragment from the cache, or None if there is none."""
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            self.misses += 1
+            return None
+
+        self._fragments.move_to_end(key)
+        self.hits += 1
+        return fragment
+
+    def put(self, key: Hashable, fragment: Fragment) -> None:
+        """Add a fragment to the cache."""
+        self._fragments[key] = fragment
+        self._fragments.move_to_end(key)
+
+        while len(self._fragments) > self.maxsize:
+            self._fragments.popitem(last=False)
+
+    def save(self, path: str | Path) -> None:
+        """
+        Save the fragment cache to a file.
+
+        Parameters
+        ----------
+        path
+            The file to save to.
+            Its directory is created if it does not exist.
+        """
+        path = Path(path)
+        items: tuple[Any, ...] = tuple(self._fragments.items())
+        data = marshal.dumps((FORMAT_VERSION, items))
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first,
+        # so other processes never see half a file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str | Path, maxsize: int = 2 ** 16) -> 'FragmentCache':
+        """
+        Load a fragment cache saved with `save`.
+
+        Parameters
+        ----------
+        path
+            The file to load from
+        maxsize
+            Maximum number of fragments to keep
+
+        Returns
+        -------
+        FragmentCache
+            The loaded fragment cache.
+            The cache is empty if the file does not exist,
+            is corrupt, or was saved by another version of RAIMAD.
+        """
+        cache = cls(maxsize)
+        try:
+            version, items = marshal.loads(Path(path).read_bytes())
+        except (OSError, ValueError, EOFError, TypeError):
+            return cache
+
+        if version == FORMAT_VERSION:
+            for key, fragment in items:
+                cache.put(key, fragment)
+        return cache
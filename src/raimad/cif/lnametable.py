@@ -0,0 +1,210 @@
+"""lnametable.py: home to LNameTable class."""
+
+from warnings import warn
+
+import raimad as rai
+from raimad.types import LNameTransformers
+from raimad.cif.lname_transformers import (
+    Enumerator,
+    InvalidLayerNameTransformerCallable,
+    InvalidLayerNameTransformerOutput,
+    UntransformableLayerName,
+    capitalise,
+    noop,
+    root,
+    )
+
+class LNameTable:
+    """
+    LNameTable: memoized mapping of RAIMAD layer names to CIF layer names.
+
+    Every RAIMAD layer name is passed through the layer name transformers
+    (see `rai.cif.lname_transformers`) only once,
+    the first time it is looked up;
+    after that, the CIF layer name is taken from `names`.
+    Stateful transformers such as `Enumerator`
+    are thus called once per layer name,
+    and any warnings they emit are emitted once per layer name as well.
+
+    The CIF exporters create a new table for every export.
+    To reuse the same table for several exports of the same design,
+    create one with `for_compo`, optionally fill it up front with `resolve`,
+    and pass it to the exporters
+    (`rai.export_cif(compo, lname_table=table)`).
+    The table of an exporter is also available as its `lname_table`.
+    """
+
+    lname_transformers: LNameTransformers
+    names: dict[str, str]
+
+    def __init__(self, lname_transformers: LNameTransformers) -> None:
+        """
+        Create new LNameTable.
+
+        Parameters
+        ----------
+        lname_transformers
+            The layer name transformers to resolve layer names with
+        """
+        self.lname_transformers = lname_transformers
+        self.names = {}
+
+    @classmethod
+    def for_compo(cls, compo: 'rai.typing.CompoLike') -> 'LNameTable':
+        """
+        Create new LNameTable with the layer name transformers of a compo.
+
+        These are the same transformers that the CIF exporters
+        would use for the compo.
+        """
+        return cls(_get_lname_transformers(compo))
+
+    def __getitem__(self, name: str) -> str:
+        """Transform a RAIMAD layer name to a CIF layer name."""
+        try:
+            return self.names[name]
+        except KeyError:
+            pass
+
+        transformed = _transform_lname(self.lname_transformers, name)
+        self.names[name] = transformed
+        return transformed
+
+    def __len__(self) -> int:
+        """Get number of layer names resolved so far."""
+        return len(self.names)
+
+    def resolve(self, compo: 'rai.typing.CompoLike') -> None:
+        """
+        Resolve all layer names in the hierarchy of a compo.
+
+        The layers are resolved in the order
+        in which `rai.cif.NoReuse` first writes them,
+        so a table filled by this method
+        gives the same CIF layer names as a fresh one would.
+        """
+        for layer in _get_layers(compo, {}):
+            self[layer]
+
+def _get_layers(
+        compo: 'rai.typing.CompoLike',
+        memo: dict[int, tuple['rai.typing.Compo', tuple[str, ...]]],
+        ) -> tuple[str, ...]:
+    """
+    Get all layers in the hierarchy of a compo (after lmaps).
+
+    The layers are in the order in which they first appear
+    when the hierarchy is walked depth-first,
+    with the geoms of every compo before its subcompos.
+    The layers of every final compo are stored in `memo`.
+    """
+    final = compo.final()
+    try:
+        final_layers = memo[id(final)][1]
+    except KeyError:
+        layers = dict.fromkeys(final.geoms.keys())
+        for subcompo in final.subcompos.values():
+            layers.update(dict.fromkeys(_get_layers(subcompo, memo)))
+
+        # The compo is stored alongside its layers
+        # so that its id cannot get reused by a different object
+        memo[id(final)] = (final, tuple(layers))
+        final_layers = memo[id(final)][1]
+
+    tower = tuple(compo.descend_p())[::-1]
+    mapped_layers: dict[str, None] = {}
+    for layer in final_layers:
+        mapped: str | None = layer
+        for proxy in tower:
+            if mapped is None:
+                break
+            mapped = proxy.lmap[mapped]
+        if mapped is not None:
+            mapped_layers[mapped] = None
+    return tuple(mapped_layers)
+
+def _get_lname_transformers(
+        compo: 'rai.typing.CompoLike',
+        ) -> LNameTransformers:
+    """Get the layer name transformers that should be used for `compo`."""
+    transformers: LNameTransformers
+
+    # TODO DOCUMENT THE LAMBDA THING SOMEWHERE!!
+    if hasattr(compo, '_experimental_lname_transformers'):
+        if hasattr(compo._experimental_lname_transformers, '__call__'):
+            transformers = compo._experimental_lname_transformers()
+        else:
+            transformers = compo._experimental_lname_transformers
+
+    else:
+        if hasattr(compo, '_experimental_extra_lname_transformers'):
+            if hasattr(
+                    compo._experimental_extra_lname_transformers,
+                    '__call__'
+                    ):
+                extras = compo._experimental_extra_lname_transformers()
+            else:
+                extras = compo._experimental_extra_lname_transformers
+        else:
+            extras = []
+
+        transformers = (
+            *extras,
+            root,
+            noop,
+            capitalise,
+            Enumerator(
+                warning=(
+                    "RAIMAD Layer name `{name}` converted to numeric CIF "
+                    "name `{result}.` For custom CIF layer names, specify "
+                    "a layer name transformer. To silence this warning "
+                    "while keeping the behavior, specify the "
+                    "rai.cif.lname_transformers.Enumerator() transformer "
+                    "manually. "
+                    )
+                )
+            )
+
+    return transformers
+
+def _transform_lname(lname_transformers: LNameTransformers, name: str) -> str:
+    for transformer in lname_transformers:
+        if hasattr(transformer, '__getitem__'):
+            try:
+                transformed = transformer[name]
+            except KeyError:
+                transformed = None
+
+        #elif isinstance(transformer, rai.types.LNameTransformerCallable):
+        elif hasattr(transformer, '__call__'):
+            try:
+                transformed = transformer(name)
+            except TypeError as err:
+                raise InvalidLayerNameTransformerCallable(
+                    "Could not call lname transformer {transformer}."
+                    ) from err
+
+        if transformed is not None:
+            if not rai.is_lname_valid(transformed):
+                warn(
+                    f"Layer name `{name}` was transformed to `{transformed}` "
+                    f"by transformer `{transformer}`, which is not a valid "
+                    f"CIF layer name. "
+                    f"The produced file may not be compatible with "
+                    f"all CIF viewers!!"
+                    ,
+                    InvalidLayerNameTransformerOutput
+                    )
+            break
+
+    if transformed is None:
+        raise UntransformableLayerName(
+            f"RAIMAD Layer name `{name}` could not be transformed to "
+            "a valid CIF layer name by any of the specified transformers "
+            f"( {lname_transformers} ). "
+            "Change the layer name or add a transformer that understands it. "
+            )
+
+    return transformed
+
+
@@ -1,82 +1,166 @@
 """noreuse.py: home to the NoReuse CIF exporter."""
 
-from typing import Iterator
+from typing import Iterator, Iterable, Generator
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from hashlib import blake2b
 from warnings import warn
+import os
+import re
 
 import raimad as rai
-from raimad.types import LNameTransformers
-from raimad.cif.lname_transformers import (
-    Enumerator,
-    InvalidLayerNameTransformerCallable,
-    InvalidLayerNameTransformerOutput,
-    UntransformableLayerName,
-    capitalise,
-    noop,
-    root,
-    )
+from raimad.cif.lnametable import LNameTable
+from raimad.cif.fragmentcache import Fragment
+from raimad.cif.encode import encode_polys
+from raimad.cif.primitives import encode_primitive
+
+# Layers with fewer vertices than this are not worth sending
+# to a worker process when exporting in parallel
+PARALLEL_MIN_VERTICES = 4096
+
+# Placeholder for polygons that are being formatted by a worker process
+_PENDING = '\0PENDING\0'
+
+# Routine numbers in the definition and call commands of a routine
+_ROUT_NUM_RE = re.compile(r'^(DS |\tC )(\d+)', re.MULTILINE)
 
 class NoReuse:
-    """CIF Exporter that doesn't reuse subroutines."""
+    """
+    CIF Exporter that doesn't reuse subroutines.
+
+    If `lazy` is set, the CIF code is not generated on construction
+    and `cif_string` is not set.
+    Use `yield_cif` to generate the CIF code piece by piece instead.
+
+    If a `fragment_cache` is given,
+    the CIF code of every routine is stored in it,
+    keyed by the content hash of the compo.
+    Compos that have not changed since an earlier export
+    with the same fragment cache are not exported again;
+    their CIF code is taken from the cache
+    (with routine numbers adjusted as needed).
+
+    If `workers` is more than 1,
+    the polygons of large layers are formatted
+    by that many worker processes in parallel.
+    Set `workers` to 0 to use one worker per CPU.
+    Parallel export is not combined with the fragment cache;
+    if both are given, the export runs in this process only.
+
+    Compos that are boxes, circles, or wires
+    are written with the native CIF command
+    if its letter is in `primitives`
+    and the compo is not transformed in a way that distorts it,
+    see `rai.cif.primitives`.
+
+    RAIMAD layer names are transformed to CIF layer names
+    through `lname_table`, which resolves every layer name only once.
+    Pass the same `lname_table` to several exports of the same design
+    to resolve layer names only once for all of them,
+    see `rai.cif.LNameTable`.
+    """
 
     def __init__(
             self,
             compo: 'rai.typing.CompoLike',
             multiplier: float = 1e2,
+            lazy: bool = False,
+            fragment_cache: 'rai.cif.FragmentCache | None' = None,
+            workers: int | None = None,
+            primitives: Iterable[str] = (),
+            lname_table: 'rai.cif.LNameTable | None' = None,
             ) -> None:
 
         self.compo = compo
         self.rout_num = 1
         self.multiplier = multiplier
 
+        self.primitives = frozenset(primitives)
+
         self.enable_cell_names = True  # TODO param
 
-        # TODO DOCUMENT THE LAMBDA THING SOMEWHERE!!
-        if hasattr(compo, '_experimental_lname_transformers'):
-            if hasattr(compo._experimental_lname_transformers, '__call__'):
-                self.lname_transformers = (
-                    compo._experimental_lname_transformers()
-                    )
-            else:
-                self.lname_transformers = (
-                    compo._experimental_lname_transformers
-                    )
-        else:
-            if hasattr(compo, '_experimental_extra_lname_transformers'):
-                if hasattr(
-                        compo._experimental_extra_lname_transformers,
-                        '__call__'
-                        ):
-                    extras = compo._experimental_extra_lname_transformers()
-                else:
-                    extras = compo._experimental_extra_lname_transformers
-            else:
-                extras = []
-
-            self.lname_transformers = (
-                *extras,
-                root,
-                noop,
-                capitalise,
-                Enumerator(
-                    warning=(
-                        "RAIMAD Layer name `{name}` converted to numeric CIF "
-                        "name `{result}.` For custom CIF layer names, specify "
-                        "a layer name transformer. To silence this warning "
-                        "while keeping the behavior, specify the "
-                        "rai.cif.lname_transformers.Enumerator() transformer "
-                        "manually. "
-                        )
-                    )
-                )
-            
+        if lname_table is None:
+            lname_table = LNameTable.for_compo(compo)
+        self.lname_table = lname_table
+        self.lname_transformers = self.lname_table.lname_transformers
 
-        self.cif_string = self._export_cif()
+        # id of compo -> (compo, number of routines needed to export it)
+        self._rout_counts: dict[int, tuple['rai.typing.Compo', int]] = {}
+
+        self.workers = (os.cpu_count() or 1) if workers == 0 else workers or 1
+        # Process pool and pending results while exporting in parallel
+        self._parallel: tuple[
+            ProcessPoolExecutor,
+            deque[Future[str]],
+            ] | None = None
+
+        self.fragment_cache = fragment_cache
+        # id of compo -> (compo, hash of names in hierarchy of compo)
+        self._names_hashes: dict[int, tuple['rai.typing.Compo', str]] = {}
+        # (RAIMAD layer name, CIF layer name) of every layer written
+        # while the fragment cache is used
+        self._lname_log: list[tuple[str, str]] = []
+
+        if not lazy:
+            self.cif_string = self._export_cif()
 
     def _export_cif(self) -> str:
-        return ''.join(self._yield_cif())
+        return ''.join(self.yield_cif())
 
-    def _yield_cif(self) -> Iterator[str]:
-        """Yield lines of cif file."""
+    def yield_cif(self) -> Iterator[str]:
+        """
+        Yield lines of cif file.
+
+        The lines are generated as they are yielded,
+        so only the current branch of the hierarchy is kept in memory.
+        """
+        if self.workers > 1 and self.fragment_cache is None:
+            yield from self._yield_cif_parallel()
+        else:
+            yield from self._yield_cif_serial()
+
+    def _yield_cif_parallel(self) -> Iterator[str]:
+        """
+        Yield lines of cif file, formatting polygons in worker processes.
+
+        The hierarchy is walked in this process,
+        which assigns routine numbers and writes everything but polygons.
+        The polygons of large layers are formatted by a process pool,
+        and put back in their place in the order they were submitted.
+        At most a few layers per worker are pending at a time,
+        so memory use stays bounded.
+        """
+        futures: deque[Future[str]] = deque()
+        pieces: deque[str] = deque()
+
+        with ProcessPoolExecutor(self.workers) as pool:
+            self._parallel = (pool, futures)
+            try:
+                for piece in self._yield_cif_serial():
+                    pieces.append(piece)
+
+                    while pieces and (
+                            pieces[0] is not _PENDING
+                            or futures[0].done()
+                            or len(futures) > self.workers * 4
+                            ):
+                        piece = pieces.popleft()
+                        if piece is _PENDING:
+                            piece = futures.popleft().result()
+                        yield piece
+
+                while pieces:
+                    piece = pieces.popleft()
+                    if piece is _PENDING:
+                        piece = futures.popleft().result()
+                    yield piece
+
+            finally:
+                self._parallel = None
+
+    def _yield_cif_serial(self) -> Iterator[str]:
+        """Yield lines of cif file in this process only."""
+        self.rout_num = 1
         first_rout = self.rout_num
         yield from self.yield_cif_bare(
             self.compo,
@@ -91,6 +175,30 @@ class NoReuse:
             cell_name: str | None,
             ) -> Iterator[str]:
         """Yield lines of CIF of a particular component, without calling it."""
+        if self.fragment_cache is not None:
+            yield from self._yield_fragment(compo, cell_name)
+            return
+
+        children: list[tuple['rai.typing.CompoLike', str | None]] = []
+        yield from self._yield_routine(compo, cell_name, children)
+
+        # Define the procedures called by this routine
+        for child, child_cell_name in children:
+            yield from self.yield_cif_bare(child, child_cell_name)
+
+    def _yield_routine(
+            self,
+            compo: 'rai.typing.CompoLike',
+            cell_name: str | None,
+            children: list[tuple['rai.typing.CompoLike', str | None]],
+            ) -> Iterator[str]:
+        """
+        Yield the routine of a particular component.
+
+        The compos called by the routine, along with their cell names,
+        are appended to `children`.
+        They must be defined right after this routine, in that order.
+        """
 
         # Opening line, define the routine
         yield f'DS {self.rout_num} 1 1;\n'
@@ -117,57 +225,305 @@ class NoReuse:
         # advance to next routine number
         self.rout_num += 1
 
+        if any(isinstance(proxy, rai.ArrayProxy) for proxy in compo.descend_p()):
+            yield from self._yield_array_bare(compo, cell_name, children)
+            return
+
+        native = self._get_native(compo)
+        if native is not None:
+            layer, command = native
+            yield f'\tL {self._transform_lname(layer)};\n'
+            yield command
+
         # Export all geometries
-        for layer, geom in compo.geoms.items():
+        for layer, geom in ({} if native else compo.geoms).items():
 
             # If a layer has been LMapp'ed to None,
             # that means the user wants it discarded. Skip.
             if layer is None:
                 continue
 
-            transformed_layer = _transform_lname(
-                self.lname_transformers,
-                layer
-                )
+            transformed_layer = self._transform_lname(layer)
 
             yield f'\tL {transformed_layer};\n'
-            for poly in geom:
-                yield '\tP '
-                for point in poly:
-                    yield (
-                        f'{int(point[0] * self.multiplier)} '
-                        f'{int(point[1] * self.multiplier)} '
-                        )
-                yield ';\n'
 
-        # Precompute a list of [routine number, subcomponent]
+            if (
+                    self._parallel is not None
+                    and (
+                        geom.num_vertices
+                        if isinstance(geom, rai.PackedPolys)
+                        else sum(map(len, geom))
+                        ) >= PARALLEL_MIN_VERTICES
+                    ):
+                # Format the polygons in a worker process,
+                # `_yield_cif_parallel` puts the result
+                # in place of the placeholder
+                pool, futures = self._parallel
+                futures.append(pool.submit(
+                    encode_polys,
+                    geom,
+                    self.multiplier,
+                    ))
+                yield _PENDING
+                continue
+
+            yield encode_polys(geom, self.multiplier)
+
         # Remember, subcomponents can also have subcomponents,
         # so the subroutine numbers won't always be consecutive.
-        # There's no way to know ahead of time,
-        # you just have to generate each subcompo and keep track of
-        # the routine number
-        subcompos = []
+        # Count how many routines each subcompo takes up
+        # so that the calls can be written before the subcompos
+        # are generated.
+        # This avoids having to buffer the CIF code of the subcompos.
+        rout_num = self.rout_num
         for subcompo_name, subcompo in compo.subcompos.items():
-
-            subcompos.append((
-                self.rout_num,
-                list(self.yield_cif_bare(
-                    subcompo,
-                    cell_name=
-                        _compo_to_cell_name(subcompo_name, subcompo)
-                        if self.enable_cell_names
-                        else None
-                    ))
+            yield f'\tC {rout_num};\n'
+            rout_num += self._count_routs(subcompo)
+            children.append((
+                subcompo,
+                _compo_to_cell_name(subcompo_name, subcompo)
+                if self.enable_cell_names
+                else None
                 ))
+        yield 'DF;\n'
+
+    def _yield_array_bare(
+            self,
+            compo: 'rai.typing.CompoLike',
+            cell_name: str | None,
+            children: list[tuple['rai.typing.CompoLike', str | None]],
+            ) -> Iterator[str]:
+        """
+        Yield the body of a routine that places every element of an array.
+
+        `compo` is a proxy tower that contains at least one ArrayProxy.
+        The outermost ArrayProxy is replaced by a regular proxy,
+        which is appended to `children` to be defined in the next routine,
+        and called once for every element of the array.
+        Any further ArrayProxies in the tower
+        are handled the same way when that routine is defined.
+        """
+        tower = list(compo.descend_p())
+        index = next(
+            index for index, proxy in enumerate(tower)
+            if isinstance(proxy, rai.ArrayProxy)
+            )
+        array = tower[index]
+        assert isinstance(array, rai.ArrayProxy)
 
-        # Call subcomponent procedures
-        for i, _ in subcompos:
-            yield f'\tC {i};\n'
+        element: 'rai.typing.CompoLike' = rai.Proxy(
+            array.compo,
+            array.lmap.shorthand,
+            array.transform.copy(),
+            )
+        for proxy in reversed(tower[:index]):
+            element = proxy.shallow_copy_reassign(element)
+
+        # The lattice is defined in the coordinate system of the compo,
+        # so it is transformed by the array proxy
+        # and all proxies above it,
+        # but without their translation.
+        matrix = rai.affine.matmul(
+            *(proxy.transform._affine for proxy in tower[:index + 1])
+            )
+        for offset in array.lattice():
+            move_x = matrix[0][0] * offset[0] + matrix[0][1] * offset[1]
+            move_y = matrix[1][0] * offset[0] + matrix[1][1] * offset[1]
+            yield (
+                f'\tC {self.rout_num} T '
+                f'{rai.grid.to_int(move_x * self.multiplier)} '
+                f'{rai.grid.to_int(move_y * self.multiplier)};\n'
+                )
         yield 'DF;\n'
 
-        # Define those procedures
-        for _, this_subcompo in subcompos:
-            yield from this_subcompo
+        children.append((
+            element,
+            f'{cell_name}_element' if cell_name else cell_name,
+            ))
+
+    def _yield_fragment(
+            self,
+            compo: 'rai.typing.CompoLike',
+            cell_name: str | None,
+            ) -> Generator[str, None, Fragment]:
+        """
+        Yield CIF of a component, reusing fragments from the fragment cache.
+
+        Returns
+        -------
+        Fragment
+            The fragment of the component,
+            which has been stored in the fragment cache.
+        """
+        assert self.fragment_cache is not None
+        key = (
+            compo.content_hash(),
+            self._get_names_hash(compo),
+            cell_name,
+            self.multiplier,
+            self.enable_cell_names,
+            tuple(sorted(self.primitives)),
+            # Coordinates are rounded instead of truncated in grid mode
+            rai.grid.unit,
+            )
+
+        fragment = self.fragment_cache.get(key)
+        if fragment is not None and all(
+                # The CIF names of layers may depend on the order
+                # in which they are first seen (see `Enumerator`)
+                self._transform_lname(layer) == cif_layer
+                for layer, cif_layer in fragment[3]
+                ):
+            yield from self._yield_fragment_tree(fragment)
+            return fragment
+
+        base = self.rout_num
+        log_start = len(self._lname_log)
+        children: list[tuple['rai.typing.CompoLike', str | None]] = []
+        text = ''.join(self._yield_routine(compo, cell_name, children))
+        yield text
+
+        child_fragments = []
+        for child, child_cell_name in children:
+            child_fragment = yield from self._yield_fragment(
+                child,
+                child_cell_name,
+                )
+            child_fragments.append(child_fragment)
+
+        fragment = (
+            base,
+            text,
+            tuple(child_fragments),
+            tuple(dict.fromkeys(self._lname_log[log_start:])),
+            self.rout_num - base,
+            )
+        self.fragment_cache.put(key, fragment)
+        return fragment
+
+    def _yield_fragment_tree(self, fragment: Fragment) -> Iterator[str]:
+        """Yield the CIF of a fragment and its children, renumbered."""
+        base, text, children, _, _ = fragment
+        yield _renumber_routs(text, self.rout_num - base)
+        self.rout_num += 1
+
+        for child in children:
+            yield from self._yield_fragment_tree(child)
+
+    def _get_names_hash(self, compo: 'rai.typing.CompoLike') -> str:
+        """
+        Hash the names of the classes and subcompos in a hierarchy.
+
+        These are not part of `content_hash`, but they end up in cell names.
+        """
+        final = compo.final()
+        try:
+            return self._names_hashes[id(final)][1]
+        except KeyError:
+            pass
+
+        hasher = blake2b(digest_size=16)
+        hasher.update(type(final).__name__.encode())
+        for subcompo_name, subcompo in final.subcompos.items():
+            hasher.update(
+                f'\0{subcompo_name!r}\0{self._get_names_hash(subcompo)}'
+                .encode()
+                )
+
+        # The compo is stored alongside its hash
+        # so that its id cannot get reused by a different object
+        self._names_hashes[id(final)] = (final, hasher.hexdigest())
+        return self._names_hashes[id(final)][1]
+
+    def _get_native(
+            self,
+            compo: 'rai.typing.CompoLike',
+            ) -> tuple[str, str] | None:
+        """
+        Get the native CIF command of a compo, if it should be used.
+
+        Returns
+        -------
+        tuple[str, str] | None
+            The (mapped) layer and the native CIF command,
+            or None if the geoms of the compo
+            should be written as polygons.
+        """
+        if not self.primitives:
+            return None
+
+        primitive = compo.final()._get_primitive()
+        if primitive is None or primitive[0] not in self.primitives:
+            return None
+
+        layer = _map_through_tower(compo, 'root')
+        if layer is None:
+            return None
+
+        if isinstance(compo, rai.Proxy):
+            matrix = compo.get_flat_transform()._affine
+        else:
+            matrix = rai.affine.identity()
+
+        command = encode_primitive(primitive, matrix, self.multiplier)
+        if command is None:
+            return None
+        return layer, command
+
+    def _transform_lname(self, layer: str) -> str:
+        """Transform a RAIMAD layer name to a CIF layer name."""
+        transformed = self.lname_table[layer]
+        if self.fragment_cache is not None:
+            self._lname_log.append((layer, transformed))
+        return transformed
+
+    def _count_routs(self, compo: 'rai.typing.CompoLike') -> int:
+        """Count routines needed to export a compo and its subcompos."""
+        # Every ArrayProxy in the tower takes up one extra routine
+        # that calls the element once for every position in the array
+        num_arrays = sum(
+            isinstance(proxy, rai.ArrayProxy)
+            for proxy in compo.descend_p()
+            )
+        return num_arrays + self._count_routs_final(compo.final())
+
+    def _count_routs_final(self, compo: 'rai.typing.Compo') -> int:
+        """Count routines needed to export a final compo and its subcompos."""
+        try:
+            return self._rout_counts[id(compo)][1]
+        except KeyError:
+            pass
+
+        count = 1 + sum(
+            self._count_routs(subcompo)
+            for subcompo in compo.subcompos.values()
+            )
+
+        # The compo is stored alongside its count
+        # so that its id cannot get reused by a different object
+        self._rout_counts[id(compo)] = (compo, count)
+        return count
+
+def _map_through_tower(
+        compo: 'rai.typing.CompoLike',
+        layer: str,
+        ) -> str | None:
+    """Map a layer of `compo.final()` through all the lmaps of a tower."""
+    for proxy in reversed(tuple(compo.descend_p())):
+        mapped = proxy.lmap[layer]
+        if mapped is None:
+            return None
+        layer = mapped
+    return layer
+
+def _renumber_routs(text: str, offset: int) -> str:
+    """Add `offset` to all routine numbers in the CIF code of a routine."""
+    if offset == 0:
+        return text
+    return _ROUT_NUM_RE.sub(
+        lambda match: f'{match[1]}{int(match[2]) + offset}',
+        text,
+        )
 
 def _compo_to_cell_name(
         subcompo_name: str | int,
@@ -183,45 +539,3 @@ def _compo_to_cell_name(
     type_name = type(subcompo.final()).__name__
 
     return f"{type_name}::{instance_name}"
-
-def _transform_lname(lname_transformers: LNameTransformers, name: str) -> str:
-    for transformer in lname_transformers:
-        if hasattr(transformer, '__getitem__'):
-            try:
-                transformed = transformer[name]
-            except KeyError:
-                transformed = None
-
-        #elif isinstance(transformer, rai.types.LNameTransformerCallable):
-        elif hasattr(transformer, '__call__'):
-            try:
-                transformed = transformer(name)
-            except TypeError as err:
-                raise InvalidLayerNameTransformerCallable(
-                    "Could not call lname transformer {transformer}."
-                    ) from err
-
-        if transformed is not None:
-            if not rai.is_lname_valid(transformed):
-                warn(
-                    f"Layer name `{name}` was transformed to `{transformed}` "
-                    f"by transformer `{transformer}`, which is not a valid "
-                    f"CIF layer name. "
-                    f"The produced file may not be compatible with "
-                    f"all CIF viewers!!"
-                    ,
-                    InvalidLayerNameTransformerOutput
-                    )
-            break
-
-    if transformed is None:
-        raise UntransformableLayerName(
-            f"RAIMAD Layer name `{name}` could not be transformed to "
-            "a valid CIF layer name by any of the specified transformers "
-            f"( {lname_transformers} ). "
-            "Change the layer name or add a transformer that understands it. "
-            )
-
-    return transformed
-
-
@@ -0,0 +1,113 @@
+"""
+primitives.py: native CIF commands for boxes, circles, and wires.
+
+CIF has commands for some common shapes:
+`B` (box), `R` (roundflash, i.e. a circle), and `W` (wire).
+They are much shorter than the equivalent `P` (polygon) command
+(a `Circle` is a polygon with 200 vertices by default),
+and viewers can draw them exactly.
+
+Compos whose geometry is one of these shapes
+record it with `Compo._set_primitive`.
+Exporters given `primitives=rai.cif.primitives.ALL`
+(or any subset of it, such as `('B', )`)
+write the native command
+whenever the compo is transformed in a way that keeps the shape intact,
+and fall back to the polygon otherwise.
+
+Note that the CIF specification gives wires round ends,
+whereas `RectWire` is a rectangle with flat ends.
+Some CIF readers (such as KLayout) can be configured
+to read wires with flat ends.
+Only enable `W` if yours is.
+"""
+
+from math import sqrt
+
+import raimad as rai
+from raimad.types import Primitive
+from raimad.grid import to_int
+
+# All native CIF commands that RAIMAD can write
+ALL = ('B', 'R', 'W')
+
+# How far an affine matrix is allowed to deviate from
+# the kind of transform a primitive needs.
+TOLERANCE = 1e-9
+
+def encode_primitive(
+        primitive: Primitive,
+        matrix: 'rai.typing.Affine',
+        multiplier: float,
+        ) -> str | None:
+    """
+    Format a primitive as a native CIF command.
+
+    Parameters
+    ----------
+    primitive
+        The primitive, see `rai.types.Primitive`
+    matrix
+        Affine matrix to transform the primitive with
+    multiplier
+        Coordinates and sizes are multiplied by this number
+
+    Returns
+    -------
+    str | None
+        The CIF command (with indentation and newline),
+        or None if the transformed primitive
+        cannot be written as a native CIF command:
+        boxes cannot be rotated except by multiples of 90 degrees,
+        and no primitive can be sheared or scaled non-uniformly
+        (except for boxes, which may be scaled along their sides).
+    """
+    kind, params = primitive
+    a, b, move_x = matrix[0]
+    c, d, move_y = matrix[1]
+
+    if kind == 'B':
+        length, width = params
+        if abs(b) <= TOLERANCE and abs(c) <= TOLERANCE:
+            size_x = abs(a) * length
+            size_y = abs(d) * width
+        elif abs(a) <= TOLERANCE and abs(d) <= TOLERANCE:
+            size_x = abs(b) * width
+            size_y = abs(c) * length
+        else:
+            return None
+
+        return (
+            f'\tB {to_int(size_x * multiplier)} '
+            f'{to_int(size_y * multiplier)} '
+            f'{to_int(move_x * multiplier)} '
+            f'{to_int(move_y * multiplier)};\n'
+            )
+
+    # Circles and wires can only be moved, rotated, mirrored,
+    # and scaled uniformly
+    if (
+            abs(a * a + c * c - b * b - d * d) > TOLERANCE
+            or abs(a * b + c * d) > TOLERANCE
+            ):
+        return None
+    scale = sqrt(abs(a * d - b * c))
+
+    if kind == 'R':
+        radius, = params
+        return (
+            f'\tR {to_int(2 * radius * scale * multiplier)} '
+            f'{to_int(move_x * multiplier)} '
+            f'{to_int(move_y * multiplier)};\n'
+            )
+
+    if kind == 'W':
+        width, *coords = params
+        points = ' '.join(
+            f'{to_int((a * x + b * y + move_x) * multiplier)} '
+            f'{to_int((c * x + d * y + move_y) * multiplier)}'
+            for x, y in rai.couples(coords)
+            )
+        return f'\tW {to_int(width * scale * multiplier)} {points};\n'
+
+    return None
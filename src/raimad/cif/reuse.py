@@ -0,0 +1,386 @@
+"""reuse.py: home to the Reuse CIF exporter."""
+
+from typing import Iterator, Iterable, TypeAlias
+from math import gcd
+
+import raimad as rai
+from raimad.types import PackableGeomsS
+from raimad.cif.noreuse import _map_through_tower
+from raimad.cif.lnametable import LNameTable, _get_layers
+from raimad.cif.primitives import encode_primitive
+from raimad.cif.encode import encode_polys
+
+# Mapping of the layers of a compo to the layers of the CIF file
+# (after lmaps, but before lname transformers).
+# None means that the layer is discarded.
+LayerMap: TypeAlias = dict[str, str | None]
+
+# CIF rotations are given as a direction vector with integer coordinates.
+# For angles that are not a multiple of 90 degrees,
+# the direction vector is approximated with this many units.
+ROTATION_PRECISION = 10 ** 9
+
+# How far an affine matrix is allowed to deviate from
+# a rotation/mirror/translation before it is considered to
+# also scale or shear.
+TOLERANCE = 1e-9
+
+class Reuse:
+    """
+    CIF Exporter that reuses subroutines.
+
+    Unlike NoReuse, which writes out a new routine for every
+    subcompo in the hierarchy,
+    this exporter writes out only one routine for every unique compo
+    (as given by `Proxy.final()`) and layermap,
+    and places it with a `C` call command that carries
+    the translation, rotation, and mirroring of the proxy.
+    A design with thousands of copies of the same compo
+    thus contains its geometry only once.
+
+    CIF calls cannot scale or shear.
+    Subcompos whose transform does either
+    are flattened into the geometry of their parent.
+
+    If `lazy` is set, the CIF code is not generated on construction
+    and `cif_string` is not set.
+    Use `yield_cif` to generate the CIF code piece by piece instead.
+
+    Compos that are boxes, circles, or wires
+    are written with the native CIF command
+    if its letter is in `primitives`, see `rai.cif.primitives`.
+
+    RAIMAD layer names are transformed to CIF layer names
+    through `lname_table`, see `rai.cif.NoReuse`.
+
+    If `enable_cell_names` is set,
+    every routine starts with a `9` command
+    that names it after the class of its compo.
+    """
+
+    def __init__(
+            self,
+            compo: 'rai.typing.CompoLike',
+            multiplier: float = 1e2,
+            lazy: bool = False,
+            primitives: Iterable[str] = (),
+            lname_table: 'rai.cif.LNameTable | None' = None,
+            enable_cell_names: bool = True,
+            ) -> None:
+
+        self.compo = compo
+        self.rout_num = 1
+        self.multiplier = multiplier
+        self.primitives = frozenset(primitives)
+
+        self.enable_cell_names = enable_cell_names
+
+        if lname_table is None:
+            lname_table = LNameTable.for_compo(compo)
+        self.lname_table = lname_table
+        self.lname_transformers = self.lname_table.lname_transformers
+
+        # (id of compo, layermap) -> routine number
+        self._routs: dict[
+            tuple[int, tuple[tuple[str, str | None], ...]],
+            int
+            ] = {}
+        # id of compo -> (compo, layers in entire hierarchy of compo),
+        # see `rai.cif.lnametable._get_layers`
+        self._layers: dict[
+            int,
+            tuple['rai.typing.Compo', tuple[str, ...]]
+            ] = {}
+        # type name -> how many cells with this name were already written
+        self._cell_names: dict[str, int] = {}
+
+        if not lazy:
+            self.cif_string = self._export_cif()
+
+    def _export_cif(self) -> str:
+        return ''.join(self.yield_cif())
+
+    def yield_cif(self) -> Iterator[str]:
+        """
+        Yield lines of cif file.
+
+        The lines are generated as they are yielded.
+        Apart from the current branch of the hierarchy,
+        only the routine numbers of already written compos
+        are kept in memory.
+        """
+        self.rout_num = 1
+        self._routs = {}
+        self._cell_names = {}
+
+        final = self.compo.final()
+        layer_map = {
+            layer: _map_through_tower(self.compo, layer)
+            for layer in _get_layers(final, self._layers)
+            }
+        calls = [
+            _affine_to_cif_call(affine, self.multiplier)
+            for affine in _get_flat_affines(self.compo)
+            ]
+
+        if None in calls:
+            # Toplevel proxy scales or shears, flatten everything
+            rout_num = self.rout_num
+            self.rout_num += 1
+            yield f'DS {rout_num} 1 1;\n'
+            if self.enable_cell_names:
+                yield f'9 {_unique_name(final, self._cell_names)};\n'
+            yield from self._yield_geoms(self.compo.steamroll(), None)
+            yield 'DF;\n'
+            calls = ['']
+
+        else:
+            yield from self._yield_cell(final, layer_map)
+            rout_num = self._routs[_cell_key(final, layer_map)]
+
+        for call in calls:
+            yield f'C {rout_num}{call};\n'
+        yield 'E'
+
+    def _yield_cell(
+            self,
+            compo: 'rai.typing.Compo',
+            layer_map: LayerMap,
+            ) -> Iterator[str]:
+        """
+        Yield definition of a compo, as well as of the compos it calls.
+
+        Nothing is yielded if the compo has already been defined
+        with this layermap.
+        The routine number of the compo is recorded in `self._routs`.
+        """
+        key = _cell_key(compo, layer_map)
+        if key in self._routs:
+            return
+
+        # Subcompos must be defined before the routine
+        # that calls them is started,
+        # since CIF routine definitions cannot be nested.
+        calls: list[tuple[int, str | None]] = []
+        flattened = []
+        for subcompo in compo.subcompos.values():
+            # An ArrayProxy is called once for every element
+            sub_calls = [
+                _affine_to_cif_call(affine, self.multiplier)
+                for affine in _get_flat_affines(subcompo)
+                ]
+
+            if None in sub_calls:
+                flattened.append(subcompo)
+                continue
+
+            sub_final = subcompo.final()
+            sub_layer_map = {}
+            for layer in _get_layers(sub_final, self._layers):
+                mapped = _map_through_tower(subcompo, layer)
+                sub_layer_map[layer] = (
+                    None if mapped is None else layer_map[mapped]
+                    )
+
+            yield from self._yield_cell(sub_final, sub_layer_map)
+            sub_rout_num = self._routs[_cell_key(sub_final, sub_layer_map)]
+            calls.extend((sub_rout_num, call) for call in sub_calls)
+
+        rout_num = self.rout_num
+        self.rout_num += 1
+        self._routs[key] = rout_num
+
+        yield f'DS {rout_num} 1 1;\n'
+
+        if self.enable_cell_names:
+            yield f'9 {_unique_name(compo, self._cell_names)};\n'
+
+        native = self._get_native(compo, layer_map)
+        if native is None:
+            yield from self._yield_geoms(compo.geoms, layer_map)
+        else:
+            yield from native
+
+        for subcompo in flattened:
+            native = (
+                self._get_native(subcompo, layer_map)
+                # Only compos without subcompos can be a single primitive
+                if not len(subcompo.final().subcompos)
+                else None
+                )
+            if native is None:
+                yield from self._yield_geoms(subcompo.steamroll(), layer_map)
+            else:
+                yield from native
+
+        for sub_rout_num, call in calls:
+            yield f'\tC {sub_rout_num}{call};\n'
+
+        yield 'DF;\n'
+
+    def _yield_geoms(
+            self,
+            geoms: PackableGeomsS,
+            layer_map: LayerMap | None,
+            ) -> Iterator[str]:
+        """Yield layer and polygon commands for geoms, mapped by layer_map."""
+        for layer, polys in geoms.items():
+            mapped = layer if layer_map is None else layer_map[layer]
+
+            # If a layer has been LMapp'ed to None,
+            # that means the user wants it discarded. Skip.
+            if mapped is None:
+                continue
+
+            transformed_layer = self.lname_table[mapped]
+
+            yield f'\tL {transformed_layer};\n'
+            yield encode_polys(polys, self.multiplier)
+
+    def _get_native(
+            self,
+            compo: 'rai.typing.CompoLike',
+            layer_map: LayerMap,
+            ) -> list[str] | None:
+        """
+        Get the native CIF commands of a compo, if they should be used.
+
+        Only the geoms of `compo` are considered, not its subcompos.
+
+        Returns
+        -------
+        list[str] | None
+            The layer command and the native command
+            of every instance placed by `compo` (see `_get_flat_affines`),
+            an empty list if the layer of the primitive is discarded,
+            or None if the geoms of the compo
+            should be written as polygons.
+        """
+        primitive = compo.final()._get_primitive()
+        if primitive is None or primitive[0] not in self.primitives:
+            return None
+
+        mapped = _map_through_tower(compo, 'root')
+        if mapped is not None:
+            mapped = layer_map[mapped]
+        if mapped is None:
+            return []
+
+        commands = []
+        for affine in _get_flat_affines(compo):
+            command = encode_primitive(primitive, affine, self.multiplier)
+            if command is None:
+                return None
+            commands.append(command)
+
+        transformed_layer = self.lname_table[mapped]
+        return [f'\tL {transformed_layer};\n', *commands]
+
+def _unique_name(compo: 'rai.typing.Compo', counts: dict[str, int]) -> str:
+    """
+    Get a unique cell name for a compo.
+
+    The name is the class name of the compo,
+    followed by `$1`, `$2`, ... if that class was already named before.
+    `counts` holds the number of names given to every class so far.
+    """
+    type_name = type(compo).__name__
+    count = counts.get(type_name, 0)
+    counts[type_name] = count + 1
+
+    if count == 0:
+        return type_name
+    return f'{type_name}${count}'
+
+def _cell_key(
+        compo: 'rai.typing.Compo',
+        layer_map: LayerMap,
+        ) -> tuple[int, tuple[tuple[str, str | None], ...]]:
+    return id(compo), tuple(sorted(layer_map.items()))
+
+def _get_flat_affines(
+        compo: 'rai.typing.CompoLike',
+        ) -> list['rai.typing.Affine']:
+    """
+    Get the flat affine matrix of every instance placed by `compo`.
+
+    This is the flat transform of the proxy tower,
+    except that every ArrayProxy in the tower
+    multiplies the number of matrices by the number of its elements.
+    """
+    affines = [rai.affine.identity()]
+    for proxy in compo.descend_p():
+        lattice = (
+            tuple(proxy.lattice())
+            if isinstance(proxy, rai.ArrayProxy)
+            else None
+            )
+        new_affines = []
+        for affine in affines:
+            affine = rai.affine.matmul(affine, proxy.transform._affine)
+            if lattice is None:
+                new_affines.append(affine)
+            else:
+                new_affines.extend(
+                    rai.affine.matmul(affine, rai.affine.move(*offset))
+                    for offset in lattice
+                    )
+        affines = new_affines
+    return affines
+
+def _affine_to_cif_call(
+        matrix: 'rai.typing.Affine',
+        multiplier: float,
+        ) -> str | None:
+    """
+    Convert an affine matrix to the transformation part of a CIF call.
+
+    Parameters
+    ----------
+    matrix
+        The affine matrix
+    multiplier
+        Translations are multiplied by this number
+
+    Returns
+    -------
+    str | None
+        The transformations (e.g. ` M X R 0 1 T 100 200`)
+        with a leading space,
+        an empty string for an identity transform,
+        or None if the matrix scales or shears
+        and therefore cannot be represented in CIF.
+    """
+    a, b, move_x = matrix[0]
+    c, d, move_y = matrix[1]
+
+    if (
+            abs(a * a + c * c - 1) > TOLERANCE
+            or abs(b * b + d * d - 1) > TOLERANCE
+            or abs(a * b + c * d) > TOLERANCE
+            ):
+        return None
+
+    parts = []
+
+    if a * d - b * c < 0:
+        # CIF mirrors before it rotates, and `M X` flips the sign
+        # of the x coordinate,
+        # so the matrix is rotation @ ((-1, 0), (0, 1))
+        parts.append(' M X')
+        cos, sin = -a, -c
+    else:
+        cos, sin = a, c
+
+    if abs(cos - 1) > TOLERANCE or abs(sin) > TOLERANCE:
+        rot_x = round(cos * ROTATION_PRECISION)
+        rot_y = round(sin * ROTATION_PRECISION)
+        divisor = gcd(rot_x, rot_y)
+        parts.append(f' R {rot_x // divisor} {rot_y // divisor}')
+
+    move_x = rai.grid.to_int(move_x * multiplier)
+    move_y = rai.grid.to_int(move_y * multiplier)
+    if move_x or move_y:
+        parts.append(f' T {move_x} {move_y}')
+
+    return ''.join(parts)
@@ -1,12 +1,13 @@
 """
-shorthand.py: defines `export_cif` function.
+shorthand.py: defines `export_cif` and `stream_cif` functions.
 
-The `export_cif` function is a more convenient way
+The `export_cif` and `stream_cif` functions are a more convenient way
 of exporting components to CIF than using an exporter
 directly.
 """
 
-from typing import Protocol, Any
+from typing import Protocol, Any, Iterator, TextIO
+from pathlib import Path
 
 import raimad as rai
 
@@ -14,7 +15,7 @@ class ExporterProto(Protocol):
     """
     Protocol for CIF exporters.
 
-    Currently, there is only one CIF exporter in RAIMAD: NoReuse.
+    RAIMAD comes with two CIF exporters: NoReuse and Reuse.
     Future exporters (and user-defined exporters) must
     conform to this Protocol.
 
@@ -39,6 +40,29 @@ class ExporterProto(Protocol):
 
     cif_string: str
 
+class StreamingExporterProto(Protocol):
+    """
+    Protocol for CIF exporters that can generate CIF code piece by piece.
+
+    Both NoReuse and Reuse conform to this Protocol.
+    In addition to the methods listed here,
+    the __init__ method must accept a `lazy` keyword argument
+    that, when set, prevents the exporter from generating
+    the CIF code upfront.
+    """
+
+    def __init__(
+            self,
+            compo: 'rai.typing.CompoLike',
+            *args: Any,
+            **kwargs: Any
+            ) -> None:
+        ...
+
+    def yield_cif(self) -> Iterator[str]:
+        """Yield CIF code piece by piece."""
+        ...
+
 def export_cif(
         compo: 'rai.typing.CompoLike',
         dest: rai.saveto.Destination = None,
@@ -62,13 +86,14 @@ def export_cif(
         and use this functions return value.
 
     exporter: ExporterProto
-        The exporter to use. Currently, there is only one CIF exporter
-        in RAIMAD.
+        The exporter to use.
+        Defaults to rai.cif.NoReuse.
+        Use rai.cif.Reuse to write every unique compo only once.
 
     *args: Any
         Additional arguments will be passed to the the Exporter's __init__.
 
-    *args: Any
+    **kwargs: Any
         Additional keyword arguments will be passed
         to the the Exporter's __init__.
 
@@ -82,6 +107,49 @@ def export_cif(
 
     return rai.saveto._saveto(cif_string, dest)
 
+def stream_cif(
+        compo: 'rai.typing.CompoLike',
+        dest: str | Path | TextIO,
+        exporter: type[StreamingExporterProto] | None = None,
+        *args: Any,
+        **kwargs: Any,
+        ) -> None:
+    """
+    Export component to CIF, writing it out while it is being generated.
+
+    Unlike `export_cif`, the CIF code is never held in memory as a whole,
+    so this function can be used to export designs that are
+    too large for `export_cif`.
+
+    Parameters
+    ----------
+    compo: rai.typing.CompoLike
+        The compo or proxy to export
+
+    dest: str | Path | TextIO
+        A path to a file or an already open file for saving the CIF
+        output.
+
+    exporter: StreamingExporterProto
+        The exporter to use.
+        Defaults to rai.cif.NoReuse.
+
+    *args: Any
+        Additional arguments will be passed to the the Exporter's __init__.
+
+    **kwargs: Any
+        Additional keyword arguments will be passed
+        to the the Exporter's __init__.
+    """
+    exporter_instance = (exporter or rai.cif.NoReuse)(
+        compo,
+        *args,
+        lazy=True,
+        **kwargs,
+        )
+
+    rai.saveto._saveto_chunks(exporter_instance.yield_cif(), dest)
+
 def export_lyp(
         compo: 'rai.typing.CompoLike',
         dest: rai.saveto.Destination = None,
@@ -11,8 +11,50 @@ class Circle(rai.Compo):
     class Options:
         radius = rai.Option('Circle radius', browser_default=15)
         num_points = rai.Option('Number of points')
+        tolerance = rai.Option(
+            'Maximum distance between polygon and true circle'
+            )
 
-    def _make(self, radius: float, num_points: int = 200) -> None:
+    def _make(
+            self,
+            radius: float,
+            num_points: int | None = None,
+            tolerance: float | None = None,
+            ) -> None:
+        """
+        Construct a Circle.
+
+        Parameters
+        ----------
+        radius
+            The radius of the circle
+        num_points
+            The number of points in the polygon.
+        tolerance
+            Maximum distance between the polygon and the true circle.
+            Used to calculate the number of points
+            if `num_points` is not given.
+            Defaults to `rai.helpers.arc_tolerance`.
+            If that is None too, 200 points are used.
+        """
+
+        # A polygon with an explicit number of points
+        # is not written as a circle by CIF exporters
+        is_circle = num_points is None
+
+        if num_points is None:
+            if tolerance is None:
+                tolerance = rai.helpers.arc_tolerance
+
+            if tolerance is None:
+                num_points = 200
+            else:
+                num_points = rai.arc_num_points(
+                    radius,
+                    2 * pi,
+                    tolerance,
+                    min_points=3,
+                    )
 
         self.geoms.update({
             'root': [
@@ -26,3 +68,5 @@ class Circle(rai.Compo):
 
         self.marks.center = (0, 0)
 
+        if is_circle:
+            self._set_primitive('R', (radius, ))
@@ -27,7 +27,7 @@ def cli(custom_args: Sequence[str] | None = None) -> None:
         args = parser.parse_args(custom_args)
 
     if args.action == ACTION_EXPORT:
-        _process_args_export(args)
+        _process_args_export(args, parser)
         Compo = args.component
 
         opts = {}
@@ -47,9 +47,32 @@ def cli(custom_args: Sequence[str] | None = None) -> None:
             # precedence. This is intended, there is a test for this.
             opts.update(args.opts_dict)
 
-        compo = Compo(**opts)
-
-        rai.export_cif(compo, args.output_file)
+        if args.sweep_dict is not None:
+            _export_sweep(args, rai.Partial(Compo, **opts))
+            return
+
+        if args.build_cache is None:
+            compo = Compo(**opts)
+        else:
+            cache = rai.DiskCache(args.build_cache or None)
+            compo = cache.get(Compo, **opts)
+
+        if args.output_file.endswith('.gds'):
+            rai.stream_gds(compo, args.output_file)
+        elif args.incremental is None:
+            rai.stream_cif(compo, args.output_file, workers=args.workers)
+        else:
+            fragments_path = (
+                args.incremental
+                or rai.diskcache.default_directory() / 'fragments'
+                )
+            fragment_cache = rai.cif.FragmentCache.load(fragments_path)
+            rai.stream_cif(
+                compo,
+                args.output_file,
+                fragment_cache=fragment_cache,
+                )
+            fragment_cache.save(fragments_path)
 
     elif args.action == ACTION_SHOW:
         rai.show(args.component(), args.ignore_running)
@@ -111,6 +134,7 @@ def _add_export_action(
         help=(
             f'Output file. Use `{FILE_STDOUT}` for stdout. '
             '`{name}` will get formatted with component name. '
+            'Files ending in `.gds` are written as GDSII. '
             ),
         default='{name}.cif',
         )
@@ -128,6 +152,90 @@ def _add_export_action(
         default='{name}.cif',
         )
 
+    parser.add_argument(
+        '--build-cache',
+        type=str,
+        nargs='?',
+        const='',
+        default=None,
+        metavar='DIR',
+        help=(
+            "Load the component from the on-disk build cache "
+            "if it was already built with the same options, "
+            "and store it there otherwise. "
+            "The cache is kept in DIR, "
+            "or in `~/.cache/raimad` if DIR is not given. "
+            ),
+        )
+
+    parser.add_argument(
+        '--incremental',
+        type=str,
+        nargs='?',
+        const='',
+        default=None,
+        metavar='FILE',
+        help=(
+            "Reuse the CIF code of subcompos that have not changed "
+            "since the last incremental export. "
+            "The CIF code is kept in FILE, "
+            "or in `~/.cache/raimad/fragments` if FILE is not given. "
+            ),
+        )
+
+    parser.add_argument(
+        '--workers',
+        '-j',
+        type=int,
+        default=1,
+        help=(
+            "Number of worker processes to format polygons with, "
+            "or to build the variants of a sweep in. "
+            "Use 0 for one worker per CPU. "
+            "Ignored with `--incremental`. "
+            ),
+        )
+
+    parser.add_argument(
+        '--sweep',
+        type=str,
+        nargs='*',
+        metavar='OPTION VALUES',
+        help=(
+            "Export one variant of the component for every combination "
+            "of option values, given as pairs of an option name "
+            "and a Python list of values, "
+            "for example `--sweep length '[1, 2]' width '[3, 4]'`. "
+            "Options that are not swept are taken from `--opts`. "
+            "If the output file contains `{variant}`, "
+            "every variant is written to its own file, "
+            "with `{variant}` replaced by the options of that variant. "
+            "Otherwise, the variants are laid out in a grid "
+            "and written to one file. "
+            "`--build-cache` and `--incremental` are ignored. "
+            ),
+        )
+
+    parser.add_argument(
+        '--zip',
+        action='store_true',
+        help=(
+            "Instead of every combination of the values given to `--sweep`, "
+            "make one variant from the first value of every option, "
+            "one from the second, and so on. "
+            ),
+        )
+
+    parser.add_argument(
+        '--columns',
+        type=int,
+        default=None,
+        help=(
+            "Number of columns of the grid of a sweep. "
+            "By default, the grid is about square. "
+            ),
+        )
+
     compo_opts = parser.add_mutually_exclusive_group()
     #exporter_opts = parser.add_mutually_exclusive_group()
 
@@ -228,7 +336,10 @@ def _add_fortune_action(
             )
         )
 
-def _process_args_export(args: argparse.Namespace) -> None:
+def _process_args_export(
+        args: argparse.Namespace,
+        parser: argparse.ArgumentParser,
+        ) -> None:
     args.output_file = args.output_file.replace(
         '{name}',
         args.component.__name__
@@ -246,6 +357,17 @@ def _process_args_export(args: argparse.Namespace) -> None:
     elif args.opts_json is not None:
         args.opts_dict = json.loads(args.opts_json)
 
+    args.sweep_dict = None
+    if args.sweep is not None:
+        if len(args.sweep) % 2:
+            parser.error(
+                '--sweep takes pairs of an option name and a list of values, '
+                f'but `{args.sweep[-1]}` has no values'
+                )
+        args.sweep_dict = {
+            key: literal_eval(val) for key, val in rai.couples(args.sweep)
+            }
+
     #if args.exporter_opts is not None:
     #    raise NotImplementedError("foo")
     #    # TODO handle uneven number
@@ -260,6 +382,33 @@ def _process_args_export(args: argparse.Namespace) -> None:
     #elif args.exporter_opts_json is not None:
     #    raise NotImplementedError("bar")
 
+def _export_sweep(args: argparse.Namespace, partial: rai.Partial) -> None:
+    """Export the variants of a sweep given on the command line."""
+    if args.zip:
+        variants = rai.sweep.zipped(**args.sweep_dict)
+    else:
+        variants = rai.sweep.cartesian(**args.sweep_dict)
+
+    if '{variant}' in args.output_file:
+        rai.sweep.export_each(
+            partial,
+            variants,
+            args.output_file,
+            workers=args.workers,
+            )
+        return
+
+    grid = rai.sweep.SweepGrid(
+        partial,
+        variants,
+        columns=args.columns,
+        workers=args.workers,
+        )
+    if args.output_file.endswith('.gds'):
+        rai.stream_gds(grid, args.output_file)
+    else:
+        rai.stream_cif(grid, args.output_file, workers=args.workers)
+
 def _ensure_pwd_in_path() -> None:
     try:
         pwd = os.getcwd()
@@ -1,6 +1,10 @@
 """compo.py: home of Compo class and supporting constructs."""
+import sys
 import inspect
-from typing import Any, NoReturn, Iterator, TypeVar
+from itertools import chain
+from hashlib import blake2b
+from array import array
+from typing import TYPE_CHECKING, Any, NoReturn, Iterator, TypeVar
 
 try:
     from typing import Self
@@ -9,7 +13,16 @@ except ImportError:
     from typing_extensions import Self
 
 import raimad as rai
-from raimad.types import Vec2, Vec2S, GeomsS
+from raimad.types import (
+    Vec2,
+    Vec2S,
+    PolyS,
+    Polys,
+    PackablePolysS,
+    PackableGeomsS,
+    Num,
+    Primitive,
+    )
 
 class InvalidSubcompoError(TypeError):
     """
@@ -146,7 +159,7 @@ class Compo:
     TODO explain
     """
 
-    geoms: GeomsS
+    geoms: PackableGeomsS
     marks: MarksContainer
     subcompos: SubcompoContainer
 
@@ -157,6 +170,38 @@ class Compo:
     _experimental_lyp: 'rai.cif.lyp.LayerProperties'
     _experimental_lname_transformers: 'rai.types.LNameTransformers'
 
+    # (stamp, steamrolled geoms) of last call to `steamroll`
+    _steamroll_cache: tuple[Any, PackableGeomsS] | None = None
+    # (stamp, geoms lists and their polys)
+    # of last call to `_get_steamroll_stamp`
+    _steamroll_stamp: tuple[Any, tuple[Any, ...]] | None = None
+    # (stamp, convex hull of every layer, whether hulls were reduced,
+    # footprints of unbuilt subcompos) of last call to `_get_hulls`
+    _hull_cache: tuple[
+        Any,
+        dict[str, list[PolyS]],
+        bool,
+        list[PolyS],
+        ] | None = None
+    # (stamp, marks, subcompo hashes, hash)
+    # of last call to `_get_content_hash`
+    _content_hash_cache: tuple[Any, Any, Any, str] | None = None
+    # (stamp, id of list of polys ->
+    # (list of polys, its PolyArray, whether it was converted)),
+    # see `_transform_polys`
+    _poly_arrays: tuple[
+        Any,
+        dict[int, tuple[Polys, 'rai.affine.PolyArray | None', bool]],
+        ] | None = None
+    # (primitive, copy of the polygon it describes),
+    # see `_set_primitive`
+    _primitive: tuple[Primitive, PolyS] | None = None
+    # (args, kwargs) of a compo that has not been built yet,
+    # see `lazy`
+    _lazy_args: tuple[tuple[Any, ...], dict[str, Any]] | None = None
+    # BBox returned by `_make_footprint`, see `lazy`
+    _footprint: 'rai.BBox | None' = None
+
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         """
         Instantiate new Compo.
@@ -167,6 +212,12 @@ class Compo:
             All arguments and keyword arguments
             are forwarded to `self._make()`
         """
+        self._build(*args, **kwargs)
+
+    def _build(self, *args: Any, **kwargs: Any) -> None:
+        """Run `_make` and check and snap the geoms it made."""
+        self._lazy_args = None
+        self._footprint = None
         self.geoms = {}
         self.subcompos = SubcompoContainer()
         self.marks = MarksContainer()
@@ -180,6 +231,22 @@ class Compo:
                     "All RAIMAD layer names must be valid Python identifiers."
                     )
 
+        if rai.grid.unit is not None:
+            self._snap_to_grid()
+
+    def _snap_to_grid(self) -> None:
+        """Snap the geoms of this compo to the grid, see `rai.grid`."""
+        for layer, polys in self.geoms.items():
+            if isinstance(polys, rai.PackedPolys):
+                # Transforming packed polygons snaps them to the grid
+                self.geoms[layer] = polys.transformed(rai.affine.identity())
+            else:
+                self.geoms[layer] = rai.grid.snap_polys(polys)
+
+        if self._primitive is not None:
+            primitive, poly = self._primitive
+            self._primitive = (primitive, rai.grid.snap_poly(poly))
+
     def _make(self, *args: Any, **kwargs: Any) -> None:
         """
         TODO doc conventions for virtual methods.
@@ -188,6 +255,89 @@ class Compo:
         """
         raise NotImplementedError()
 
+    def _make_footprint(
+            self,
+            *args: Any,
+            **kwargs: Any,
+            ) -> 'rai.BBox | None':
+        """
+        Describe a compo that has not been built yet, see `lazy`.
+
+        Compo classes may override this to add the marks
+        that `_make` would add and to return the bbox of the geometry
+        that `_make` would make,
+        computed cheaply from the arguments
+        (which are the same as those of `_make`).
+        """
+        raise NotImplementedError()
+
+    @classmethod
+    def lazy(cls, *args: Any, **kwargs: Any) -> Self:
+        """
+        Create a compo of this class without building it yet.
+
+        The arguments are stored,
+        and `_make` is only run on first access to
+        the geoms, subcompos or marks of the compo,
+        which includes steamrolling, exporting or hashing it.
+
+        If the class overrides `_make_footprint`,
+        it is run instead, right away,
+        and the marks it adds and the bbox it returns
+        are used until the compo is built,
+        so that lazy compos can be placed (e.g. with `snap_left`)
+        without building them.
+        Once the compo is built,
+        its marks and bbox are the ones made by `_make`.
+
+        Parameters
+        ----------
+        *args, **kwargs
+            All arguments and keyword arguments
+            are forwarded to `self._make()`
+
+        Returns
+        -------
+        Self
+            The unbuilt compo
+        """
+        compo = cls.__new__(cls)
+        compo._lazy_args = (args, kwargs)
+
+        if cls._make_footprint is not Compo._make_footprint:
+            compo.marks = MarksContainer()
+            compo._footprint = compo._make_footprint(*args, **kwargs)
+
+        return compo
+
+    def is_built(self) -> bool:
+        """
+        Check whether `_make` has run, see `lazy`.
+
+        Returns
+        -------
+        bool
+            False if this compo was made with `lazy`
+            and has not been used since, True otherwise.
+        """
+        return self._lazy_args is None
+
+    if not TYPE_CHECKING:
+        # Hidden from mypy, which would otherwise accept
+        # any attribute of any compo
+        def __getattr__(self, name: str) -> Any:
+            """Build a lazy compo when its contents are first needed."""
+            if (
+                    name in ('geoms', 'subcompos', 'marks')
+                    and self._lazy_args is not None
+                    ):
+                args, kwargs = self._lazy_args
+                self._build(*args, **kwargs)
+                return getattr(self, name)
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+                )
+
     @classmethod
     def partial(cls, **kwargs: Any) -> 'rai.typing.Partial':
         """
@@ -209,10 +359,51 @@ class Compo:
         """
         return rai.Partial(cls, **kwargs)
 
-    def steamroll(self) -> GeomsS:
+    @classmethod
+    def cached(cls, *args: Any, **kwargs: Any) -> Self:
+        """
+        Get a compo of this class from the compo cache.
+
+        The compo is only built if the cache does not already
+        contain a compo of this class built with the same arguments.
+        The returned compo may be shared, so it must not be modified.
+
+        Parameters
+        ----------
+        *args, **kwargs
+            All arguments and keyword arguments
+            are forwarded to `self._make()`
+
+        Returns
+        -------
+        Self
+            The cached compo
+
+        SeeAlso
+        -------
+        raimad.CompoCache
+        """
+        compo = rai.compocache.compo_cache.get(cls, *args, **kwargs)
+        assert isinstance(compo, cls)
+        return compo
+
+    def steamroll(self) -> PackableGeomsS:
         """
         Steamroll the entire compo hierarchy into one Geoms dict.
 
+        The result is cached, and the cache is reused
+        until the geoms or subcompos of this compo,
+        or the transform or lmap of any proxy in the hierarchy,
+        change.
+        Geoms are checked for added, removed and replaced polygons
+        and layers;
+        modifying the points of a polygon in-place is not detected.
+
+        A layer of the result is packed (see `rai.PackedPolys`)
+        if the first polygons steamrolled into it are packed,
+        so a hierarchy of compos with packed geoms
+        is steamrolled into packed layers.
+
         Returns
         -------
         rai.typing.Geoms
@@ -222,17 +413,400 @@ class Compo:
 
         TODO example
         """
-        # Take all of the geoms defined directly...
-        geoms = self.geoms.copy()
+        return {
+            layer: geoms.copy()
+            for layer, geoms in self._steamroll().items()
+            }
 
-        # ... and append steamrolled geoms from subcompos
-        for subcompo in self.subcompos.values():
-            # TODO override "update" method in geoms container?
-            for layer_name, layer_geoms in subcompo.steamroll().items():
-                if layer_name not in geoms.keys():
-                    geoms[layer_name] = []
-                geoms[layer_name].extend(layer_geoms)
-        return geoms
+    def steamroll_arrays(self) -> dict[str, 'rai.PackedPolys']:
+        """
+        Steamroll the entire compo hierarchy into packed polygons.
+
+        Every layer is packed into one array of coordinates
+        and one array of polygon offsets (see `rai.PackedPolys`),
+        which are filled while the hierarchy is walked,
+        without making a tuple for any vertex
+        unless the compos themselves store their geoms as lists.
+        The arrays support the buffer protocol,
+        so they can be handed to numpy and other libraries
+        without copying.
+
+        Returns
+        -------
+        dict[str, rai.PackedPolys]
+            The packed polygons of every layer.
+            They are not cached, so they can be modified freely.
+        """
+        self._get_steamroll_stamp()
+        return _steamroll_arrays(self)
+
+    def _steamroll(self) -> PackableGeomsS:
+        """
+        Steamroll the entire compo hierarchy, using cache if possible.
+
+        The returned dict is the cache itself and must not be modified.
+        """
+        stamp = self._get_steamroll_stamp()
+
+        if (
+                self._steamroll_cache is not None
+                and self._steamroll_cache[0] is stamp
+                ):
+            return self._steamroll_cache[1]
+
+        steamrolled: PackableGeomsS = {}
+        _steamroll_into(steamrolled, self)
+
+        # Drop arrays of the lists in the old cache
+        self._poly_arrays = None
+
+        self._steamroll_cache = (stamp, steamrolled)
+        return steamrolled
+
+    def _transform_polys(
+            self,
+            matrix: 'rai.typing.Affine',
+            polys: Polys,
+            pack: bool = False,
+            ) -> PackablePolysS:
+        """
+        Transform a list of polys that belongs to this compo.
+
+        `polys` must be one of the lists in `self.geoms`
+        or in the steamroll cache.
+        Lists that are transformed more than once
+        are converted to numpy arrays and kept
+        for as long as the steamroll stamp stays the same,
+        so that compos used many times in a hierarchy
+        are transformed with numpy without converting them every time.
+        The stamp must have just been computed
+        with `_get_steamroll_stamp`.
+        Packed polys (see `rai.PackedPolys`) are viewed by numpy
+        without converting them, so they are never kept,
+        and the transformed polys are packed as well.
+        If `pack` is True, the transformed polys are always packed.
+        """
+        if isinstance(polys, rai.PackedPolys):
+            return polys.transformed(matrix)
+
+        transform = (
+            rai.affine.transform_polys_packed if pack
+            else rai.affine.transform_polys
+            )
+
+        assert self._steamroll_stamp is not None
+        stamp = self._steamroll_stamp[0]
+
+        if self._poly_arrays is None or self._poly_arrays[0] is not stamp:
+            # The geoms have changed, all arrays are stale
+            self._poly_arrays = (stamp, {})
+        arrays = self._poly_arrays[1]
+
+        entry = arrays.get(id(polys))
+        if entry is None or entry[0] is not polys:
+            # First time seeing this list.
+            # Converting it is only worth it if it is seen again.
+            arrays[id(polys)] = (polys, None, False)
+            return transform(matrix, polys)
+
+        if not entry[2]:
+            entry = (polys, rai.affine.polys_to_array(polys), True)
+            arrays[id(polys)] = entry
+
+        return transform(matrix, polys, entry[1])
+
+    def _get_steamroll_stamp(
+            self,
+            memo: dict[int, Any] | None = None,
+            footprints: bool = False,
+            ) -> Any:
+        """
+        Get a stamp that identifies the steamrolled geometry of this compo.
+
+        If nothing has changed since the last call,
+        the exact same object is returned,
+        so stamps can be compared by identity.
+
+        Parameters
+        ----------
+        memo
+            Stamps of compos that have already been visited
+            while computing this stamp, by id.
+            Compos that appear multiple times in the hierarchy
+            are only visited once.
+        footprints
+            Whether unbuilt compos with a footprint (see `lazy`)
+            should be stamped by their footprint instead of being built.
+            Only `_get_hulls` can handle such stamps.
+        """
+        if memo is None:
+            memo = {}
+        elif id(self) in memo:
+            return memo[id(self)]
+
+        if (
+                footprints
+                and self._lazy_args is not None
+                and self._footprint is not None
+                ):
+            memo[id(self)] = ('footprint', id(self._footprint))
+            return memo[id(self)]
+
+        stamp = (
+            tuple(
+                (
+                    layer,
+                    id(geoms),
+                    geoms._version if isinstance(geoms, rai.PackedPolys)
+                    else tuple(map(id, geoms)),
+                    )
+                for layer, geoms in self.geoms.items()
+                ),
+            tuple(
+                subcompo._get_steamroll_stamp(memo, footprints)
+                for subcompo in self.subcompos.values()
+                ),
+            )
+
+        if (
+                self._steamroll_stamp is not None
+                and self._steamroll_stamp[0] == stamp
+                ):
+            # Return the previous stamp so that it can be compared by identity
+            stamp = self._steamroll_stamp[0]
+        else:
+            # The lists of geoms and their polys are stored alongside
+            # the stamp so that their ids cannot get reused by other objects.
+            # Packed polys have no polygon objects to keep.
+            self._steamroll_stamp = (
+                stamp,
+                tuple(
+                    (geoms, ) if isinstance(geoms, rai.PackedPolys)
+                    else (geoms, *geoms)
+                    for geoms in self.geoms.values()
+                    ),
+                )
+
+        memo[id(self)] = stamp
+        return stamp
+
+    def content_hash(self) -> str:
+        """
+        Get a hash of the contents of this compo.
+
+        The hash is computed from the geoms and marks of this compo
+        and the hashes of its subcompos
+        (which include their transforms and lmaps),
+        so two compos built the same way have the same hash,
+        even if they are different objects,
+        in different runs of Python,
+        or of different classes.
+        Layer order and subcompo names do not affect the hash,
+        but polygon and subcompo order does.
+        The hash is cached for as long as the steamroll stamp,
+        the marks, and the hashes of the subcompos of this compo
+        stay the same.
+
+        Returns
+        -------
+        str
+            The hash as a string of hex digits
+        """
+        return self._get_content_hash({}, {})
+
+    def _get_content_hash(
+            self,
+            memo: dict[int, Any],
+            hashes: dict[int, str],
+            ) -> str:
+        """
+        Get the content hash of this compo, see `content_hash`.
+
+        Parameters
+        ----------
+        memo
+            See `_get_steamroll_stamp`.
+        hashes
+            Hashes of compos that have already been visited, by id.
+        """
+        if id(self) in hashes:
+            return hashes[id(self)]
+
+        stamp = self._get_steamroll_stamp(memo)
+        marks = tuple(self.marks._dict.items())
+        # Marks of subcompos are not part of the steamroll stamp
+        subcompo_hashes = tuple(
+            subcompo._get_content_hash(memo, hashes)
+            for subcompo in self.subcompos._dict.values()
+            )
+        if (
+                self._content_hash_cache is not None
+                and self._content_hash_cache[0] is stamp
+                and self._content_hash_cache[1] == marks
+                and self._content_hash_cache[2] == subcompo_hashes
+                ):
+            hashes[id(self)] = self._content_hash_cache[3]
+            return self._content_hash_cache[3]
+
+        hasher = blake2b(b'compo', digest_size=16)
+
+        for layer in sorted(self.geoms.keys()):
+            polys = self.geoms[layer]
+            _hash_str(hasher, layer)
+            hasher.update(len(polys).to_bytes(8, 'little'))
+            for poly in polys:
+                _hash_points(hasher, poly)
+
+        for name, point in sorted(marks, key=lambda item: repr(item[0])):
+            _hash_str(hasher, repr(name))
+            _hash_points(hasher, (point, ))
+
+        for subcompo_hash in subcompo_hashes:
+            hasher.update(subcompo_hash.encode())
+
+        content_hash = hasher.hexdigest()
+        self._content_hash_cache = (
+            stamp,
+            marks,
+            subcompo_hashes,
+            content_hash,
+            )
+        hashes[id(self)] = content_hash
+        return content_hash
+
+    def _get_hulls(
+            self,
+            memo: dict[int, Any] | None = None,
+            ) -> tuple[dict[str, list[PolyS]], list[PolyS]]:
+        """
+        Get polygons that have the same convex hull as every layer.
+
+        The hulls are built from the geoms of this compo
+        and the transformed hulls of its subcompos,
+        so the hierarchy is never steamrolled.
+        They are cached and validated the same way as `steamroll`.
+        The returned dict and list are the cache itself
+        and must not be modified.
+
+        Unbuilt compos with a footprint (see `lazy`) are not built;
+        the corners of their footprint are returned apart from the layers,
+        since which layers they would have is not known yet.
+
+        Reducing the geoms of a compo to their convex hull
+        is only worth it if the hulls are used more than once,
+        so the first time, the geoms of compos without subcompos
+        are returned as they are.
+        Any set of points with the same convex hull
+        encloses the geometry just as well.
+
+        Parameters
+        ----------
+        memo
+            See `_get_steamroll_stamp`.
+
+        Returns
+        -------
+        dict[str, list[PolyS]]
+            Layer name to list of polygons
+            whose convex hull is the convex hull of the layer
+        list[PolyS]
+            The corners of the footprints of unbuilt compos
+            in the hierarchy of this compo
+        """
+        if memo is None:
+            memo = {}
+        stamp = self._get_steamroll_stamp(memo, footprints=True)
+
+        if self._lazy_args is not None and self._footprint is not None:
+            footprint = self._footprint
+            if footprint.is_empty():
+                return {}, []
+            return {}, [[
+                (footprint.min_x, footprint.min_y),
+                (footprint.max_x, footprint.min_y),
+                (footprint.max_x, footprint.max_y),
+                (footprint.min_x, footprint.max_y),
+                ]]
+
+        if self._hull_cache is not None and self._hull_cache[0] is stamp:
+            if self._hull_cache[2]:
+                return self._hull_cache[1], self._hull_cache[3]
+            hulls = self._hull_cache[1]
+            footprints = self._hull_cache[3]
+        else:
+            footprints = []
+            hulls = {
+                layer: (
+                    # Packed polys are reduced right away,
+                    # rather than unpacking all of their vertices
+                    [rai.convex_hull(polys.points())]
+                    if isinstance(polys, rai.PackedPolys) and polys
+                    else list(polys)
+                    )
+                for layer, polys in self.geoms.items()
+                }
+            for subcompo in self.subcompos.values():
+                _hulls_into(hulls, footprints, subcompo, memo)
+
+            if not self.subcompos:
+                self._hull_cache = (stamp, hulls, False, footprints)
+                return hulls, footprints
+
+        # A layer with just one polygon cannot be reduced much,
+        # and affine transforms preserve convexity,
+        # so a single transformed hull of a subcompo is still a hull
+        hulls = {
+            layer: (
+                polys if len(polys) <= 1
+                else [rai.convex_hull(chain.from_iterable(polys))]
+                )
+            for layer, polys in hulls.items()
+            }
+        if len(footprints) > 1:
+            footprints = [rai.convex_hull(chain.from_iterable(footprints))]
+        self._hull_cache = (stamp, hulls, True, footprints)
+        return hulls, footprints
+
+    def _set_primitive(self, kind: str, params: tuple[Num, ...]) -> None:
+        """
+        Record that the geometry of this compo is a CIF primitive.
+
+        Call this at the end of `_make`,
+        once the compo has a single polygon in the `root` layer.
+        CIF exporters may then write the primitive
+        instead of the polygon, see `rai.cif.primitives`.
+
+        Parameters
+        ----------
+        kind
+            `B`, `R`, or `W`
+        params
+            Parameters of the primitive, see `rai.types.Primitive`
+        """
+        self._primitive = (
+            (kind, tuple(float(param) for param in params)),
+            list(self.geoms['root'][0]),
+            )
+
+    def _get_primitive(self) -> Primitive | None:
+        """
+        Get the CIF primitive of this compo.
+
+        Returns
+        -------
+        Primitive | None
+            The primitive recorded with `_set_primitive`,
+            or None if there is none
+            or if the geoms have changed since.
+        """
+        if self._primitive is None:
+            return None
+
+        primitive, poly = self._primitive
+        polys = self.geoms.get('root')
+        if len(self.geoms) != 1 or polys is None or polys != [poly]:
+            return None
+        return primitive
 
     def final(self) -> Self:
         """
@@ -314,6 +888,38 @@ class Compo:
         """
         return rai.Proxy(self)
 
+    def array(
+            self,
+            num_x: int,
+            num_y: int,
+            step_x: Num,
+            step_y: Num,
+            ) -> 'rai.typing.ArrayProxy':
+        """
+        Return a new array proxy that places this compo on a grid.
+
+        Parameters
+        ----------
+        num_x
+            Number of columns
+        num_y
+            Number of rows
+        step_x
+            Distance between columns
+        step_y
+            Distance between rows
+
+        Returns
+        -------
+        rai.typing.ArrayProxy
+            The new array proxy
+
+        SeeAlso
+        -------
+        raimad.ArrayProxy
+        """
+        return rai.ArrayProxy(self, num_x, num_y, (step_x, 0), (0, step_y))
+
     #@property
     #def copy(self) -> NoReturn:
     #    """Deliberately unimplemented -- see Proxy.copy()."""
@@ -344,6 +950,36 @@ class Compo:
         for subcompo in self.subcompos.values():
             yield from subcompo.walk_hier()
 
+    def walk(self) -> 'Iterator[rai.typing.HierNode]':
+        """
+        Traverse the subcompo hierarchy without copying any proxies.
+
+        Unlike `walk_hier`, which wraps every subcompo
+        in a new copy of the proxy tower above it,
+        this method only composes the transforms and lmaps
+        of the proxies on the way down.
+        Every element of an ArrayProxy is visited separately.
+
+        Yields
+        ------
+        rai.typing.HierNode
+            A `(path, compo, affine, lmap)` tuple for every compo
+            in the hierarchy, parents before their subcompos.
+            `path` is a tuple of subcompo names leading to the compo
+            (with an `(i, j)` tuple for an element of an ArrayProxy),
+            `affine` is the matrix that takes the geoms of the compo
+            to the coordinate system of this compo,
+            and `lmap` is the LMap that takes the layers of the geoms
+            of the compo to the layers of this compo.
+            The lmap may be shared with proxies in the hierarchy
+            and must not be modified.
+
+        SeeAlso
+        -------
+        raimad.Proxy.walk
+        """
+        return _walk(self, (), None, ())
+
     def transform_point(
             self,
             point: Vec2
@@ -553,9 +1189,10 @@ class Compo:
         TODO doc page link
         """
         bbox = rai.BBox()
-        for geoms in self.steamroll().values():
-            for geom in geoms:
-                bbox.add_poly(geom)
+        hulls, footprints = self._get_hulls()
+        for layer_hulls in (*hulls.values(), footprints):
+            for hull in layer_hulls:
+                bbox.add_poly(hull)
         return bbox
 
     def __init_subclass__(cls) -> None:
@@ -702,3 +1339,311 @@ def _class_to_dictlist(
 
     setattr(cls, attr, new_list)
 
+def _hash_str(hasher: Any, string: str) -> None:
+    """Feed a length-prefixed string to a hashlib hasher."""
+    encoded = string.encode()
+    hasher.update(len(encoded).to_bytes(8, 'little'))
+    hasher.update(encoded)
+
+def _hash_points(hasher: Any, points: Any) -> None:
+    """Feed a length-prefixed sequence of points to a hashlib hasher."""
+    _hash_floats(
+        hasher,
+        [coord for point in points for coord in (point[0], point[1])],
+        )
+
+def _hash_floats(hasher: Any, numbers: Any) -> None:
+    """Feed a length-prefixed sequence of numbers to a hashlib hasher."""
+    hasher.update(len(numbers).to_bytes(8, 'little'))
+    # Adding 0.0 turns -0.0 into 0.0
+    coords = array('d', [float(number) + 0.0 for number in numbers])
+    if sys.byteorder == 'big':
+        coords.byteswap()
+    hasher.update(coords.tobytes())
+
+def _steamroll_into(
+        steamrolled: PackableGeomsS,
+        compo: 'rai.typing.CompoLike',
+        matrix: 'rai.typing.Affine | None' = None,
+        lmaps: 'tuple[rai.typing.LMap, ...]' = (),
+        pack: bool = False,
+        ) -> None:
+    """
+    Append the steamrolled geoms of a compo or proxy to a geoms dict.
+
+    The hierarchy is walked only once:
+    the transforms and lmaps of proxies are composed on the way down,
+    and every polygon is transformed only once, by the composed matrix.
+    Compos with a valid steamroll cache are not descended into,
+    their cached geoms are used instead.
+    For this to be correct,
+    the stamps of all compos in the hierarchy must have just been
+    computed with `Compo._get_steamroll_stamp`.
+
+    Parameters
+    ----------
+    steamrolled
+        The geoms dict to append to
+    compo
+        The compo or proxy to steamroll
+    matrix
+        The affine matrix to apply to all polygons,
+        or None to leave them untouched
+    lmaps
+        The lmaps to apply to all layers, innermost first
+    pack
+        If True, every layer that is added to `steamrolled` is packed
+        (see `rai.PackedPolys`),
+        and polygons are transformed straight into it.
+        Otherwise, a new layer is only packed if its first polygons are.
+    """
+    # Proxies are encountered outermost first,
+    # so the transform and lmap of every new proxy
+    # are applied before the ones collected so far
+    while isinstance(compo, rai.Proxy):
+        matrix = compo.transform._compose_onto(matrix)
+        lmaps = (compo.lmap, *lmaps)
+
+        if isinstance(compo, rai.ArrayProxy):
+            # Walk the compo once for every element of the array
+            for offset in compo.lattice():
+                _steamroll_into(
+                    steamrolled,
+                    compo.compo,
+                    rai.affine.matmul(matrix, rai.affine.move(*offset)),
+                    lmaps,
+                    pack,
+                    )
+            return
+
+        compo = compo.compo
+
+    if (
+            compo._steamroll_cache is not None
+            and compo._steamroll_stamp is not None
+            and compo._steamroll_cache[0] is compo._steamroll_stamp[0]
+            ):
+        geoms = compo._steamroll_cache[1]
+        subcompos: tuple['rai.typing.Proxy', ...] = ()
+    else:
+        geoms = compo.geoms
+        subcompos = tuple(compo.subcompos.values())
+
+    for layer, layer_geoms in geoms.items():
+        mapped_layer: str | None = layer
+        for lmap in lmaps:
+            mapped_layer = lmap[layer]
+
+            # If a layer has been LMapp'ed to None,
+            # that means the user wants it discarded. Skip.
+            if mapped_layer is None:
+                break
+            layer = mapped_layer
+
+        if mapped_layer is None:
+            continue
+
+        if mapped_layer not in steamrolled.keys():
+            steamrolled[mapped_layer] = (
+                rai.PackedPolys()
+                if pack or isinstance(layer_geoms, rai.PackedPolys)
+                else []
+                )
+
+        if matrix is None:
+            steamrolled[mapped_layer].extend(layer_geoms)
+        else:
+            steamrolled[mapped_layer].extend(
+                compo._transform_polys(matrix, layer_geoms, pack)
+                )
+
+    for subcompo in subcompos:
+        _steamroll_into(steamrolled, subcompo, matrix, lmaps, pack)
+
+def _steamroll_arrays(
+        compo: 'rai.typing.CompoLike',
+        ) -> dict[str, 'rai.PackedPolys']:
+    """
+    Steamroll a compo or proxy into packed layers.
+
+    The stamps of all compos in the hierarchy must have just been
+    computed, see `_steamroll_into`.
+    """
+    steamrolled: PackableGeomsS = {}
+    _steamroll_into(steamrolled, compo, pack=True)
+
+    arrays = {}
+    for layer, polys in steamrolled.items():
+        assert isinstance(polys, rai.PackedPolys)
+        arrays[layer] = polys
+    return arrays
+
+def _walk(
+        compo: 'rai.typing.CompoLike',
+        path: tuple[Any, ...],
+        matrix: 'rai.typing.Affine | None',
+        lmaps: 'tuple[rai.typing.LMap, ...]',
+        ) -> 'Iterator[rai.typing.HierNode]':
+    """
+    Yield the hierarchy of a compo or proxy, see `Compo.walk`.
+
+    Parameters
+    ----------
+    compo
+        The compo or proxy to walk
+    path
+        Subcompo names leading to `compo`
+    matrix
+        The affine matrix to apply to `compo`,
+        or None for the identity matrix
+    lmaps
+        The lmaps to apply to all layers, innermost first.
+        Lmaps that pass all layers through are left out.
+    """
+    # Proxies are encountered outermost first,
+    # so the transform and lmap of every new proxy
+    # are applied before the ones collected so far
+    while isinstance(compo, rai.Proxy):
+        matrix = compo.transform._compose_onto(matrix)
+        if compo.lmap.shorthand is not None:
+            lmaps = (compo.lmap, *lmaps)
+
+        if isinstance(compo, rai.ArrayProxy):
+            for j in range(compo.num_y):
+                for i in range(compo.num_x):
+                    yield from _walk(
+                        compo.compo,
+                        (*path, (i, j)),
+                        rai.affine.matmul(
+                            matrix,
+                            rai.affine.move(*compo._get_offset(i, j)),
+                            ),
+                        lmaps,
+                        )
+            return
+
+        compo = compo.compo
+
+    if not lmaps:
+        lmap = rai.LMap(None)
+    elif len(lmaps) == 1:
+        lmap = lmaps[0]
+    else:
+        # Composing the lmaps themselves cannot express
+        # a layer that is discarded further up,
+        # so map the layers of this compo one by one
+        lmap = rai.LMap({
+            layer: _map_layer(layer, lmaps)
+            for layer in compo.geoms.keys()
+            })
+
+    yield (
+        path,
+        compo,
+        rai.affine.identity() if matrix is None else matrix,
+        lmap,
+        )
+
+    # Reading `_dict` directly skips the filtering of SubcompoContainer
+    for name, subcompo in compo.subcompos._dict.items():
+        yield from _walk(subcompo, (*path, name), matrix, lmaps)
+
+def _map_layer(
+        layer: str,
+        lmaps: 'tuple[rai.typing.LMap, ...]',
+        ) -> str | None:
+    """Apply lmaps to a layer, innermost first; None if discarded."""
+    mapped: str | None = layer
+    for lmap in lmaps:
+        mapped = lmap[layer]
+        if mapped is None:
+            return None
+        layer = mapped
+    return mapped
+
+def _hulls_into(
+        hulls: dict[str, list[PolyS]],
+        footprints: list[PolyS],
+        compo: 'rai.typing.CompoLike',
+        memo: dict[int, Any],
+        matrix: 'rai.typing.Affine | None' = None,
+        lmaps: 'tuple[rai.typing.LMap, ...]' = (),
+        ) -> None:
+    """
+    Append the convex hulls of a compo or proxy to a dict.
+
+    This works like `_steamroll_into`,
+    except that only the cached convex hulls of compos are transformed,
+    rather than all of their polygons.
+    Since affine transformations preserve convexity,
+    the transformed hulls enclose the transformed geometry exactly.
+
+    Parameters
+    ----------
+    hulls
+        Dict of layer name to list of hulls to append to
+    footprints
+        List to append the corners of footprints of unbuilt compos to,
+        see `Compo._get_hulls`
+    compo
+        The compo or proxy whose hulls should be appended
+    memo
+        See `Compo._get_steamroll_stamp`.
+    matrix
+        The affine matrix to apply to all points,
+        or None to leave them untouched
+    lmaps
+        The lmaps to apply to all layers, innermost first
+    """
+    while isinstance(compo, rai.Proxy):
+        matrix = compo.transform._compose_onto(matrix)
+        lmaps = (compo.lmap, *lmaps)
+
+        if isinstance(compo, rai.ArrayProxy):
+            if compo.num_x <= 0 or compo.num_y <= 0:
+                return
+
+            # The hull of the array is the hull of the elements
+            # at the four corners of the lattice
+            for offset in {
+                    compo._get_offset(0, 0),
+                    compo._get_offset(compo.num_x - 1, 0),
+                    compo._get_offset(0, compo.num_y - 1),
+                    compo._get_offset(compo.num_x - 1, compo.num_y - 1),
+                    }:
+                _hulls_into(
+                    hulls,
+                    footprints,
+                    compo.compo,
+                    memo,
+                    rai.affine.matmul(matrix, rai.affine.move(*offset)),
+                    lmaps,
+                    )
+            return
+
+        compo = compo.compo
+
+    layers_hulls, compo_footprints = compo._get_hulls(memo)
+    footprints.extend(
+        compo_footprints if matrix is None
+        else rai.affine.transform_polys(matrix, compo_footprints)
+        )
+
+    for layer, layer_hulls in layers_hulls.items():
+        mapped_layer: str | None = layer
+        for lmap in lmaps:
+            mapped_layer = lmap[layer]
+            if mapped_layer is None:
+                break
+            layer = mapped_layer
+
+        if mapped_layer is None:
+            continue
+
+        if mapped_layer not in hulls.keys():
+            hulls[mapped_layer] = []
+
+        hulls[mapped_layer].extend(
+            layer_hulls if matrix is None
+            else rai.affine.transform_polys(matrix, layer_hulls)
+            )
@@ -0,0 +1,182 @@
+"""compocache.py: home to CompoCache class."""
+
+from typing import Any, Hashable
+from collections import OrderedDict
+import inspect
+
+import raimad as rai
+
+class UncacheableArgumentError(TypeError):
+    """An argument of a compo cannot be turned into a cache key."""
+
+class CompoCache:
+    """
+    CompoCache: reuse compos built with the same class and options.
+
+    `rai.Circle(50)` called in ten places runs `_make` ten times
+    and produces ten distinct compos.
+    `rai.Circle.cached(50)` called in ten places
+    runs `_make` once and returns the same compo every time,
+    so exporters like `rai.cif.Reuse`
+    automatically write it as one cell.
+
+    The arguments are bound to the signature of `_make`,
+    so `Circle.cached(50)` and `Circle.cached(radius=50)`
+    return the same compo,
+    as do calls that differ only in spelling out default values.
+    Integers passed to options annotated as `float` in `Options`
+    are treated as floats,
+    so `Circle.cached(50.0)` returns the same compo as well.
+
+    Compos returned from the cache are shared,
+    so they must not be modified.
+    A compo whose geoms or subcompos have changed since it was built
+    is not returned again;
+    it is built anew instead.
+
+    The cache holds at most `maxsize` compos,
+    the least recently used compos are evicted first.
+    """
+
+    maxsize: int
+    hits: int
+    misses: int
+    _compos: 'OrderedDict[Hashable, tuple[rai.typing.Compo, Any]]'
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        """
+        Create new CompoCache.
+
+        Parameters
+        ----------
+        maxsize
+            Maximum number of compos to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._compos = OrderedDict()
+
+    def __len__(self) -> int:
+        """Get number of compos in the cache."""
+        return len(self._compos)
+
+    def clear(self) -> None:
+        """Remove all compos from the cache."""
+        self._compos.clear()
+
+    def get(
+            self,
+            compo_cls: 'rai.typing.CompoType',
+            *args: Any,
+            **kwargs: Any,
+            ) -> 'rai.typing.Compo':
+        """
+        Get a compo from the cache, building it if needed.
+
+        Parameters
+        ----------
+        compo_cls
+            The class of the compo
+        *args, **kwargs
+            Arguments to pass to the compo class
+
+        Returns
+        -------
+        rai.typing.Compo
+            The cached compo, or a new compo
+            if there was no compo with the same class and arguments.
+            Compos whose arguments cannot be turned into a key
+            (for example because they include a proxy)
+            are always built anew and not cached.
+        """
+        try:
+            key = _get_key(compo_cls, args, kwargs)
+        except UncacheableArgumentError:
+            self.misses += 1
+            return compo_cls(*args, **kwargs)
+
+        entry = self._compos.get(key)
+        if entry is not None:
+            compo, stamp = entry
+            if compo._get_steamroll_stamp() is stamp:
+                self._compos.move_to_end(key)
+                self.hits += 1
+                return compo
+
+        self.misses += 1
+        compo = compo_cls(*args, **kwargs)
+        self._compos[key] = (compo, compo._get_steamroll_stamp())
+        self._compos.move_to_end(key)
+
+        while len(self._compos) > self.maxsize:
+            self._compos.popitem(last=False)
+
+        return compo
+
+# Cache used by `Compo.cached`,
+# and by `Partial.__call__` if `cache_partials` is True
+compo_cache = CompoCache()
+cache_partials = False
+
+def _get_key(
+        compo_cls: 'rai.typing.CompoType',
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        ) -> Hashable:
+    """Get the cache key of a compo class and its arguments."""
+    # Compos built in grid mode have different geoms, see `rai.grid`
+    return (compo_cls, rai.grid.unit, _get_arguments(compo_cls, args, kwargs))
+
+def _get_arguments(
+        compo_cls: 'rai.typing.CompoType',
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        ) -> tuple[tuple[str, Hashable], ...]:
+    """Get canonical (name, value) pairs of all arguments of a compo."""
+    signature = inspect.signature(compo_cls._make)
+    try:
+        # `None` stands in for `self`
+        bound = signature.bind(None, *args, **kwargs)
+    except TypeError:
+        # Let the compo class raise the error when it is built
+        raise UncacheableArgumentError()
+    bound.apply_defaults()
+
+    arguments = []
+    for name, value in tuple(bound.arguments.items())[1:]:
+        if (
+                name in compo_cls.Options.keys()
+                and compo_cls.Options[name].annot in (float, 'float')
+                and type(value) is int
+                ):
+            value = float(value)
+        arguments.append((name, _canonicalize(value)))
+
+    return tuple(arguments)
+
+def _canonicalize(value: Any) -> Hashable:
+    """Turn an argument into something hashable that identifies it."""
+    # bool is a subclass of int, and True == 1,
+    # so types are part of the key
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return (type(value), value)
+
+    if isinstance(value, (tuple, list)):
+        return (type(value), tuple(_canonicalize(item) for item in value))
+
+    if isinstance(value, dict):
+        return (
+            dict,
+            tuple(sorted(
+                ((key, _canonicalize(item)) for key, item in value.items()),
+                key=repr,
+                ))
+            )
+
+    if isinstance(value, (rai.Compo, type)) or callable(value):
+        # Compos, compo classes, functions and the like
+        # are only the same if they are the same object
+        return (object, value)
+
+    raise UncacheableArgumentError()
@@ -107,9 +107,12 @@ class FilteredDictList(Generic[T_STORED, T_ADDED, T_RETURNED]):
     def __setattr__(self, name: str, val: T_ADDED) -> None:
         """Add item to dictlist by key with attr notation."""
         if name.startswith('_'):
+            # Private attributes are not items,
+            # so there is nothing to sanity check
             super().__setattr__(name, val)
+            return
 
-        elif hasattr(self.__class__, name):
+        if hasattr(self.__class__, name):
             self._sanitycheck()
             raise AttributeError(
                 f"Cannot override class attribute {name}"
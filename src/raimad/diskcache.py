@@ -0,0 +1,489 @@
+"""diskcache.py: home to DiskCache class."""
+
+from typing import Any
+from array import array
+from itertools import accumulate
+from hashlib import blake2b
+from pathlib import Path
+import importlib
+import inspect
+import marshal
+import os
+import sys
+import tempfile
+
+import raimad as rai
+from raimad.compocache import UncacheableArgumentError, _get_arguments
+
+# Bump this whenever the layout of cache entries changes,
+# so that entries written by older versions are not read.
+FORMAT_VERSION = 3
+
+SUFFIX = '.raic'
+
+class UnstorableCompoError(TypeError):
+    """A compo cannot be written to or read from the disk cache."""
+
+def default_directory() -> Path:
+    """
+    Get the default directory of the disk cache.
+
+    Returns
+    -------
+    Path
+        `$XDG_CACHE_HOME/raimad` if `XDG_CACHE_HOME` is set,
+        `~/.cache/raimad` otherwise.
+    """
+    cache_home = os.environ.get('XDG_CACHE_HOME')
+    if cache_home:
+        return Path(cache_home) / 'raimad'
+    return Path.home() / '.cache' / 'raimad'
+
+class DiskCache:
+    """
+    DiskCache: reuse compos built with the same class and options across runs.
+
+    Compos are stored in a directory,
+    keyed on the source code of the compo class
+    (and of its base classes)
+    together with the options it was built with.
+    Editing the source of a compo class therefore invalidates
+    every entry of that class,
+    as well as every entry whose subcompos are instances of it,
+    but leaves all other entries alone.
+
+    Only the geoms, marks, and subcompos of a compo are stored,
+    along with the classes of the compo and of its subcompos.
+    Compos that keep other state in attributes set by `_make`
+    should not be cached on disk.
+    Compo classes must be importable by their module and name,
+    compos whose classes are defined inside functions
+    are built anew every time instead.
+
+    The cache directory holds at most `max_size` bytes of entries,
+    the least recently used entries are evicted first.
+    The directory is scanned only once the entries written so far
+    may have grown over `max_size`,
+    so entries written by other processes in the meantime
+    are noticed at the next scan.
+    """
+
+    directory: Path
+    max_size: int
+    hits: int
+    misses: int
+    # Total size of the entries as of the last scan,
+    # plus the size of the entries written since.
+    # None until the first scan.
+    _size: int | None
+
+    def __init__(
+            self,
+            directory: str | Path | None = None,
+            max_size: int = 256 * 2 ** 20,
+            ) -> None:
+        """
+        Create new DiskCache.
+
+        Parameters
+        ----------
+        directory
+            Directory to keep the cache entries in.
+            Created if it does not exist.
+            Defaults to `default_directory()`.
+        max_size
+            Maximum total size of the cache entries, in bytes
+        """
+        self.directory = (
+            default_directory() if directory is None else Path(directory)
+            )
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._size = None
+
+    def __len__(self) -> int:
+        """Get number of compos in the cache."""
+        return len(self._entries())
+
+    def clear(self) -> None:
+        """Remove all compos from the cache."""
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+    def get(
+            self,
+            compo_cls: 'rai.typing.CompoType',
+            *args: Any,
+            **kwargs: Any,
+            ) -> 'rai.typing.Compo':
+        """
+        Get a compo from the cache, building it if needed.
+
+        Parameters
+        ----------
+        compo_cls
+            The class of the compo
+        *args, **kwargs
+            Arguments to pass to the compo class
+
+        Returns
+        -------
+        rai.typing.Compo
+            A compo loaded from the cache, or a new compo
+            if there was no compo with the same class and arguments.
+            Unlike `CompoCache`, every call returns a new compo.
+            Compos whose arguments cannot be turned into a key
+            (for example because they include a proxy)
+            are always built anew and not cached.
+        """
+        try:
+            key = _get_disk_key(compo_cls, args, kwargs)
+        except (UncacheableArgumentError, UnstorableCompoError):
+            self.misses += 1
+            return compo_cls(*args, **kwargs)
+
+        path = self.directory / (key + SUFFIX)
+        try:
+            compo = _load(path.read_bytes())
+        except (OSError, ValueError, EOFError, TypeError, UnstorableCompoError):
+            # Missing, corrupt, or stale entry
+            pass
+        else:
+            self.hits += 1
+            # Eviction goes by modification time
+            os.utime(path)
+            return compo
+
+        self.misses += 1
+        compo = compo_cls(*args, **kwargs)
+
+        try:
+            data = _dump(compo)
+        except UnstorableCompoError:
+            return compo
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first,
+        # so other processes never see half an entry
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        try:
+            # A corrupt or stale entry is replaced
+            replaced_size = path.stat().st_size
+        except OSError:
+            replaced_size = 0
+        os.replace(tmp, path)
+
+        if self._size is None:
+            self._evict()
+        else:
+            self._size += len(data) - replaced_size
+            if self._size > self.max_size:
+                self._evict()
+        return compo
+
+    def _entries(self) -> list[Path]:
+        """Get paths of all cache entries."""
+        if not self.directory.is_dir():
+            return []
+        return list(self.directory.glob('*' + SUFFIX))
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until under `max_size`."""
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._size = total
+
+def _get_disk_key(
+        compo_cls: 'rai.typing.CompoType',
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        ) -> str:
+    """Get the file name of a compo class and its arguments."""
+    arguments = _get_arguments(compo_cls, args, kwargs)
+
+    hasher = blake2b(digest_size=16)
+    hasher.update(repr((
+        FORMAT_VERSION,
+        marshal.version,
+        _class_path(compo_cls),
+        _source_hash(compo_cls),
+        # Compos built in grid mode have different geoms, see `rai.grid`
+        rai.grid.unit,
+        tuple(
+            (name, _stable_repr(value)) for name, value in arguments
+            ),
+        )).encode())
+    return hasher.hexdigest()
+
+def _stable_repr(canonical: Any) -> str:
+    """
+    Turn a key made by `compocache._canonicalize` into a string.
+
+    Unlike the key itself, the string is the same between runs of Python.
+    """
+    if isinstance(canonical, tuple) and len(canonical) == 2:
+        tag, value = canonical
+
+        if tag is object:
+            if isinstance(value, rai.Compo):
+                return f'compo:{value.content_hash()}'
+            if isinstance(value, type):
+                return f'class:{_class_path(value)}:{_source_hash(value)}'
+            raise UncacheableArgumentError()
+
+        if tag in (tuple, list):
+            return (
+                f'{tag.__name__}('
+                + ','.join(_stable_repr(item) for item in value)
+                + ')'
+                )
+
+        if tag is dict:
+            return (
+                'dict('
+                + ','.join(
+                    f'{key!r}:{_stable_repr(item)}' for key, item in value
+                    )
+                + ')'
+                )
+
+        if isinstance(tag, type):
+            return f'{tag.__name__}:{value!r}'
+
+    raise UncacheableArgumentError()
+
+def _class_path(cls: type) -> str:
+    """Get the `module:qualname` path of a class, if it is importable."""
+    if '<locals>' in cls.__qualname__:
+        raise UnstorableCompoError(
+            f'{cls.__qualname__} cannot be imported by name.'
+            )
+    return f'{cls.__module__}:{cls.__qualname__}'
+
+def _import_class(path: str) -> 'rai.typing.CompoType':
+    """Import a compo class given its `module:qualname` path."""
+    module_str, _, qualname = path.partition(':')
+    obj: Any = importlib.import_module(module_str)
+    for name in qualname.split('.'):
+        obj = getattr(obj, name)
+
+    if not rai.is_compo_class(obj):
+        raise UnstorableCompoError(f'{path} is not a compo class.')
+    compo_cls: 'rai.typing.CompoType' = obj
+    return compo_cls
+
+def _source_hash(cls: type) -> str:
+    """Hash the source code of a class and its base classes."""
+    hasher = blake2b(digest_size=16)
+    for base in cls.__mro__:
+        if base is object:
+            continue
+        try:
+            source = inspect.getsource(base)
+        except (OSError, TypeError):
+            raise UnstorableCompoError(
+                f'Source code of {base.__qualname__} is not available.'
+                ) from None
+        hasher.update(source.encode())
+    return hasher.hexdigest()
+
+def _dump(compo: 'rai.typing.Compo') -> bytes:
+    """Serialize a compo and everything it references."""
+    # Each distinct compo is stored once,
+    # children before their parents, so the root comes last
+    compos: list[Any] = []
+    indices: dict[int, int] = {}
+    classes: dict[str, str] = {}
+
+    def dump_compo(compo: 'rai.typing.Compo') -> int:
+        index = indices.get(id(compo))
+        if index is not None:
+            return index
+
+        cls = type(compo)
+        path = _class_path(cls)
+        if path not in classes:
+            classes[path] = _source_hash(cls)
+
+        geoms = []
+        for layer, polys in compo.geoms.items():
+            if isinstance(polys, rai.PackedPolys):
+                packed = True
+                lengths = tuple(polys.lengths())
+                coords = polys.coords[:]
+            else:
+                packed = False
+                lengths = tuple(len(poly) for poly in polys)
+                coords = array('d')
+                for poly in polys:
+                    for x, y in poly:
+                        coords.append(x)
+                        coords.append(y)
+            if sys.byteorder != 'little':
+                coords.byteswap()
+            geoms.append((layer, packed, lengths, coords.tobytes()))
+
+        marks = tuple(
+            (key, tuple(val)) for key, val in compo.marks._dict.items()
+            )
+
+        subcompos = tuple(
+            (key, dump_proxy(proxy))
+            for key, proxy in compo.subcompos._dict.items()
+            )
+
+        index = len(compos)
+        compos.append((
+            path,
+            tuple(geoms),
+            marks,
+            subcompos,
+            compo._get_primitive(),
+            ))
+        indices[id(compo)] = index
+        return index
+
+    def dump_proxy(proxy: 'rai.typing.Proxy') -> Any:
+        if isinstance(proxy.compo, rai.Proxy):
+            target = (False, dump_proxy(proxy.compo))
+        else:
+            target = (True, dump_compo(proxy.compo))
+
+        if isinstance(proxy, rai.ArrayProxy):
+            array_args: Any = (
+                proxy.num_x,
+                proxy.num_y,
+                tuple(proxy.vec_x),
+                tuple(proxy.vec_y),
+                )
+        else:
+            array_args = None
+
+        return (
+            target,
+            proxy.lmap.shorthand,
+            proxy.transform._get_matrix(),
+            array_args,
+            proxy.autogenned,
+            )
+
+    dump_compo(compo)
+
+    try:
+        return marshal.dumps((FORMAT_VERSION, classes, tuple(compos)))
+    except ValueError:
+        raise UnstorableCompoError(
+            'Compo contains values that cannot be serialized.'
+            ) from None
+
+def _load(data: bytes) -> 'rai.typing.Compo':
+    """Deserialize a compo serialized with `_dump`."""
+    version, classes, records = marshal.loads(data)
+    if version != FORMAT_VERSION:
+        raise UnstorableCompoError('Entry was written by another version.')
+
+    resolved = {}
+    for path, source_hash in classes.items():
+        try:
+            cls = _import_class(path)
+        except (ImportError, AttributeError):
+            raise UnstorableCompoError(f'{path} cannot be imported.') from None
+        if _source_hash(cls) != source_hash:
+            raise UnstorableCompoError(f'{path} has changed.')
+        resolved[path] = cls
+
+    compos: list['rai.typing.Compo'] = []
+
+    def load_proxy(record: Any) -> 'rai.typing.Proxy':
+        (is_compo, target), lmap, matrix, array_args, autogenned = record
+        compo = compos[target] if is_compo else load_proxy(target)
+
+        transform = rai.Transform()
+        transform._matrix = matrix
+
+        if array_args is None:
+            return rai.Proxy(
+                compo,
+                lmap,
+                transform,
+                _autogenned=autogenned,
+                )
+
+        num_x, num_y, vec_x, vec_y = array_args
+        return rai.ArrayProxy(
+            compo,
+            num_x,
+            num_y,
+            vec_x,
+            vec_y,
+            lmap=lmap,
+            transform=transform,
+            _autogenned=autogenned,
+            )
+
+    for path, geoms, marks, subcompos, primitive in records:
+        cls = resolved[path]
+        # Skip `__init__`, which would run `_make`
+        compo = cls.__new__(cls)
+        compo.geoms = {}
+        compo.subcompos = rai.SubcompoContainer()
+        compo.marks = rai.MarksContainer()
+
+        for layer, packed, lengths, coords_bytes in geoms:
+            coords = array('d')
+            coords.frombytes(coords_bytes)
+            if sys.byteorder != 'little':
+                coords.byteswap()
+            if packed:
+                compo.geoms[layer] = rai.PackedPolys.from_arrays(
+                    coords,
+                    accumulate(lengths, initial=0),
+                    )
+                continue
+
+            polys = []
+            start = 0
+            for length in lengths:
+                end = start + length * 2
+                polys.append(list(zip(
+                    coords[start:end:2],
+                    coords[start + 1:end:2],
+                    )))
+                start = end
+            compo.geoms[layer] = polys
+
+        for key, val in marks:
+            if isinstance(key, int):
+                compo.marks.append(val)
+            else:
+                compo.marks[key] = val
+
+        for key, record in subcompos:
+            proxy = load_proxy(record)
+            if isinstance(key, int):
+                compo.subcompos.append(proxy)
+            else:
+                compo.subcompos[key] = proxy
+
+        if primitive is not None:
+            compo._set_primitive(*primitive)
+
+        compos.append(compo)
+
+    return compos[-1]
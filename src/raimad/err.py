@@ -30,6 +30,10 @@ from raimad.cif.lname_transformers import UntransformableLayerName
 from raimad.cif.lname_transformers import CIFLayerNameWarning
 from raimad.cif.lname_transformers import InvalidLayerNameTransformerCallable
 
+from raimad.gds.reuse import PolygonTooLargeError
+
+from raimad.sweep import UnknownOptionError
+
 # __all__ should contain all re-exported objects
 # (checked by mypy and ruff)
 # do not edit this definition manually;
@@ -60,5 +64,7 @@ __all__ = [
     "UntransformableLayerName",
     "CIFLayerNameWarning",
     "InvalidLayerNameTransformerCallable",
+    "PolygonTooLargeError",
+    "UnknownOptionError",
     ]
 
@@ -0,0 +1,16 @@
+"""Namespace flattening for `rai.gds` module."""
+from . import records
+from . import encode
+from .reuse import Reuse
+
+# __all__ should contain all re-exported objects
+# (checked by mypy and ruff)
+# do not edit this definition manually;
+# use scripts/patch_dunder_all.py
+# to update automatically.
+
+__all__ = [
+    "records",
+    "encode",
+    "Reuse",
+    ]
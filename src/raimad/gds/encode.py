@@ -0,0 +1,101 @@
+"""encode.py: fast packing of polygons as GDSII boundaries."""
+
+from array import array
+from itertools import chain
+from struct import Struct
+from typing import Iterable
+import sys
+
+import raimad as rai
+from raimad.types import PackablePolysS
+from raimad.gds import records
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy is optional, see `rai.affine.use_numpy`
+    pass
+
+_XY_HEADER = Struct('>HH')
+
+def encode_boundaries(
+        polys: PackablePolysS,
+        scale: float,
+        layer: int,
+        datatype: int,
+        ) -> bytes:
+    """
+    Pack polygons as GDSII boundaries.
+
+    Coordinates are multiplied by `scale`
+    and rounded to the nearest integer.
+    The coordinates of all polygons are packed into one buffer at once;
+    if numpy is used (see `rai.affine.use_numpy`)
+    and there are enough vertices,
+    they are also scaled and rounded by numpy.
+    The coordinates of packed polygons (see `rai.PackedPolys`)
+    are read from their array directly.
+
+    Parameters
+    ----------
+    polys
+        The polygons to pack.
+        Every polygon must have at least three vertices,
+        and few enough to fit into a single XY record.
+    scale
+        Coordinates are multiplied by this number
+    layer
+        GDS layer number
+    datatype
+        GDS datatype
+
+    Returns
+    -------
+    bytes
+        A BOUNDARY element for every polygon,
+        with the first vertex repeated at the end to close it.
+    """
+    coords: Iterable[float]
+    if isinstance(polys, rai.PackedPolys):
+        lengths = polys.lengths()
+        coords = polys.coords
+    else:
+        lengths = [len(poly) for poly in polys]
+        coords = chain.from_iterable(chain.from_iterable(polys))
+    num_vertices = sum(lengths)
+
+    if rai.affine.use_numpy and num_vertices >= rai.affine.NUMPY_MIN_VERTICES:
+        if isinstance(polys, rai.PackedPolys):
+            # Copies the whole buffer of coordinates at once
+            floats = np.array(polys.coords, np.float64)
+        else:
+            floats = np.fromiter(coords, np.float64, num_vertices * 2)
+        floats *= scale
+        np.rint(floats, out=floats)
+        data = floats.astype('>i4').tobytes()
+
+    else:
+        ints = array('i', [round(coord * scale) for coord in coords])
+        if sys.byteorder == 'little':
+            ints.byteswap()
+        data = ints.tobytes()
+
+    head = (
+        records.record(records.BOUNDARY)
+        + records.int2(records.LAYER, layer)
+        + records.int2(records.DATATYPE, datatype)
+        )
+    tail = records.record(records.ENDEL)
+
+    parts = []
+    offset = 0
+    for length in lengths:
+        size = 8 * length
+        parts.append(head)
+        parts.append(_XY_HEADER.pack(4 + size + 8, records.XY))
+        parts.append(data[offset:offset + size])
+        # Close the polygon by repeating its first vertex
+        parts.append(data[offset:offset + 8])
+        parts.append(tail)
+        offset += size
+    return b''.join(parts)
@@ -0,0 +1,130 @@
+"""
+records.py: packing of GDSII records.
+
+A GDSII file is a sequence of records.
+Every record starts with a four-byte header:
+the length of the record in bytes (including the header),
+the record type, and the data type of its payload.
+All numbers are big-endian.
+Reals are not IEEE floats, but the GDSII-specific
+excess-64 base-16 format implemented by `real8`.
+"""
+
+from typing import Sequence
+from datetime import datetime
+from struct import Struct
+import struct
+
+# Record types, already combined with the data type of their payload
+HEADER = 0x0002
+BGNLIB = 0x0102
+LIBNAME = 0x0206
+UNITS = 0x0305
+ENDLIB = 0x0400
+BGNSTR = 0x0502
+STRNAME = 0x0606
+ENDSTR = 0x0700
+BOUNDARY = 0x0800
+SREF = 0x0A00
+AREF = 0x0B00
+LAYER = 0x0D02
+DATATYPE = 0x0E02
+XY = 0x1003
+ENDEL = 0x1100
+SNAME = 0x1206
+COLROW = 0x1302
+STRANS = 0x1A01
+MAG = 0x1B05
+ANGLE = 0x1C05
+
+# Version of the GDSII format written to the HEADER record
+VERSION = 600
+
+# Flag in the STRANS record that mirrors across the x axis
+STRANS_REFLECT = 0x8000
+
+# A record is at most this long (including its header)
+MAX_RECORD_LENGTH = 0xFFFF
+
+_HEADER = Struct('>HH')
+_INT2 = Struct('>HHh')
+_BITARRAY = Struct('>HHH')
+_INT2_PAIR = Struct('>HHhh')
+_TIMESTAMPS = Struct('>HH12h')
+
+def record(record_type: int, payload: bytes = b'') -> bytes:
+    """Pack a record with a raw payload."""
+    return _HEADER.pack(4 + len(payload), record_type) + payload
+
+def int2(record_type: int, value: int) -> bytes:
+    """Pack a record with a single two-byte integer."""
+    return _INT2.pack(6, record_type, value)
+
+def bitarray(record_type: int, value: int) -> bytes:
+    """Pack a record with a two-byte bit array."""
+    return _BITARRAY.pack(6, record_type, value)
+
+def int2_pair(record_type: int, first: int, second: int) -> bytes:
+    """Pack a record with two two-byte integers."""
+    return _INT2_PAIR.pack(8, record_type, first, second)
+
+def int4s(record_type: int, values: Sequence[int]) -> bytes:
+    """Pack a record with a sequence of four-byte integers."""
+    return struct.pack(
+        f'>HH{len(values)}i',
+        4 + 4 * len(values),
+        record_type,
+        *values,
+        )
+
+def reals(record_type: int, *values: float) -> bytes:
+    """Pack a record with eight-byte reals."""
+    return record(record_type, b''.join(map(real8, values)))
+
+def string(record_type: int, value: str) -> bytes:
+    """Pack a record with an ASCII string, padded to an even length."""
+    data = value.encode('ascii')
+    if len(data) % 2:
+        data += b'\0'
+    return record(record_type, data)
+
+def timestamps(record_type: int, timestamp: datetime) -> bytes:
+    """Pack a BGNLIB or BGNSTR record (modification and access time)."""
+    fields = (
+        timestamp.year,
+        timestamp.month,
+        timestamp.day,
+        timestamp.hour,
+        timestamp.minute,
+        timestamp.second,
+        )
+    return _TIMESTAMPS.pack(28, record_type, *fields, *fields)
+
+def real8(value: float) -> bytes:
+    """
+    Convert a float to an eight-byte GDSII real.
+
+    GDSII reals have a sign bit, a seven-bit exponent of 16
+    with an excess of 64, and a 56-bit mantissa in [1/16, 1).
+    """
+    if value == 0:
+        return bytes(8)
+
+    sign = 0x80 if value < 0 else 0
+    value = abs(value)
+
+    exponent = 64
+    while value >= 1:
+        value /= 16
+        exponent += 1
+    while value < 1 / 16:
+        value *= 16
+        exponent -= 1
+
+    mantissa = round(value * 2 ** 56)
+    if mantissa == 2 ** 56:
+        # Rounded up to the next power of 16
+        mantissa = 2 ** 52
+        exponent += 1
+
+    return bytes((sign | exponent, )) + mantissa.to_bytes(7, 'big')
@@ -0,0 +1,457 @@
+"""reuse.py: home to the Reuse GDSII exporter."""
+
+from typing import Iterator, Mapping, TypeAlias
+from datetime import datetime
+from math import atan2, degrees, sqrt
+
+import raimad as rai
+from raimad.types import PackableGeomsS
+from raimad.cif.noreuse import _map_through_tower
+from raimad.cif.reuse import LayerMap, _cell_key, _get_flat_affines
+from raimad.cif.reuse import _unique_name
+from raimad.cif.lnametable import _get_layers
+from raimad.gds import records
+from raimad.gds.encode import encode_boundaries
+
+# GDS layer number, or (layer number, datatype)
+LayerNumber: TypeAlias = int | tuple[int, int]
+
+# How far an affine matrix is allowed to deviate from
+# a rotation/mirror/uniform scale/translation
+# before it is considered to also shear or scale non-uniformly.
+# Relative to the scale of the matrix.
+TOLERANCE = 1e-9
+
+# Records are collected into chunks of at least this many bytes
+# before they are yielded
+BUFFER_SIZE = 2 ** 16
+
+# A BOUNDARY has at most this many vertices
+# (the first vertex is repeated at the end,
+# and the XY record must fit into a single record)
+MAX_VERTICES = (records.MAX_RECORD_LENGTH - 4) // 8 - 1
+
+# An AREF has at most this many columns or rows
+MAX_COLROW = 0x7FFF
+
+# Reference to a structure, without the SNAME record:
+# (STRANS, MAG and ANGLE records, XY record, COLROW record)
+# The STRANS, MAG and ANGLE records are empty for an identity transform,
+# the COLROW record is empty for an SREF.
+_Placement: TypeAlias = tuple[bytes, bytes, bytes]
+
+class PolygonTooLargeError(ValueError):
+    """Polygon has too many vertices to be written to GDSII."""
+
+class Reuse:
+    """
+    GDSII Exporter that reuses structures.
+
+    Like `rai.cif.Reuse`, this exporter writes out
+    only one structure for every unique compo
+    (as given by `Proxy.final()`) and layermap.
+    Subcompos are placed with an SREF,
+    which carries the translation, rotation, mirroring,
+    and magnification of the proxy,
+    and ArrayProxies are placed with a single AREF
+    where possible.
+    Subcompos whose transform shears or scales non-uniformly
+    are flattened into the geometry of their parent.
+
+    Coordinates are in RAIMAD units (micrometers),
+    rounded to the nearest multiple of `database_unit`.
+    RAIMAD layer names are mapped to GDS layer numbers with `layers`,
+    which maps a layer name to either a layer number
+    or a (layer number, datatype) tuple.
+    Layers that are not in `layers` are numbered in the order
+    in which they appear in the compo,
+    skipping numbers that are already used.
+    The resulting mapping is available as `layer_numbers`.
+
+    If `lazy` is set, the GDSII file is not generated on construction
+    and `gds_bytes` is not set.
+    Use `yield_gds` to generate the file piece by piece instead.
+    """
+
+    def __init__(
+            self,
+            compo: 'rai.typing.CompoLike',
+            database_unit: float = 1e-3,
+            lazy: bool = False,
+            layers: Mapping[str, LayerNumber] | None = None,
+            timestamp: datetime | None = None,
+            ) -> None:
+        """
+        Create new GDSII exporter.
+
+        Parameters
+        ----------
+        compo
+            The compo or proxy to export
+        database_unit
+            Size of the GDSII database unit in micrometers
+        lazy
+            Do not generate the GDSII file right away
+        layers
+            GDS layer numbers of RAIMAD layers
+        timestamp
+            Modification time written to the file,
+            defaults to the current time
+        """
+        self.compo = compo
+        self.database_unit = database_unit
+        self.timestamp = timestamp or datetime.now().replace(microsecond=0)
+        self.layer_numbers = _get_layer_numbers(compo, layers or {})
+
+        # (id of compo, layermap) -> name of structure
+        self._structs: dict[
+            tuple[int, tuple[tuple[str, str | None], ...]],
+            str
+            ] = {}
+        # id of compo -> (compo, layers in entire hierarchy of compo),
+        # see `rai.cif.lnametable._get_layers`
+        self._layers: dict[
+            int,
+            tuple['rai.typing.Compo', tuple[str, ...]]
+            ] = {}
+        # type name -> how many structures with this name were already written
+        self._struct_names: dict[str, int] = {}
+
+        if not lazy:
+            self.gds_bytes = self._export_gds()
+
+    def _export_gds(self) -> bytes:
+        return b''.join(self.yield_gds())
+
+    def yield_gds(self) -> Iterator[bytes]:
+        """
+        Yield the GDSII file in chunks.
+
+        Records are packed into a buffer,
+        which is yielded whenever it grows beyond `BUFFER_SIZE` bytes.
+        """
+        buffer = bytearray()
+        for record in self._yield_records():
+            buffer += record
+            if len(buffer) >= BUFFER_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+
+    def _yield_records(self) -> Iterator[bytes]:
+        """Yield all records of the GDSII file."""
+        self._structs = {}
+        self._struct_names = {}
+
+        yield records.int2(records.HEADER, records.VERSION)
+        yield records.timestamps(records.BGNLIB, self.timestamp)
+        yield records.string(records.LIBNAME, 'RAIMAD')
+        yield records.reals(
+            records.UNITS,
+            self.database_unit,
+            self.database_unit * 1e-6,
+            )
+
+        final = self.compo.final()
+        layer_map = {
+            layer: _map_through_tower(self.compo, layer)
+            for layer in _get_layers(final, self._layers)
+            }
+        placements = self._get_placements(self.compo)
+
+        if placements is None:
+            # Toplevel proxy shears or scales non-uniformly,
+            # flatten everything
+            yield records.timestamps(records.BGNSTR, self.timestamp)
+            yield records.string(
+                records.STRNAME,
+                _unique_name(final, self._struct_names),
+                )
+            yield from self._yield_boundaries(self.compo.steamroll(), None)
+            yield records.record(records.ENDSTR)
+
+        else:
+            yield from self._yield_struct(final, layer_map)
+
+            if placements != [_IDENTITY_PLACEMENT]:
+                # Place the compo in a toplevel structure
+                # that carries the transform of the toplevel proxy
+                name = self._structs[_cell_key(final, layer_map)]
+                yield records.timestamps(records.BGNSTR, self.timestamp)
+                yield records.string(
+                    records.STRNAME,
+                    _unique_name(final, self._struct_names),
+                    )
+                yield from _yield_refs(name, placements)
+                yield records.record(records.ENDSTR)
+
+        yield records.record(records.ENDLIB)
+
+    def _yield_struct(
+            self,
+            compo: 'rai.typing.Compo',
+            layer_map: LayerMap,
+            ) -> Iterator[bytes]:
+        """
+        Yield records of a structure, as well as of the structures it uses.
+
+        Nothing is yielded if the compo has already been written
+        with this layermap.
+        The name of the structure is recorded in `self._structs`.
+        """
+        key = _cell_key(compo, layer_map)
+        if key in self._structs:
+            return
+
+        # Structures are written before the structures that use them
+        refs: list[tuple[str, list[_Placement]]] = []
+        flattened = []
+        for subcompo in compo.subcompos.values():
+            placements = self._get_placements(subcompo)
+
+            if placements is None:
+                flattened.append(subcompo)
+                continue
+
+            sub_final = subcompo.final()
+            sub_layer_map = {}
+            for layer in _get_layers(sub_final, self._layers):
+                mapped = _map_through_tower(subcompo, layer)
+                sub_layer_map[layer] = (
+                    None if mapped is None else layer_map[mapped]
+                    )
+
+            yield from self._yield_struct(sub_final, sub_layer_map)
+            refs.append((
+                self._structs[_cell_key(sub_final, sub_layer_map)],
+                placements,
+                ))
+
+        name = _unique_name(compo, self._struct_names)
+        self._structs[key] = name
+
+        yield records.timestamps(records.BGNSTR, self.timestamp)
+        yield records.string(records.STRNAME, name)
+
+        yield from self._yield_boundaries(compo.geoms, layer_map)
+        for subcompo in flattened:
+            yield from self._yield_boundaries(subcompo.steamroll(), layer_map)
+
+        for sub_name, placements in refs:
+            yield from _yield_refs(sub_name, placements)
+
+        yield records.record(records.ENDSTR)
+
+    def _yield_boundaries(
+            self,
+            geoms: PackableGeomsS,
+            layer_map: LayerMap | None,
+            ) -> Iterator[bytes]:
+        """Yield a BOUNDARY for every polygon, mapped by layer_map."""
+        scale = 1 / self.database_unit
+        for layer, polys in geoms.items():
+            mapped = layer if layer_map is None else layer_map[layer]
+
+            # If a layer has been LMapp'ed to None,
+            # that means the user wants it discarded. Skip.
+            if mapped is None:
+                continue
+
+            lengths = (
+                polys.lengths() if isinstance(polys, rai.PackedPolys)
+                else [len(poly) for poly in polys]
+                )
+            for length in lengths:
+                if length > MAX_VERTICES:
+                    raise PolygonTooLargeError(
+                        f"Polygon on layer `{layer}` has {length} "
+                        f"vertices, but GDSII allows at most {MAX_VERTICES}. "
+                        "Split the polygon or use fewer points."
+                        )
+
+            if min(lengths, default=3) < 3:
+                # Not polygons, GDSII readers reject these
+                polys = [poly for poly in polys if len(poly) >= 3]
+
+            yield encode_boundaries(
+                polys,
+                scale,
+                *self.layer_numbers[mapped],
+                )
+
+    def _get_placements(
+            self,
+            compo: 'rai.typing.CompoLike',
+            ) -> list[_Placement] | None:
+        """
+        Get the references needed to place a subcompo.
+
+        Returns
+        -------
+        list[_Placement] | None
+            A single AREF if the proxy tower contains one ArrayProxy
+            that can be written as an AREF,
+            otherwise an SREF for every instance placed by `compo`
+            (see `rai.cif.reuse._get_flat_affines`),
+            or None if any of them shears or scales non-uniformly.
+        """
+        scale = 1 / self.database_unit
+        tower = tuple(compo.descend_p())
+        arrays = [
+            index for index, proxy in enumerate(tower)
+            if isinstance(proxy, rai.ArrayProxy)
+            ]
+
+        if len(arrays) == 1:
+            index, = arrays
+            array = tower[index]
+            assert isinstance(array, rai.ArrayProxy)
+
+            # The lattice is transformed by the array proxy
+            # and all proxies above it, see `rai.cif.NoReuse`
+            outer = rai.affine.matmul(
+                rai.affine.identity(),
+                *(proxy.transform._affine for proxy in tower[:index + 1]),
+                )
+            matrix = rai.affine.matmul(
+                outer,
+                *(proxy.transform._affine for proxy in tower[index + 1:]),
+                )
+            strans = _get_strans(matrix)
+
+            if (
+                    strans is not None
+                    and 0 < array.num_x <= MAX_COLROW
+                    and 0 < array.num_y <= MAX_COLROW
+                    ):
+                origin = (matrix[0][2], matrix[1][2])
+                points = [origin]
+                for num, vec in (
+                        (array.num_x, array.vec_x),
+                        (array.num_y, array.vec_y),
+                        ):
+                    points.append((
+                        origin[0]
+                        + num * (outer[0][0] * vec[0] + outer[0][1] * vec[1]),
+                        origin[1]
+                        + num * (outer[1][0] * vec[0] + outer[1][1] * vec[1]),
+                        ))
+
+                return [(
+                    strans,
+                    records.int4s(records.XY, [
+                        round(coord * scale)
+                        for point in points
+                        for coord in point
+                        ]),
+                    records.int2_pair(
+                        records.COLROW,
+                        array.num_x,
+                        array.num_y,
+                        ),
+                    )]
+
+        placements = []
+        for affine in _get_flat_affines(compo):
+            strans = _get_strans(affine)
+            if strans is None:
+                return None
+            placements.append((
+                strans,
+                records.int4s(records.XY, [
+                    round(affine[0][2] * scale),
+                    round(affine[1][2] * scale),
+                    ]),
+                b'',
+                ))
+        return placements
+
+def _yield_refs(name: str, placements: list[_Placement]) -> Iterator[bytes]:
+    """Yield an SREF or AREF for every placement of a structure."""
+    sname = records.string(records.SNAME, name)
+    sref = records.record(records.SREF)
+    aref = records.record(records.AREF)
+    endel = records.record(records.ENDEL)
+    for strans, xy, colrow in placements:
+        yield b''.join((
+            aref if colrow else sref,
+            sname,
+            strans,
+            colrow,
+            xy,
+            endel,
+            ))
+
+def _get_strans(matrix: 'rai.typing.Affine') -> bytes | None:
+    """
+    Convert the linear part of an affine matrix to GDSII records.
+
+    Returns
+    -------
+    bytes | None
+        The STRANS, MAG, and ANGLE records
+        (empty for an identity matrix),
+        or None if the matrix shears or scales non-uniformly
+        and therefore cannot be represented in GDSII.
+    """
+    a, b, _ = matrix[0]
+    c, d, _ = matrix[1]
+
+    scale_squared = a * a + c * c
+    if (
+            abs(scale_squared - b * b - d * d) > TOLERANCE * scale_squared
+            or abs(a * b + c * d) > TOLERANCE * scale_squared
+            ):
+        return None
+
+    # GDSII mirrors across the x axis, then magnifies, then rotates,
+    # so the matrix is rotation @ magnification @ ((1, 0), (0, -1))
+    # and its first column is the rotated and magnified x axis.
+    reflect = a * d - b * c < 0
+    magnification = sqrt(scale_squared)
+    angle = degrees(atan2(c, a)) % 360
+
+    scaled = abs(magnification - 1) > TOLERANCE
+    rotated = TOLERANCE < angle < 360 - TOLERANCE
+    if not (reflect or scaled or rotated):
+        return b''
+
+    parts = [records.bitarray(
+        records.STRANS,
+        records.STRANS_REFLECT if reflect else 0,
+        )]
+    if scaled:
+        parts.append(records.reals(records.MAG, magnification))
+    if rotated:
+        parts.append(records.reals(records.ANGLE, angle))
+    return b''.join(parts)
+
+def _get_layer_numbers(
+        compo: 'rai.typing.CompoLike',
+        layers: Mapping[str, LayerNumber],
+        ) -> dict[str, tuple[int, int]]:
+    """Get (layer number, datatype) of every layer in a compo."""
+    numbers = {
+        name: (number, 0) if isinstance(number, int) else number
+        for name, number in layers.items()
+        }
+    used = {number for number, _ in numbers.values()}
+
+    next_number = 1
+    for layer in _get_layers(compo, {}):
+        if layer in numbers:
+            continue
+        while next_number in used:
+            next_number += 1
+        numbers[layer] = (next_number, 0)
+        used.add(next_number)
+
+    return numbers
+
+# Placement of a structure without any transformation
+_IDENTITY_PLACEMENT: _Placement = (
+    b'',
+    records.int4s(records.XY, [0, 0]),
+    b'',
+    )
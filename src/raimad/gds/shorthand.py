@@ -0,0 +1,138 @@
+"""
+shorthand.py: defines `export_gds` and `stream_gds` functions.
+
+The `export_gds` and `stream_gds` functions are a more convenient way
+of exporting components to GDSII than using an exporter
+directly.
+"""
+
+from typing import Protocol, Any, Iterator, BinaryIO
+from pathlib import Path
+
+import raimad as rai
+
+class ExporterProto(Protocol):
+    """
+    Protocol for GDSII exporters.
+
+    This is the GDSII counterpart of `rai.cif.shorthand.ExporterProto`,
+    with a `gds_bytes` attribute in place of `cif_string`.
+    """
+
+    def __init__(
+            self,
+            compo: 'rai.typing.CompoLike',
+            *args: Any,
+            **kwargs: Any
+            ) -> None:
+        ...
+
+    gds_bytes: bytes
+
+class StreamingExporterProto(Protocol):
+    """
+    Protocol for GDSII exporters that can generate the file piece by piece.
+
+    In addition to the methods listed here,
+    the __init__ method must accept a `lazy` keyword argument
+    that, when set, prevents the exporter from generating
+    the file upfront.
+    """
+
+    def __init__(
+            self,
+            compo: 'rai.typing.CompoLike',
+            *args: Any,
+            **kwargs: Any
+            ) -> None:
+        ...
+
+    def yield_gds(self) -> Iterator[bytes]:
+        """Yield GDSII file piece by piece."""
+        ...
+
+def export_gds(
+        compo: 'rai.typing.CompoLike',
+        dest: rai.saveto.BinaryDestination = None,
+        exporter: type[ExporterProto] | None = None,
+        *args: Any,
+        **kwargs: Any,
+        ) -> bytes:
+    """
+    Export component to GDSII.
+
+    Parameters
+    ----------
+    compo: rai.typing.CompoLike
+        The compo or proxy to export
+
+    dest: str | Path | BinaryIO | None
+        A path to a file or an already open binary file
+        for saving the GDSII output.
+        If, instead of saving to disk, you want to have the GDSII file
+        as bytes, set `dest` to None (or leave unset)
+        and use this functions return value.
+
+    exporter: ExporterProto
+        The exporter to use.
+        Defaults to rai.gds.Reuse.
+
+    *args: Any
+        Additional arguments will be passed to the the Exporter's __init__.
+
+    **kwargs: Any
+        Additional keyword arguments will be passed
+        to the the Exporter's __init__.
+
+    Returns
+    -------
+        The generated GDSII file is always returned as bytes,
+        regardless of what `dest` is set to.
+    """
+    exporter_instance = (exporter or rai.gds.Reuse)(compo, *args, **kwargs)
+    gds_bytes = exporter_instance.gds_bytes
+
+    if dest is not None:
+        rai.saveto._saveto_binary_chunks((gds_bytes, ), dest)
+    return gds_bytes
+
+def stream_gds(
+        compo: 'rai.typing.CompoLike',
+        dest: str | Path | BinaryIO,
+        exporter: type[StreamingExporterProto] | None = None,
+        *args: Any,
+        **kwargs: Any,
+        ) -> None:
+    """
+    Export component to GDSII, writing it out while it is being generated.
+
+    Unlike `export_gds`, the file is never held in memory as a whole.
+
+    Parameters
+    ----------
+    compo: rai.typing.CompoLike
+        The compo or proxy to export
+
+    dest: str | Path | BinaryIO
+        A path to a file or an already open binary file
+        for saving the GDSII output.
+
+    exporter: StreamingExporterProto
+        The exporter to use.
+        Defaults to rai.gds.Reuse.
+
+    *args: Any
+        Additional arguments will be passed to the the Exporter's __init__.
+
+    **kwargs: Any
+        Additional keyword arguments will be passed
+        to the the Exporter's __init__.
+    """
+    exporter_instance = (exporter or rai.gds.Reuse)(
+        compo,
+        *args,
+        lazy=True,
+        **kwargs,
+        )
+
+    rai.saveto._saveto_binary_chunks(exporter_instance.yield_gds(), dest)
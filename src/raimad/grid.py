@@ -0,0 +1,119 @@
+"""
+grid.py: snapping geometry to a fixed database grid.
+
+By default, RAIMAD coordinates are floats from start to end,
+and the CIF exporters truncate them to integers
+only when the file is written.
+Two instances of the same compo may then be written
+with slightly different coordinates,
+since the float errors of their transforms differ.
+
+Setting `unit` to the size of the database grid
+(in RAIMAD units, i.e. micrometers, so `1e-3` for one nanometer)
+turns on grid mode:
+    - the geoms of every compo are snapped to the grid
+        right after `_make`,
+    - all transformed polygons are snapped to the grid again,
+        so moving a compo by a multiple of the grid,
+        rotating it by a multiple of 90 degrees, or flipping it
+        gives exactly the coordinates that integer arithmetic would,
+    - exporters round coordinates to the nearest integer
+        instead of truncating them,
+    - content hashes (and hence the build and fragment caches)
+        no longer see differences smaller than the grid.
+
+Coordinates remain floats, but every coordinate is an exact multiple
+of `unit`, so every consumer of geoms keeps working in micrometers.
+Set `unit` before building any compos;
+compos built before it is changed keep their old coordinates.
+"""
+
+from math import floor
+
+import raimad as rai
+from raimad.types import Poly, Polys, PolyS, PolysS
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy is optional, see `rai.affine.use_numpy`
+    pass
+
+# Size of the database grid in RAIMAD units,
+# or None to keep coordinates as they are
+unit: float | None = None
+
+def snap(value: float) -> float:
+    """Snap a coordinate to the grid (round half up)."""
+    assert unit is not None
+    return floor(value / unit + 0.5) * unit
+
+def snap_poly(poly: Poly) -> PolyS:
+    """Snap all vertices of a polygon to the grid."""
+    assert unit is not None
+    return [
+        (
+            floor(float(point[0]) / unit + 0.5) * unit,
+            floor(float(point[1]) / unit + 0.5) * unit,
+            )
+        for point in poly
+        ]
+
+def snap_polys(polys: Polys) -> PolysS:
+    """
+    Snap all vertices of some polygons to the grid.
+
+    If numpy is used (see `rai.affine.use_numpy`)
+    and there are enough vertices,
+    all vertices are snapped by numpy at once.
+    """
+    assert unit is not None
+    lengths = [len(poly) for poly in polys]
+    if (
+            not rai.affine.use_numpy
+            or sum(lengths) < rai.affine.NUMPY_MIN_VERTICES
+            ):
+        return [snap_poly(poly) for poly in polys]
+
+    vertices = np.array(
+        [point for poly in polys for point in poly],
+        dtype=np.float64,
+        )
+    return _split(snap_array(vertices), lengths)
+
+def snap_array(vertices: 'np.typing.NDArray[np.float64]') -> PolyS:
+    """
+    Snap an (N, 2) numpy array of vertices to the grid.
+
+    Returns
+    -------
+    PolyS
+        The snapped vertices as a list of tuples.
+    """
+    assert unit is not None
+    vertices = np.floor(vertices / unit + 0.5)
+    vertices *= unit
+    xs, ys = vertices.T.tolist()
+    return list(zip(xs, ys))
+
+def to_int(value: float) -> int:
+    """
+    Convert a scaled coordinate to an integer for writing to a file.
+
+    In grid mode, the coordinate is rounded to the nearest integer,
+    so that float errors cannot make two equal coordinates
+    end up one unit apart.
+    Otherwise, it is truncated, as the CIF exporters always have.
+    """
+    if unit is None:
+        return int(value)
+    return floor(value + 0.5)
+
+def _split(points: PolyS, lengths: list[int]) -> PolysS:
+    """Split a list of vertices into polygons with the given lengths."""
+    result = []
+    start = 0
+    for length in lengths:
+        result.append(points[start:start + length])
+        start += length
+    return result
@@ -1,10 +1,10 @@
 """helpers.py: misc helper functions."""
 
-from typing import Iterator, TypeVar, Generic, overload
+from typing import Iterable, Iterator, TypeVar, Generic, overload
 from types import NoneType
 import math
 import re
-from raimad.types import Vec2, Vec2S, Num
+from raimad.types import Vec2, Vec2S, PolyS, Num
 
 try:
     from typing import Self
@@ -23,6 +23,13 @@ semicircle = math.radians(180)
 demisemicircle = math.radians(90)
 hemidemisemicircle = math.radians(45)
 
+# Maximum distance between a true arc and the polygon approximating it,
+# in design units.
+# If this is not None, builtin compos with arcs (Circle, AnSec)
+# choose the number of points based on this tolerance
+# unless a number of points or a tolerance is passed to them explicitly.
+arc_tolerance: float | None = None
+
 def angle_between(p1: Vec2, p2: Vec2) -> float:
     """
     Calculate angle between two points.
@@ -371,6 +378,105 @@ def distance_between(
         p1[1] - p2[1],
         ))
 
+def arc_num_points(
+        radius: float,
+        angle: float,
+        tolerance: float,
+        min_points: int = 1,
+        ) -> int:
+    """
+    Calculate how many segments an arc needs to stay within a tolerance.
+
+    The distance between the middle of each segment
+    and the true arc (the sagitta) is
+    `radius * (1 - cos(step / 2))`,
+    where `step` is the angle spanned by one segment.
+    This function returns the smallest number of equal segments
+    for which this distance does not exceed `tolerance`.
+
+    Parameters
+    ----------
+    radius
+        Radius of the arc
+    angle
+        Angle spanned by the arc
+    tolerance
+        Maximum allowed distance between the arc and its segments,
+        in the same units as `radius`
+    min_points
+        The result is never lower than this number
+
+    Returns
+    -------
+    int
+        Number of segments to divide the arc into
+
+    Raises
+    ------
+    ValueError
+        If the tolerance is not positive
+    """
+    if tolerance <= 0:
+        raise ValueError(
+            f'Arc tolerance must be positive, got {tolerance}'
+            )
+
+    radius = abs(radius)
+    angle = abs(angle)
+    if radius == 0 or angle == 0:
+        return min_points
+
+    # A segment never spans more than half a circle,
+    # otherwise it would cut through the far side of the arc.
+    max_step = 2 * math.acos(max(1 - tolerance / radius, 0))
+    return max(min_points, math.ceil(angle / max_step - rai.epsilon))
+
+def convex_hull(points: Iterable[Vec2]) -> PolyS:
+    """
+    Calculate the convex hull of a set of points.
+
+    Uses Andrew's monotone chain algorithm.
+    Points that lie on an edge of the hull are not included.
+
+    Parameters
+    ----------
+    points
+        The points
+
+    Returns
+    -------
+    PolyS
+        The corners of the convex hull in counterclockwise order.
+        If all points lie on one line,
+        only the two outermost points are returned.
+    """
+    unique = sorted({(float(point[0]), float(point[1])) for point in points})
+    if len(unique) <= 2:
+        return unique
+
+    # A point is popped if it does not make a counterclockwise turn
+    # (i.e. if the cross product of the last two edges is not positive)
+    lower: PolyS = []
+    for x, y in unique:
+        while len(lower) >= 2:
+            (ox, oy), (ax, ay) = lower[-2], lower[-1]
+            if (ax - ox) * (y - oy) - (ay - oy) * (x - ox) > 0:
+                break
+            lower.pop()
+        lower.append((x, y))
+
+    upper: PolyS = []
+    for x, y in reversed(unique):
+        while len(upper) >= 2:
+            (ox, oy), (ax, ay) = upper[-2], upper[-1]
+            if (ax - ox) * (y - oy) - (ay - oy) * (x - ox) > 0:
+                break
+            upper.pop()
+        upper.append((x, y))
+
+    # The last point of each half is the first point of the other half
+    return lower[:-1] + upper[:-1]
+
 _IS_LNAME_VALID = re.compile(r'[A-Z0-9]{0,4}', re.ASCII)
 def is_lname_valid(name: str) -> bool:
     """Check that a CIF layer name is valid according to the 1980 spec."""
@@ -389,6 +495,11 @@ def vec2s(a: Vec2) -> Vec2S: ...
 
 def vec2s(a: float | Vec2, b: float | None = None) -> Vec2S:
     """Convert Vec2 to Vec2S."""
+    if isinstance(a, tuple) and len(a) == 2 and b is None:
+        # By far the most common case,
+        # and much cheaper than checking against the Vec2 protocol
+        return (float(a[0]), float(a[1]))
+
     if isinstance(a, float) and isinstance(b, float):
         return (float(a), float(b))
 
@@ -0,0 +1,325 @@
+"""
+packedpolys.py: compact storage for many polygons.
+
+A list of polygons stores every vertex as a tuple of two float objects,
+which takes more than 100 bytes per vertex.
+`PackedPolys` stores the same polygons as one flat array of coordinates
+and one array of offsets, which takes 16 bytes per vertex.
+
+`PackedPolys` can be put into the geoms of a compo
+in place of a list of polygons,
+and is accepted by every function that takes `Polys`.
+Steamrolling, transforming and exporting packed polygons
+works on the arrays directly, without making a tuple for every vertex,
+and the layers of the steamrolled geoms stay packed,
+see `rai.Compo.steamroll`.
+"""
+
+from array import array
+from itertools import pairwise
+from math import floor
+from typing import Any, Iterator, overload
+from collections.abc import Iterable, Sequence
+
+try:
+    from typing import Self
+except ImportError:
+    # py3.10 and lower
+    from typing_extensions import Self
+
+import raimad as rai
+from raimad.types import Poly, Polys, PolyS, Vec2S, Mat3S
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy is optional, see `rai.affine.use_numpy`
+    pass
+
+class PackedPolys(Sequence[PolyS]):
+    """
+    Polygons packed into flat arrays.
+
+    Attributes
+    ----------
+    coords
+        The coordinates of all vertices of all polygons,
+        as `x0, y0, x1, y1, ...`
+    offsets
+        The index of the first vertex of every polygon,
+        followed by the total number of vertices.
+
+    Indexing or iterating over packed polygons
+    gives every polygon as a new list of tuples,
+    so modifying such a polygon does not modify the packed polygons.
+    Use `append` and `extend` to add polygons,
+    rather than modifying `coords` and `offsets` directly,
+    so that the steamroll cache notices the change.
+
+    `coords` supports the buffer protocol,
+    and so do the packed polygons themselves on Python 3.12 and later.
+    While a buffer or a numpy view (see `to_array`) is alive,
+    no polygons can be added.
+    """
+
+    __slots__ = ('coords', 'offsets', '_version')
+
+    coords: 'array[float]'
+    offsets: 'array[int]'
+    # Incremented on every modification, see `Compo._get_steamroll_stamp`
+    _version: int
+
+    def __init__(self, polys: Polys = ()) -> None:
+        """
+        Pack polygons.
+
+        Parameters
+        ----------
+        polys
+            The polygons to pack
+        """
+        self.coords = array('d')
+        self.offsets = array('q', (0, ))
+        self._version = 0
+        self.extend(polys)
+
+    @classmethod
+    def from_arrays(cls, coords: Any, offsets: Any) -> Self:
+        """
+        Make packed polygons from flat coordinates and offsets.
+
+        Parameters
+        ----------
+        coords
+            The coordinates of all vertices, as `x0, y0, x1, y1, ...`
+        offsets
+            The index of the first vertex of every polygon,
+            followed by the total number of vertices
+
+        Returns
+        -------
+        Self
+            The packed polygons, with copies of `coords` and `offsets`
+
+        Raises
+        ------
+        ValueError
+            If the offsets do not start at zero,
+            decrease, or do not end at the number of vertices.
+        """
+        packed = cls()
+        packed.coords = array('d', coords)
+        packed.offsets = array('q', offsets)
+        if (
+                not packed.offsets
+                or packed.offsets[0] != 0
+                or packed.offsets[-1] * 2 != len(packed.coords)
+                or any(stop < start for start, stop in pairwise(packed.offsets))
+                ):
+            raise ValueError(
+                'Offsets must start at zero, never decrease, '
+                'and end at the number of vertices.'
+                )
+        return packed
+
+    def __len__(self) -> int:
+        """Get the number of polygons."""
+        return len(self.offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> PolyS:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> 'PackedPolys':
+        ...
+
+    def __getitem__(self, index: int | slice) -> 'PolyS | PackedPolys':
+        """Unpack a polygon, or get some of the polygons packed."""
+        if isinstance(index, slice):
+            sliced = PackedPolys()
+            for i in range(*index.indices(len(self))):
+                sliced._extend_coords(
+                    self.coords[self.offsets[i] * 2:self.offsets[i + 1] * 2]
+                    )
+            return sliced
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('PackedPolys index out of range')
+        return self._get_poly(self.offsets[index], self.offsets[index + 1])
+
+    def __setitem__(self, index: int, poly: Sequence[Any]) -> None:
+        """Replace a polygon."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('PackedPolys assignment index out of range')
+
+        start = self.offsets[index]
+        stop = self.offsets[index + 1]
+        self.coords[start * 2:stop * 2] = array(
+            'd',
+            [coord for point in poly for coord in (point[0], point[1])],
+            )
+
+        shift = len(poly) - (stop - start)
+        if shift:
+            for i in range(index + 1, len(self.offsets)):
+                self.offsets[i] += shift
+        self._version += 1
+
+    def __iter__(self) -> Iterator[PolyS]:
+        """Unpack the polygons one by one."""
+        for start, stop in pairwise(self.offsets):
+            yield self._get_poly(start, stop)
+
+    def _get_poly(self, start: int, stop: int) -> PolyS:
+        """Unpack the polygon made of vertices `start` to `stop`."""
+        return list(zip(
+            self.coords[start * 2:stop * 2:2],
+            self.coords[start * 2 + 1:stop * 2:2],
+            ))
+
+    def __eq__(self, other: object) -> bool:
+        """Compare with other packed polygons or a list of polygons."""
+        if isinstance(other, PackedPolys):
+            return self.offsets == other.offsets and self.coords == other.coords
+        if isinstance(other, list):
+            return len(self) == len(other) and all(
+                mine == theirs
+                for mine, theirs in zip(self, other)
+                )
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        """Show the polygons as a list."""
+        return f'PackedPolys({list(self)!r})'
+
+    def __buffer__(self, flags: int) -> memoryview:
+        """Get a buffer of `coords` (Python 3.12 and later)."""
+        return memoryview(self.coords)
+
+    def append(self, poly: Sequence[Any]) -> None:
+        """
+        Add a polygon.
+
+        Parameters
+        ----------
+        poly
+            The polygon to add
+        """
+        self._extend_coords(
+            [coord for point in poly for coord in (point[0], point[1])]
+            )
+
+    def extend(self, polys: Iterable[Poly]) -> None:
+        """
+        Add polygons.
+
+        Parameters
+        ----------
+        polys
+            The polygons to add.
+            If they are packed polygons,
+            their arrays are copied as they are.
+        """
+        if not isinstance(polys, PackedPolys):
+            for poly in polys:
+                self.append(poly)
+            return
+
+        base = self.offsets[-1]
+        # Slicing copies, so packed polygons can be extended with themselves
+        offsets = polys.offsets[1:]
+        self.coords.extend(polys.coords)
+        self.offsets.extend(array('q', [offset + base for offset in offsets]))
+        self._version += 1
+
+    def _extend_coords(self, coords: Any) -> None:
+        """Add a polygon given as flat coordinates."""
+        self.coords.extend(coords)
+        self.offsets.append(len(self.coords) // 2)
+        self._version += 1
+
+    def copy(self) -> 'PackedPolys':
+        """Return a copy of these packed polygons."""
+        copied = PackedPolys()
+        copied.coords = self.coords[:]
+        copied.offsets = self.offsets[:]
+        return copied
+
+    @property
+    def num_vertices(self) -> int:
+        """The total number of vertices in all polygons."""
+        return self.offsets[-1]
+
+    def lengths(self) -> list[int]:
+        """Return the number of vertices in every polygon."""
+        return [stop - start for start, stop in pairwise(self.offsets)]
+
+    def points(self) -> Iterator[Vec2S]:
+        """Iterate over the vertices of all polygons."""
+        return zip(self.coords[0::2], self.coords[1::2])
+
+    def to_array(self) -> Any:
+        """
+        Get a numpy view of all vertices.
+
+        Returns
+        -------
+        numpy.ndarray
+            An (N, 2) array of all vertices of all polygons.
+            It shares memory with `coords`, so it is made without copying,
+            but no polygons can be added for as long as it is alive.
+        """
+        return np.frombuffer(self.coords, dtype=np.float64).reshape(-1, 2)
+
+    def transformed(self, matrix: Mat3S) -> 'PackedPolys':
+        """
+        Apply an affine transformation to all polygons.
+
+        If numpy is used (see `rai.affine.use_numpy`)
+        and there are enough vertices,
+        all vertices are transformed by numpy at once.
+        In grid mode (see `rai.grid`),
+        the result is snapped to the grid.
+
+        Parameters
+        ----------
+        matrix
+            The affine matrix to apply
+
+        Returns
+        -------
+        PackedPolys
+            The transformed polygons
+        """
+        unit = rai.grid.unit
+        transformed = PackedPolys()
+        transformed.offsets = self.offsets[:]
+
+        if (
+                rai.affine.use_numpy
+                and self.num_vertices >= rai.affine.NUMPY_MIN_VERTICES
+                ):
+            vertices = rai.affine.transform_array(matrix, self.to_array())
+            transformed.coords = array('d', vertices.tobytes())
+            return transformed
+
+        (xx, xy, x0), (yx, yy, y0), _ = matrix
+        xs = self.coords[0::2]
+        ys = self.coords[1::2]
+        new_xs = [xx * x + xy * y + x0 for x, y in zip(xs, ys)]
+        new_ys = [yx * x + yy * y + y0 for x, y in zip(xs, ys)]
+        if unit is not None:
+            new_xs = [floor(x / unit + 0.5) * unit for x in new_xs]
+            new_ys = [floor(y / unit + 0.5) * unit for y in new_ys]
+
+        coords = transformed.coords = array('d', self.coords)
+        coords[0::2] = array('d', new_xs)
+        coords[1::2] = array('d', new_ys)
+        return transformed
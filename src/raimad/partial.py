@@ -18,6 +18,9 @@ class Partial:
     as well as any options passed to __call__.
     The options passed to __call__ take precedence
     over the held options.
+    If `rai.compocache.cache_partials` is True,
+    the Compo is taken from `rai.compocache.compo_cache`
+    (see `Compo.cached`).
     """
 
     compo_cls: 'rai.typing.CompoType'
@@ -35,5 +38,18 @@ class Partial:
         """Finish creating the partially created Compo."""
         kwargs2 = copy(self.kwargs)
         kwargs2.update(kwargs)
+        if rai.compocache.cache_partials:
+            return self.compo_cls.cached(**kwargs2)
         return self.compo_cls(**kwargs2)
 
+    def lazy(self, **kwargs: Any) -> 'rai.typing.Compo':
+        """
+        Create the Compo without building it yet.
+
+        The options are merged like in `__call__`,
+        see `Compo.lazy`.
+        """
+        kwargs2 = copy(self.kwargs)
+        kwargs2.update(kwargs)
+        return self.compo_cls.lazy(**kwargs2)
+
@@ -1,6 +1,6 @@
 """proxy.py: home to Proxy class and supporting classes."""
 
-from typing import Iterator, overload
+from typing import Any, Iterator, overload
 
 try:
     from typing import Self
@@ -9,10 +9,19 @@ except ImportError:
     from typing_extensions import Self
 
 from copy import copy
+from hashlib import blake2b
 
 import raimad as rai
-from raimad.types import Vec2, Vec2S, GeomsS, Num
-from raimad.compo import InvalidLayerNameError
+from raimad.types import Vec2, Vec2S, PolyS, Geoms, PackableGeomsS, Num
+from raimad.compo import (
+    InvalidLayerNameError,
+    _steamroll_into,
+    _steamroll_arrays,
+    _hulls_into,
+    _walk,
+    _hash_str,
+    _hash_floats,
+    )
 
 class LMap:
     """
@@ -42,6 +51,8 @@ class LMap:
     TODO explain edgecases.
     """
 
+    __slots__ = ('shorthand', )
+
     def __init__(self, shorthand: 'rai.typing.LMapShorthand') -> None:
         self.shorthand = shorthand
 
@@ -79,9 +90,20 @@ class LMap:
     # TODO hacky
     # also TODO docstring
 
+    def _get_stamp(self) -> Any:
+        """Get a hashable snapshot of this lmap for cache invalidation."""
+        if isinstance(self.shorthand, dict):
+            return tuple(self.shorthand.items())
+        return self.shorthand
+
     def copy(self) -> Self:
-        """Copy this lmap."""
-        return type(self)(self.shorthand)
+        """
+        Copy this lmap.
+
+        A dict shorthand is copied too,
+        since `compose` modifies it in-place.
+        """
+        return type(self)(copy(self.shorthand))
 
     def compose(self, other: Self) -> Self:
         """
@@ -188,6 +210,18 @@ class Proxy:
     TODO description here.
     """
 
+    # Layouts may contain millions of proxies,
+    # so they do not get a `__dict__`.
+    __slots__ = (
+        '_cif_linked',
+        '_cif_link',
+        'autogenned',
+        'deepcopied',
+        'compo',
+        'lmap',
+        'transform',
+        )
+
     compo: 'rai.typing.CompoLike'
 
     def __init__(self,
@@ -230,13 +264,13 @@ class Proxy:
     def _experimental_lname_transformers(self) -> rai.types.LNameTransformers:
         return self.compo._experimental_lname_transformers
 
-    def steamroll(self) -> GeomsS:
+    def steamroll(self) -> PackableGeomsS:
         """
         Get all geometries of this proxy.
 
         Returns
         -------
-        GeomsS
+        PackableGeomsS
             Returns all geometries
             (i.e. all raw geometries as well as subcompos)
             of the CompoLike pointed to by this proxy,
@@ -244,15 +278,116 @@ class Proxy:
 
         TODO example
         """
-        return {
-            mapped_layer: [
+        # Make sure the compo at the bottom of the proxy tower
+        # has an up-to-date steamroll cache...
+        self.final()._steamroll()
+
+        # ... and apply all of the transforms and lmaps
+        # of the tower to it in one go
+        steamrolled: PackableGeomsS = {}
+        _steamroll_into(steamrolled, self)
+        return steamrolled
+
+    def steamroll_arrays(self) -> dict[str, 'rai.PackedPolys']:
+        """
+        Get all geometries of this proxy as packed polygons.
+
+        Returns
+        -------
+        dict[str, rai.PackedPolys]
+            The packed polygons of every layer,
+            as seen through this proxy.
+            See `rai.Compo.steamroll_arrays`.
+        """
+        self.final()._steamroll()
+        return _steamroll_arrays(self)
+
+    def _map_geoms(self, geoms: Geoms) -> PackableGeomsS:
+        """Apply the lmap and transform of this proxy to geoms."""
+        mapped: PackableGeomsS = {}
+        for layer, layer_geoms in geoms.items():
+            mapped_layer = self.lmap[layer]
+
+            # If a layer has been LMapp'ed to None,
+            # that means the user wants it discarded. Skip.
+            if mapped_layer is None:
+                continue
+
+            # Multiple layers may be mapped to the same layer,
+            # so extend instead of overwriting
+            # Packed polys stay packed, see `rai.PackedPolys`
+            if isinstance(layer_geoms, rai.PackedPolys):
+                if mapped_layer not in mapped.keys():
+                    mapped[mapped_layer] = rai.PackedPolys()
+                mapped[mapped_layer].extend(
+                    layer_geoms.transformed(self.transform._affine)
+                    )
+                continue
+
+            if mapped_layer not in mapped.keys():
+                mapped[mapped_layer] = []
+            mapped[mapped_layer].extend(
                 self.transform.transform_poly(geom)
-                for geom in geoms
-                ]
-            for layer, geoms
-            in self.compo.steamroll().items()
-            if (mapped_layer := self.lmap[layer]) is not None
-            }
+                for geom in layer_geoms
+                )
+        return mapped
+
+    def _get_steamroll_stamp(
+            self,
+            memo: dict[int, Any] | None = None,
+            footprints: bool = False,
+            ) -> Any:
+        """
+        Get a stamp that identifies the steamrolled geometry of this proxy.
+
+        See `Compo._get_steamroll_stamp`.
+        """
+        return (
+            self.transform._get_matrix(),
+            self.lmap._get_stamp(),
+            self.compo._get_steamroll_stamp(memo, footprints),
+            )
+
+    def content_hash(self) -> str:
+        """
+        Get a hash of the contents of this proxy.
+
+        The hash is computed from the transform and lmap of this proxy
+        and the hash of the CompoLike it points to.
+        See `Compo.content_hash`.
+
+        Returns
+        -------
+        str
+            The hash as a string of hex digits
+        """
+        return self._get_content_hash({}, {})
+
+    def _get_content_hash(
+            self,
+            memo: dict[int, Any],
+            hashes: dict[int, str],
+            ) -> str:
+        """
+        Get the content hash of this proxy, see `content_hash`.
+
+        See `Compo._get_content_hash` for the parameters.
+        """
+        hasher = blake2b(b'proxy', digest_size=16)
+        _hash_floats(hasher, self.transform._get_matrix())
+
+        shorthand = self.lmap.shorthand
+        _hash_str(
+            hasher,
+            repr(
+                sorted(shorthand.items(), key=lambda item: item[0])
+                if isinstance(shorthand, dict)
+                else shorthand
+                ),
+            )
+
+        hasher.update(self.compo._get_content_hash(memo, hashes).encode())
+        return hasher.hexdigest()
 
     def get_flat_transform(self, maxdepth: int = -1) -> 'rai.typing.Transform':
         """
@@ -272,14 +407,13 @@ class Proxy:
         if maxdepth == 0 or isinstance(self.compo, rai.Compo):
             return self.transform.copy()
 
-        # return (
-        #     self.compo.get_flat_transform(maxdepth - 1)
-        #     .compose(self.transform)
-        #     )
-
-        # TODO huh? copy?
-        return self.transform.copy().compose(
+        # The proxies lower in the tower are applied first,
+        # so this proxy's transform goes on top.
+        # `get_flat_transform` of the lower proxy already returns
+        # a fresh transform, so it is safe to compose in-place.
+        return (
             self.compo.get_flat_transform(maxdepth - 1)
+            .compose(self.transform)
             )
 
     def get_flat_lmap(self, maxdepth: int = -1) -> LMap:
@@ -300,32 +434,25 @@ class Proxy:
         if maxdepth == 0 or isinstance(self.compo, rai.Compo):
             return self.lmap.copy()
 
-        return self.lmap.copy().compose(
+        return (
             self.compo.get_flat_lmap(maxdepth - 1)
+            .compose(self.lmap)
             )
 
     @property
-    def geoms(self) -> GeomsS:
+    def geoms(self) -> PackableGeomsS:
         """
         Get the raw geometries as seen through this proxy.
 
         Returns
         -------
-        GeomsS
+        PackableGeomsS
             Returns the raw geometries
             (i.e. NOT geometries defined in subcompos)
             defined in the CompoLike pointed to by this Proxy,
             as seen through this proxy.
         """
-        return {
-            target_layer: [
-                self.transform.transform_poly(geom)
-                for geom in geoms
-                ]
-            for layer, geoms
-            in self.compo.geoms.items()
-            if (target_layer := self.lmap[layer]) is not None
-            }
+        return self._map_geoms(self.compo.geoms)
 
     @property
     def subcompos(self) -> rai.SubcompoContainer:
@@ -469,6 +596,38 @@ class Proxy:
         """
         return rai.Proxy(self)
 
+    def array(
+            self,
+            num_x: int,
+            num_y: int,
+            step_x: Num,
+            step_y: Num,
+            ) -> 'rai.typing.ArrayProxy':
+        """
+        Return a new array proxy that places this proxy on a grid.
+
+        Parameters
+        ----------
+        num_x
+            Number of columns
+        num_y
+            Number of rows
+        step_x
+            Distance between columns
+        step_y
+            Distance between rows
+
+        Returns
+        -------
+        rai.typing.ArrayProxy
+            The new array proxy
+
+        SeeAlso
+        -------
+        raimad.ArrayProxy
+        """
+        return rai.ArrayProxy(self, num_x, num_y, (step_x, 0), (0, step_y))
+
     def walk_hier(self) -> 'Iterator[rai.typing.Proxy]':
         """
         Traverse the subcomponent hierarchy of the CompoLike of this proxy.
@@ -494,6 +653,25 @@ class Proxy:
         for subcompo in self.compo.walk_hier():
             yield self.deep_copy_reassign(subcompo, _autogenned=True)
 
+    def walk(self) -> 'Iterator[rai.typing.HierNode]':
+        """
+        Traverse the subcompo hierarchy without copying any proxies.
+
+        The transform and lmap of this proxy tower
+        are included in the affine and lmap of every node.
+
+        Yields
+        ------
+        rai.typing.HierNode
+            A `(path, compo, affine, lmap)` tuple for every compo
+            in the hierarchy, see `Compo.walk`.
+
+        SeeAlso
+        -------
+        raimad.Compo.walk
+        """
+        return _walk(self, (), None, ())
+
     def shallow_copy(
             self,
             _autogenned: bool = False,
@@ -896,9 +1074,12 @@ class Proxy:
         TODO doc page link
         """
         bbox = rai.BoundBBox(proxy=self)
-        for geoms in self.steamroll().values():
-            for geom in geoms:
-                bbox.add_poly(geom)
+        hulls: dict[str, list[PolyS]] = {}
+        footprints: list[PolyS] = []
+        _hulls_into(hulls, footprints, self, {})
+        for layer_hulls in (*hulls.values(), footprints):
+            for hull in layer_hulls:
+                bbox.add_poly(hull)
         return bbox
 
     # snapping functions #
@@ -26,4 +26,5 @@ class RectLW(rai.Compo):
                     ]
                 ]
             })
+        self._set_primitive('B', (length, width))
 
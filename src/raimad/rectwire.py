@@ -65,6 +65,7 @@ class RectWire(rai.Compo):
                     ]
                 ]
             })
+        self._set_primitive('W', (width, *p1, *p2))
 
     @classmethod
     def from_points(
@@ -1,8 +1,8 @@
 """saveto.py: helper for saving string to path, open file, or stream."""
 
-from typing import TypeAlias
+from typing import TypeAlias, Iterable
 from pathlib import Path
-from typing import TextIO
+from typing import TextIO, BinaryIO
 
 class InvalidDestinationError(ValueError):
     """Error raised by `_saveto` helper when `dest` is set incorrectly."""
@@ -12,20 +12,53 @@ class InvalidDestinationError(ValueError):
 # not handled (e.g. bytes)
 
 Destination: TypeAlias = str | Path | TextIO | None
+BinaryDestination: TypeAlias = str | Path | BinaryIO | None
 
 def _saveto(string: str, dest: Destination = None) -> str:
     if dest is None:
         pass
-    elif isinstance(dest, (str, Path)):
+    else:
+        _saveto_chunks((string, ), dest)
+
+    return string
+
+def _saveto_chunks(
+        chunks: Iterable[str],
+        dest: str | Path | TextIO,
+        ) -> None:
+    """
+    Save strings to path, open file, or stream one by one.
+
+    Every chunk is written as soon as it is produced,
+    so `chunks` can be a generator
+    whose output would not fit in memory all at once.
+    """
+    if isinstance(dest, (str, Path)):
         with open(dest, 'w') as file:
-            file.write(string)
+            file.writelines(chunks)
     elif hasattr(dest, 'write'):
-        dest.write(string)
+        for chunk in chunks:
+            dest.write(chunk)
     else:
         raise InvalidDestinationError(
             f"Invalid destination type {type(dest)}. "
             "Must be a file path or a file-like stream."
             )
 
-    return string
 
+def _saveto_binary_chunks(
+        chunks: Iterable[bytes],
+        dest: str | Path | BinaryIO,
+        ) -> None:
+    """Save bytes to path, open binary file, or stream one by one."""
+    if isinstance(dest, (str, Path)):
+        with open(dest, 'wb') as file:
+            file.writelines(chunks)
+    elif hasattr(dest, 'write'):
+        for chunk in chunks:
+            dest.write(chunk)
+    else:
+        raise InvalidDestinationError(
+            f"Invalid destination type {type(dest)}. "
+            "Must be a file path or a file-like stream."
+            )
@@ -184,7 +184,7 @@ def show(
         return
 
     file = Path(tempfile.gettempdir()) / "RAIMAD-SHOW.cif"
-    rai.export_cif(compo, file)
+    rai.stream_cif(compo, file)
     print(f"Saved to {file}")
 
     if not ignore_running and _is_klayout_running():
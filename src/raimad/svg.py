@@ -1,8 +1,10 @@
 """svg.py: tools for rendering compos as svg pictures."""
 
-from typing import Iterator
+from itertools import pairwise
+from typing import Iterator, Sequence
 
 import raimad as rai
+from raimad.types import NumS, PackablePolysS
 
 def export_svg(compo: 'rai.typing.CompoLike') -> str:
     """
@@ -53,7 +55,7 @@ def yield_svg(compo: 'rai.typing.CompoLike') -> Iterator[str]:
         )
 
     for layer_name, layer_geoms in compo.steamroll().items():
-        for geom in layer_geoms:
+        for coords in _yield_coords(layer_geoms):
             yield (
                 '<polygon '
                 'fill="#00000000" '
@@ -62,10 +64,25 @@ def yield_svg(compo: 'rai.typing.CompoLike') -> Iterator[str]:
                 'points="'
                 )
 
-            for point in geom:
-                yield f'{point[0]},{point[1]} '
+            for i in range(0, len(coords), 2):
+                yield f'{coords[i]},{coords[i + 1]} '
 
             yield '" />\n'
 
     yield '</g></g></svg>\n'
 
+def _yield_coords(polys: PackablePolysS) -> Iterator[Sequence[NumS]]:
+    """
+    Yield the coordinates of every polygon as `x0, y0, x1, y1, ...`.
+
+    The coordinates of packed polygons (see `rai.PackedPolys`)
+    are sliced out of their array, without unpacking the vertices.
+    """
+    if isinstance(polys, rai.PackedPolys):
+        for start, stop in pairwise(polys.offsets):
+            yield polys.coords[start * 2:stop * 2]
+        return
+
+    for poly in polys:
+        yield [coord for point in poly for coord in point]
+
@@ -0,0 +1,324 @@
+"""
+sweep.py: build many variants of a compo.
+
+A sweep builds one variant of a compo for every set of options
+in a list of variants,
+which is usually made with `cartesian` or `zipped`.
+The variants can be built in worker processes,
+laid out in a grid with `SweepGrid`,
+or written to a file each with `export_each`.
+
+When more than one worker is used,
+the variants are sent back from the workers
+in the format of the disk cache (see `rai.DiskCache`),
+so the compo classes must be importable
+and their source code must be available.
+"""
+
+from typing import Any, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product, repeat
+from math import ceil, sqrt
+import inspect
+import os
+import re
+
+import raimad as rai
+
+Variant = Mapping[str, Any]
+
+class UnknownOptionError(TypeError):
+    """A variant of a sweep sets an option that the compo does not have."""
+
+def cartesian(**values: Iterable[Any]) -> list[dict[str, Any]]:
+    """
+    Make a variant for every combination of option values.
+
+    Parameters
+    ----------
+    **values
+        The values to sweep every option over
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        One dict of options per variant.
+        The last option changes fastest.
+
+    Examples
+    --------
+    >>> rai.sweep.cartesian(length=[1, 2], width=[3, 4])
+    [{'length': 1, 'width': 3}, {'length': 1, 'width': 4}, \
+{'length': 2, 'width': 3}, {'length': 2, 'width': 4}]
+    """
+    return [
+        dict(zip(values.keys(), combination))
+        for combination in product(*values.values())
+        ]
+
+def zipped(**values: Sequence[Any]) -> list[dict[str, Any]]:
+    """
+    Make a variant for every position in the lists of option values.
+
+    Parameters
+    ----------
+    **values
+        The values to sweep every option over.
+        All of them must have the same length.
+
+    Returns
+    -------
+    list[dict[str, Any]]
+        One dict of options per variant
+
+    Raises
+    ------
+    ValueError
+        If the lists of values do not all have the same length.
+
+    Examples
+    --------
+    >>> rai.sweep.zipped(length=[1, 2], width=[3, 4])
+    [{'length': 1, 'width': 3}, {'length': 2, 'width': 4}]
+    """
+    if len({len(option_values) for option_values in values.values()}) > 1:
+        raise ValueError(
+            'All options of a zipped sweep must have the same number of values.'
+            )
+    return [
+        dict(zip(values.keys(), combination))
+        for combination in zip(*values.values())
+        ]
+
+def label(variant: Variant) -> str:
+    """
+    Make a name for a variant that can be used as a file name.
+
+    Parameters
+    ----------
+    variant
+        The options of the variant
+
+    Returns
+    -------
+    str
+        The options as `key=value` joined by underscores,
+        with characters that do not belong in file names replaced,
+        or `default` if the variant sets no options.
+    """
+    if not variant:
+        return 'default'
+    return re.sub(
+        r'[^\w.=+-]',
+        '_',
+        '_'.join(f'{key}={value}' for key, value in variant.items()),
+        )
+
+def build(
+        compo_cls: 'rai.typing.CompoTypeLike',
+        variants: Sequence[Variant],
+        workers: int = 1,
+        ) -> list['rai.typing.Compo']:
+    """
+    Build a compo for every variant.
+
+    Parameters
+    ----------
+    compo_cls
+        The compo class or Partial to build
+    variants
+        The options of every variant
+    workers
+        Number of worker processes to build the variants in.
+        Use 0 for one worker per CPU.
+        With 1, the variants are built in this process.
+
+    Returns
+    -------
+    list[rai.typing.Compo]
+        The compo of every variant, in the same order
+
+    Raises
+    ------
+    UnknownOptionError
+        If a variant sets an option that the compo does not have.
+    """
+    _check_options(compo_cls, variants)
+    return [
+        rai.diskcache._load(compo) if isinstance(compo, bytes) else compo
+        for compo in _map(_build_variant, compo_cls, variants, workers)
+        ]
+
+def export_each(
+        compo_cls: 'rai.typing.CompoTypeLike',
+        variants: Sequence[Variant],
+        path: str,
+        workers: int = 1,
+        ) -> list[str]:
+    """
+    Build every variant and export it to its own file.
+
+    Every variant is built and exported by the same worker,
+    so compos are never sent between processes.
+
+    Parameters
+    ----------
+    compo_cls
+        The compo class or Partial to build
+    variants
+        The options of every variant
+    path
+        Path of the files.
+        `{variant}` is replaced with the label of every variant
+        (see `label`).
+        Files ending in `.gds` are written as GDSII,
+        all others as CIF.
+    workers
+        Number of worker processes, see `build`
+
+    Returns
+    -------
+    list[str]
+        The path of the file of every variant, in the same order
+
+    Raises
+    ------
+    UnknownOptionError
+        If a variant sets an option that the compo does not have.
+    ValueError
+        If `path` does not contain `{variant}`,
+        or if two variants have the same label.
+    """
+    if '{variant}' not in path:
+        raise ValueError('The path must contain `{variant}`.')
+    _check_options(compo_cls, variants)
+
+    paths = [path.replace('{variant}', label(variant)) for variant in variants]
+    if len(set(paths)) != len(paths):
+        raise ValueError('Two variants would be written to the same file.')
+
+    return list(_map(
+        _export_variant,
+        compo_cls,
+        list(zip(variants, paths)),
+        workers,
+        ))
+
+class SweepGrid(rai.Compo):
+    """
+    Variants of a compo laid out in a grid.
+
+    Every variant is placed in its own cell of the grid,
+    centered on the cell,
+    and added as a subcompo named after its label (see `label`).
+    The cells are as large as the largest variant plus `spacing`.
+    Variants are placed row by row, starting at the top left.
+    """
+
+    class Options:
+        compo_cls = rai.Option.Functional('Compo class or Partial to sweep')
+        variants = rai.Option.Functional('Options of every variant')
+        columns = rai.Option.Geometric(
+            'Number of columns, or None for a square grid'
+            )
+        spacing = rai.Option.Geometric('Space between the cells')
+        workers = rai.Option.Environmental(
+            'Number of worker processes to build the variants in'
+            )
+
+    def _make(
+            self,
+            compo_cls: 'rai.typing.CompoTypeLike',
+            variants: Sequence[Variant],
+            columns: int | None = None,
+            spacing: float = 10,
+            workers: int = 1,
+            ) -> None:
+        labels = [label(variant) for variant in variants]
+        if len(set(labels)) != len(labels):
+            raise ValueError('Two variants have the same label.')
+
+        compos = build(compo_cls, variants, workers)
+        if not compos:
+            return
+
+        bboxes = [compo.bbox for compo in compos]
+        pitch_x = max(bbox.length for bbox in bboxes) + spacing
+        pitch_y = max(bbox.width for bbox in bboxes) + spacing
+        if columns is None:
+            columns = ceil(sqrt(len(compos)))
+
+        for index, (variant_label, compo) in enumerate(zip(labels, compos)):
+            row, column = divmod(index, columns)
+            proxy = compo.proxy()
+            proxy.bbox.mid.to((column * pitch_x, -row * pitch_y))
+            self.subcompos[variant_label] = proxy
+
+def _check_options(
+        compo_cls: 'rai.typing.CompoTypeLike',
+        variants: Sequence[Variant],
+        ) -> None:
+    """Raise UnknownOptionError if a variant sets an unknown option."""
+    cls = compo_cls.compo_cls if isinstance(compo_cls, rai.Partial) else compo_cls
+    # Not every option is annotated in `Options`,
+    # so the parameters of `_make` are checked instead
+    params = dict(inspect.signature(cls._make).parameters)
+    params.pop('self', None)
+    if any(param.kind is param.VAR_KEYWORD for param in params.values()):
+        return
+
+    for variant in variants:
+        for key in variant.keys():
+            if key not in params:
+                raise UnknownOptionError(
+                    f'`{cls.__name__}` has no option `{key}`. '
+                    f'Its options are: {", ".join(params)}.'
+                    )
+
+def _map(
+        function: Any,
+        compo_cls: 'rai.typing.CompoTypeLike',
+        items: Sequence[Any],
+        workers: int,
+        ) -> Iterator[Any]:
+    """Call `function(compo_cls, item, workers > 1)` for every item."""
+    workers = (os.cpu_count() or 1) if workers == 0 else workers
+    if workers <= 1 or len(items) <= 1:
+        yield from map(function, repeat(compo_cls), items, repeat(False))
+        return
+
+    with ProcessPoolExecutor(min(workers, len(items))) as pool:
+        yield from pool.map(
+            function,
+            repeat(compo_cls),
+            items,
+            repeat(True),
+            # Fewer, larger tasks for workers to pick up,
+            # but still enough to keep all of them busy
+            chunksize=max(1, len(items) // (workers * 4)),
+            )
+
+def _build_variant(
+        compo_cls: 'rai.typing.CompoTypeLike',
+        variant: Variant,
+        in_worker: bool,
+        ) -> Any:
+    """Build a variant; serialize it if running in a worker."""
+    compo = compo_cls(**variant)
+    if in_worker:
+        return rai.diskcache._dump(compo)
+    return compo
+
+def _export_variant(
+        compo_cls: 'rai.typing.CompoTypeLike',
+        variant_path: tuple[Variant, str],
+        in_worker: bool,
+        ) -> str:
+    """Build a variant and export it to a file."""
+    variant, path = variant_path
+    compo = compo_cls(**variant)
+    if path.endswith('.gds'):
+        rai.stream_gds(compo, path)
+    else:
+        rai.stream_cif(compo, path)
+    return path
@@ -3,11 +3,11 @@ transform.py: home to Transform class.
 
 See the docstring of Transform for more information.
 """
-from typing import overload
+from typing import overload, TypeAlias
 from types import NoneType
 from math import degrees
 
-from copy import deepcopy
+from copy import copy
 
 try:
     from typing import Self
@@ -18,6 +18,20 @@ except ImportError:
 import raimad as rai
 from raimad.types import Vec2, Vec2S, PolyS, Num, NumS, Poly
 
+# Pending operations of a Transform are fused
+# as soon as there are this many of them,
+# so that a transform that is edited often but never read
+# does not grow indefinitely.
+MAX_PENDING = 64
+
+# The top two rows of an affine matrix, flattened.
+# The bottom row is always (0, 0, 1), so there is no need to store it.
+FlatAffine: TypeAlias = tuple[NumS, NumS, NumS, NumS, NumS, NumS]
+
+# Shared by all transforms that have not been edited
+IDENTITY: FlatAffine = (1, 0, 0, 0, 1, 0)
+_IDENTITY_AFFINE = ((1, 0, 0), (0, 1, 0), (0, 0, 1))
+
 class EditingArgumentError(TypeError):
     """Invalid arguments are passed to "automatic" functions like *.move."""
 
@@ -26,14 +40,118 @@ class EditingArgumentError(TypeError):
 
 
 class Transform:
-    """Transformation: container for affine matrix."""
-
-    _affine: 'rai.typing.Affine'
+    """
+    Transformation: container for affine matrix.
+
+    Editing methods (`move`, `rotate`, `scale`, and so on)
+    do not multiply matrices right away.
+    Instead, they append the operation to a list of pending operations,
+    which are all fused into the matrix at once
+    the next time the matrix is read through `_affine`.
+
+    Layouts may contain millions of transforms,
+    so the matrix is stored as a flat tuple of six numbers,
+    and the list of pending operations only exists
+    while there are pending operations.
+    """
+
+    __slots__ = ('_matrix', '_pending')
+
+    # All operations that have already been fused
+    _matrix: FlatAffine
+    # Operations that are yet to be applied on top of `_matrix`,
+    # in the order they were applied, or None if there are none.
+    # A translation is stored as an (x, y) tuple,
+    # any other operation as an affine matrix.
+    _pending: 'list[Vec2S | rai.typing.Affine] | None'
 
     def __init__(self) -> None:
         """Initialize a new Transform as an identity transform."""
         self.reset()
 
+    @property
+    def _affine(self) -> 'rai.typing.Affine':
+        """
+        Get the affine matrix of this transform.
+
+        Pending operations are fused into the matrix first.
+        The nested matrix is built anew on every read
+        (except for the identity matrix, which is shared),
+        so code that walks large hierarchies should use
+        `_get_matrix` or `_compose_onto` instead.
+        """
+        if self._pending is not None:
+            self._flush()
+        if self._matrix is IDENTITY:
+            return _IDENTITY_AFFINE
+        a, b, c, d, e, f = self._matrix
+        return (
+            (a, b, c),
+            (d, e, f),
+            (0, 0, 1),
+            )
+
+    @_affine.setter
+    def _affine(self, matrix: 'rai.typing.Affine') -> None:
+        (a, b, c), (d, e, f), _ = matrix
+        self._matrix = (a, b, c, d, e, f)
+        self._pending = None
+
+    def _get_matrix(self) -> FlatAffine:
+        """
+        Get the flattened matrix of this transform.
+
+        Pending operations are fused into the matrix first.
+        As long as the transform is not edited,
+        the exact same tuple is returned every time,
+        so matrices can be compared by identity.
+        """
+        if self._pending is not None:
+            self._flush()
+        return self._matrix
+
+    def _compose_onto(
+            self,
+            matrix: 'rai.typing.Affine | None',
+            ) -> 'rai.typing.Affine':
+        """
+        Apply `matrix` after this transform.
+
+        Same as `rai.affine.matmul(matrix, self._affine)`,
+        or `self._affine` if `matrix` is None,
+        but computed straight from the flattened matrix.
+        """
+        if matrix is None:
+            return self._affine
+
+        a, b, c, d, e, f = self._get_matrix()
+        (g, h, i), (j, k, m), _ = matrix
+        return (
+            (g * a + h * d, g * b + h * e, g * c + h * f + i),
+            (j * a + k * d, j * b + k * e, j * c + k * f + m),
+            (0, 0, 1),
+            )
+
+    def _flush(self) -> None:
+        """Fuse all pending operations into the matrix."""
+        if self._pending is not None:
+            self._matrix = _fuse(self._matrix, self._pending)
+            self._pending = None
+
+    def _apply(self, operation: 'Vec2S | rai.typing.Affine') -> None:
+        """Apply an operation after all previous operations."""
+        if self._pending is None:
+            self._pending = [operation]
+            return
+
+        self._pending.append(operation)
+        if len(self._pending) >= MAX_PENDING:
+            self._flush()
+
+    def _apply_move(self, x: float, y: float) -> None:
+        """Apply a translation after all previous operations."""
+        self._apply((x, y))
+
     #-------------#
     # Rotate      #
     #-------------#
@@ -67,10 +185,7 @@ class Transform:
         x = float(x)
         y = float(y)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(rai.affine.rotate(angle), x, y),
-            self._affine
-            )
+        self._apply(rai.affine.around(rai.affine.rotate(angle), x, y))
 
         return self
 
@@ -97,10 +212,10 @@ class Transform:
         angle = float(angle)
         pivot = rai.vec2s(pivot)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(rai.affine.rotate(angle), pivot[0], pivot[1]),
-            self._affine
-            )
+        self._apply(rai.affine.around(
+            rai.affine.rotate(angle),
+            pivot[0], pivot[1],
+            ))
 
         return self
 
@@ -195,7 +310,7 @@ class Transform:
         x = float(x)
         y = float(y)
 
-        self._affine = rai.affine.matmul(rai.affine.move(x, y), self._affine)
+        self._apply_move(x, y)
 
         return self
 
@@ -218,9 +333,7 @@ class Transform:
         """
         offset = rai.vec2s(offset)
 
-        self._affine = rai.affine.matmul(
-                rai.affine.move(offset[0], offset[1]),
-                self._affine)
+        self._apply_move(offset[0], offset[1])
 
         return self
 
@@ -286,7 +399,7 @@ class Transform:
             This transform is returned to allow chaining methods.
         """
         x = float(x)
-        self._affine = rai.affine.matmul(rai.affine.move(x, 0), self._affine)
+        self._apply_move(x, 0)
         return self
 
     def movey(self, y: Num = 0) -> Self:
@@ -304,7 +417,7 @@ class Transform:
             This transform is returned to allow chaining methods.
         """
         y = float(y)
-        self._affine = rai.affine.matmul(rai.affine.move(0, y), self._affine)
+        self._apply_move(0, y)
         return self
 
     #-------------#
@@ -334,10 +447,7 @@ class Transform:
         x = float(x)
         y = float(y)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(rai.affine.scale(-1, -1), x, y),
-            self._affine
-            )
+        self._apply(rai.affine.around(rai.affine.scale(-1, -1), x, y))
         return self
 
     def pflip(
@@ -360,13 +470,10 @@ class Transform:
         """
         pivot = rai.vec2s(pivot)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(
-                rai.affine.scale(-1, -1),
-                pivot[0], pivot[1],
-                ),
-            self._affine
-            )
+        self._apply(rai.affine.around(
+            rai.affine.scale(-1, -1),
+            pivot[0], pivot[1],
+            ))
         return self
 
     @overload
@@ -434,10 +541,7 @@ class Transform:
         """
         y = float(y)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(rai.affine.scale(1, -1), 0, y),
-            self._affine
-            )
+        self._apply(rai.affine.around(rai.affine.scale(1, -1), 0, y))
         return self
 
     def hflip(self, x: Num = 0) -> Self:
@@ -456,10 +560,7 @@ class Transform:
         """
         x = float(x)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(rai.affine.scale(-1, 1), x, 0),
-            self._affine
-            )
+        self._apply(rai.affine.around(rai.affine.scale(-1, 1), x, 0))
         return self
 
     #-------------#
@@ -494,13 +595,10 @@ class Transform:
         y = float(y)
         pivot = rai.vec2s(pivot)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(
-                rai.affine.scale(x, y),
-                pivot[0], pivot[1]
-                ),
-            self._affine
-            )
+        self._apply(rai.affine.around(
+            rai.affine.scale(x, y),
+            pivot[0], pivot[1]
+            ))
 
         return self
 
@@ -535,13 +633,10 @@ class Transform:
         px = float(px)
         py = float(py)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(
-                rai.affine.scale(x, y),
-                px, py
-                ),
-            self._affine
-            )
+        self._apply(rai.affine.around(
+            rai.affine.scale(x, y),
+            px, py
+            ))
 
         return self
 
@@ -569,15 +664,10 @@ class Transform:
         scale = rai.vec2s(scale)
         pivot = rai.vec2s(pivot)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(
-                rai.affine.scale(
-                    scale[0], scale[1]
-                    ),
-                pivot[0], pivot[1]
-                ),
-            self._affine
-            )
+        self._apply(rai.affine.around(
+            rai.affine.scale(scale[0], scale[1]),
+            pivot[0], pivot[1]
+            ))
         return self
 
     def pcscale(
@@ -607,15 +697,10 @@ class Transform:
         px = float(px)
         py = float(py)
 
-        self._affine = rai.affine.matmul(
-            rai.affine.around(
-                rai.affine.scale(
-                    scale[0], scale[1]
-                    ),
-                px, py
-                ),
-            self._affine
-            )
+        self._apply(rai.affine.around(
+            rai.affine.scale(scale[0], scale[1]),
+            px, py
+            ))
         return self
 
     def apscale(
@@ -642,13 +727,10 @@ class Transform:
         factor = float(factor)
         pivot = rai.vec2s(pivot)
 
-        self._affine = rai.affine.matmul(
-                rai.affine.around(
-                    rai.affine.scale(factor, factor),
-                    pivot[0], pivot[1]
-                    ),
-                self._affine
-                )
+        self._apply(rai.affine.around(
+            rai.affine.scale(factor, factor),
+            pivot[0], pivot[1]
+            ))
         return self
 
     def acscale(
@@ -678,13 +760,10 @@ class Transform:
         px = float(px)
         py = float(py)
 
-        self._affine = rai.affine.matmul(
-                rai.affine.around(
-                    rai.affine.scale(factor, factor),
-                    px, py
-                    ),
-                self._affine
-                )
+        self._apply(rai.affine.around(
+            rai.affine.scale(factor, factor),
+            px, py
+            ))
         return self
 
     @overload
@@ -922,7 +1001,8 @@ class Transform:
 
     def reset(self) -> None:
         """Reset this transform to be an identity transform."""
-        self._affine = rai.affine.identity()
+        self._matrix = IDENTITY
+        self._pending = None
 
     def transform_poly(
             self,
@@ -980,7 +1060,7 @@ class Transform:
             This transform is returned to allow method chaining.
         """
         if transform is not None:
-            self._affine = rai.affine.matmul(transform._affine, self._affine)
+            self._apply(transform._affine)
         return self
 
     def __repr__(self) -> str:
@@ -1023,10 +1103,47 @@ class Transform:
         """
         Duplicate transform.
 
+        Matrices are immutable tuples,
+        so the copy simply shares the matrix of this transform.
+
         Returns
         -------
         Self
             The copied transform.
         """
-        return deepcopy(self)
+        self._flush()
+        return copy(self)
+
+def _fuse(
+        matrix: FlatAffine,
+        operations: 'list[Vec2S | rai.typing.Affine]',
+        ) -> FlatAffine:
+    """
+    Apply a list of operations to a flattened affine matrix.
+
+    Equivalent to multiplying the matrices of all operations
+    in reverse order with `matrix`,
+    but only computes the top two rows (the bottom row is always 0, 0, 1),
+    and adds translations directly,
+    all without building intermediate tuples.
+    """
+    a, b, c, d, e, f = matrix
+
+    for operation in operations:
+        if len(operation) == 2:
+            c += operation[0]
+            f += operation[1]
+            continue
+
+        (g, h, i), (j, k, m), _ = operation
+        a, b, c, d, e, f = (
+            g * a + h * d,
+            g * b + h * e,
+            g * c + h * f + i,
+            j * a + k * d,
+            j * b + k * e,
+            j * c + k * f + m,
+            )
+
+    return (a, b, c, d, e, f)
 
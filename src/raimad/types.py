@@ -15,6 +15,7 @@ without losing any confidence in what RAIMAD will hand back to them.
 
 from __future__ import annotations
 from typing import (
+        TYPE_CHECKING,
         Callable,
         Literal,
         Protocol,
@@ -26,6 +27,9 @@ from typing import (
         )
 from collections.abc import Sequence, Mapping
 
+if TYPE_CHECKING:
+    from raimad.packedpolys import PackedPolys
+
 # `float | int` is equivalent to just `float`
 # for static mypy checking,
 # but isinstance checks against just `float`
@@ -72,6 +76,12 @@ Mat3S: TypeAlias = Tuple[
         Tuple[NumS, NumS, NumS]
         ]
 
+# Polygons as they are stored in the geoms of a compo:
+# a list of polygons, or the same polygons packed into arrays
+# (see `rai.PackedPolys`)
+PackablePolysS: TypeAlias = 'PolysS | PackedPolys'
+PackableGeomsS: TypeAlias = 'dict[str, PackablePolysS]'
+
 types_strict: set[TypeAlias] = {
         NumS,
         Vec2S,
@@ -81,6 +91,11 @@ types_strict: set[TypeAlias] = {
         Mat3S,
     }
 
+# Symbolic description of a shape that has a native CIF command:
+# ('B', (length, width)) for a box centered on the origin,
+# ('R', (radius, )) for a circle centered on the origin,
+# ('W', (width, x1, y1, x2, y2)) for a straight wire.
+Primitive: TypeAlias = tuple[str, tuple[NumS, ...]]
 
 LNameTransformerCallable: TypeAlias = Callable[[str], str | None]
 LNameTransformer: TypeAlias = Union[
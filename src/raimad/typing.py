@@ -21,6 +21,7 @@ BoundPoint: TypeAlias = rai.BoundPoint
 
 Compo: TypeAlias = rai.Compo
 Proxy: TypeAlias = rai.Proxy
+ArrayProxy: TypeAlias = rai.ArrayProxy
 CompoLike: TypeAlias = rai.Compo | rai.Proxy
 
 Transform: TypeAlias = rai.Transform
@@ -35,3 +36,11 @@ Affine: TypeAlias = tuple[
 LMapShorthand: TypeAlias = None | str | dict[str, str | None]
 LMap: TypeAlias = rai.LMap
 
+# (path, compo, affine, lmap), see `Compo.walk`
+HierNode: TypeAlias = tuple[
+    tuple[str | int | tuple[int, int], ...],
+    rai.Compo,
+    Affine,
+    rai.LMap,
+    ]
+
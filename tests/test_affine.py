@@ -2,6 +2,7 @@ import unittest
 from math import sin, cos, radians
 
 import raimad as rai
+from raimad.types import Poly
 
 class TestAffine(unittest.TestCase):
     def test_identity(self):
@@ -143,8 +144,134 @@ class TestAffine(unittest.TestCase):
                 )
             )
         self.assertAlmostEqual(angle, radians(30))
-        
 
+    @unittest.skipUnless(rai.affine.HAS_NUMPY, 'numpy not installed')
+    def test_transform_polys_numpy(self):
+        matrix = rai.Transform().rotate(0.3).scale(2, 3).move(1, 2)._affine
+        polys: list[Poly] = [
+            rai.Circle(10).geoms['root'][0],
+            [(0, 0), (1, 0), (0, 1)],
+            ]
+
+        array = rai.affine.polys_to_array(polys)
+        self.assertIsNotNone(array)
+
+        expected = [rai.affine.transform_poly(matrix, poly) for poly in polys]
+        actual = rai.affine.transform_polys(matrix, polys, array)
+
+        self.assertEqual([len(poly) for poly in actual], [200, 3])
+        for expected_poly, actual_poly in zip(expected, actual):
+            for expected_point, actual_point in zip(
+                    expected_poly,
+                    actual_poly
+                    ):
+                self.assertIsInstance(actual_point, tuple)
+                self.assertIsInstance(actual_point[0], float)
+                self.assertAlmostEqual(expected_point[0], actual_point[0])
+                self.assertAlmostEqual(expected_point[1], actual_point[1])
+
+    def test_transform_polys_no_numpy(self):
+        polys = [rai.Circle(10).geoms['root'][0]]
+
+        use_numpy = rai.affine.use_numpy
+        rai.affine.use_numpy = False
+        try:
+            self.assertIsNone(rai.affine.polys_to_array(polys))
+        finally:
+            rai.affine.use_numpy = use_numpy
+
+        # Too few vertices for numpy to be worth it
+        self.assertIsNone(rai.affine.polys_to_array([[(0, 0), (1, 0)]]))
+
+    def assertAffineAlmostEqual(
+            self,
+            actual: rai.typing.Affine,
+            expected: rai.typing.Affine,
+            ) -> None:
+        for actual_row, expected_row in zip(actual, expected):
+            for actual_val, expected_val in zip(actual_row, expected_row):
+                self.assertAlmostEqual(actual_val, expected_val)
+
+    def test_transform_pending_fused(self):
+        transform = (
+            rai.Transform()
+            .move(3, 4)
+            .rotate(0.3, (1, 1))
+            .scale(2, 3)
+            .hflip()
+            .movex(-5)
+            .scale(0.5, (2, 2))
+            )
+
+        expected = rai.affine.matmul(
+            rai.affine.around(rai.affine.scale(0.5, 0.5), 2, 2),
+            rai.affine.move(-5, 0),
+            rai.affine.scale(-1, 1),
+            rai.affine.scale(2, 3),
+            rai.affine.around(rai.affine.rotate(0.3), 1, 1),
+            rai.affine.move(3, 4),
+            )
+
+        self.assertAffineAlmostEqual(transform._affine, expected)
+        # Reading the matrix does not change it
+        self.assertAffineAlmostEqual(transform._affine, expected)
+
+    def test_transform_pending_limit(self):
+        transform = rai.Transform()
+        for _ in range(rai.transform.MAX_PENDING * 2 + 3):
+            transform.move(1, 2).rotate(0.01)
+            self.assertLessEqual(
+                len(transform._pending or ()),
+                rai.transform.MAX_PENDING
+                )
+
+        num = rai.transform.MAX_PENDING * 2 + 3
+        self.assertAlmostEqual(transform.get_rotation(), num * 0.01)
+
+    def test_transform_copy(self):
+        transform = rai.Transform().move(1, 2).rotate(0.5)
+        copied = transform.copy()
+
+        self.assertIs(copied._matrix, transform._matrix)
+
+        copied.move(10, 0)
+        transform.scale(2)
+
+        self.assertAffineAlmostEqual(
+            copied._affine,
+            rai.affine.matmul(
+                rai.affine.move(10, 0),
+                rai.affine.rotate(0.5),
+                rai.affine.move(1, 2),
+                )
+            )
+        self.assertAffineAlmostEqual(
+            transform._affine,
+            rai.affine.matmul(
+                rai.affine.scale(2, 2),
+                rai.affine.rotate(0.5),
+                rai.affine.move(1, 2),
+                )
+            )
+
+    def test_transform_compose_onto(self):
+        transform = rai.Transform().rotate(0.3).scale(2, 3).move(1, 2)
+        outer = rai.Transform().hflip().move(-4, 5)._affine
+
+        self.assertAffineAlmostEqual(
+            transform._compose_onto(outer),
+            rai.affine.matmul(outer, transform._affine),
+            )
+        self.assertAffineAlmostEqual(
+            transform._compose_onto(None),
+            transform._affine,
+            )
+
+        # The flat matrix is only rebuilt when the transform is edited
+        matrix = transform._get_matrix()
+        self.assertIs(transform._get_matrix(), matrix)
+        transform.move(1, 1)
+        self.assertIsNot(transform._get_matrix(), matrix)
 
 if __name__ == '__main__':
     unittest.main()
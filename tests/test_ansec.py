@@ -170,6 +170,39 @@ class TestPolys(GeomsEqual, ArrayApproxEqual, unittest.TestCase):
 
         self.assertEqual(len(points_on_edges), 4)
 
+    def test_ansec_tolerance(self):
+        ansec = rai.AnSec(
+            r1=1,
+            r2=100,
+            theta1=0,
+            theta2=rai.halfcircle,
+            tolerance=0.01,
+            )
+        points = ansec.geoms['root'][0]
+
+        num_inner = rai.arc_num_points(1, rai.halfcircle, 0.01) + 1
+        num_outter = rai.arc_num_points(100, rai.halfcircle, 0.01) + 1
+        self.assertLess(num_inner, num_outter)
+        self.assertEqual(len(points), num_inner + num_outter)
+
+        for point in points[:num_inner]:
+            self.assertAlmostEqual(rai.affine.norm(point), 1)
+        for point in points[num_inner:]:
+            self.assertAlmostEqual(rai.affine.norm(point), 100)
+
+        # Both arcs still reach the ends of the sector
+        self.assertAlmostEqual(points[num_inner - 1][0], -1)
+        self.assertAlmostEqual(points[num_inner][0], -100)
+
+        ansec = rai.AnSec.from_auto(
+            rmid=50,
+            dr=2,
+            theta1=0,
+            dtheta=rai.quartercircle,
+            tolerance=0.01,
+            )
+        self.assertLess(len(ansec.geoms['root'][0]), 2 * 101)
+
 if __name__ == '__main__':
     unittest.main()
 
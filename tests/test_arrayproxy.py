@@ -0,0 +1,133 @@
+import unittest
+
+import raimad as rai
+from raimad.types import GeomsS
+
+from .utils import GeomsEqual
+
+class Pixel(rai.Compo):
+    def _make(self):
+        self.subcompos.body = rai.RectLW(10, 20).proxy().map('BODY')
+        self.subcompos.foot = (
+            rai.RectLW(4, 2).proxy().map('FOOT').movey(-11)
+            )
+
+def steamroll_elements(array: rai.typing.Proxy) -> GeomsS:
+    """Steamroll an array by steamrolling each of its elements."""
+    assert isinstance(array, rai.ArrayProxy)
+    geoms: GeomsS = {}
+    for element in array.elements():
+        for layer, polys in element.steamroll().items():
+            geoms.setdefault(layer, []).extend(polys)
+    return geoms
+
+class TestArrayProxy(GeomsEqual, unittest.TestCase):
+
+    def test_arrayproxy_lattice(self):
+        array = Pixel().array(3, 2, 30, 40)
+
+        self.assertEqual(
+            list(array.lattice()),
+            [
+                (0, 0), (30, 0), (60, 0),
+                (0, 40), (30, 40), (60, 40),
+                ]
+            )
+        self.assertEqual(len(list(array.elements())), 6)
+
+    def test_arrayproxy_steamroll(self):
+        array = Pixel().array(3, 2, 30, 40).map('LAYR')
+
+        self.assertGeomsEqual(array.steamroll(), steamroll_elements(array))
+        self.assertEqual(len(array.steamroll()['LAYR']), 12)
+
+    def test_arrayproxy_transform(self):
+        array = (
+            Pixel()
+            .proxy()
+            .rotate(rai.eigthcircle)
+            .array(4, 3, 30, 40)
+            .rotate(rai.quartercircle)
+            .hflip()
+            .move(10, 20)
+            )
+
+        self.assertGeomsEqual(array.steamroll(), steamroll_elements(array))
+
+    def test_arrayproxy_skewed_lattice(self):
+        array = rai.ArrayProxy(
+            Pixel(),
+            num_x=3,
+            num_y=3,
+            vec_x=(30, 5),
+            vec_y=(-5, 40),
+            )
+
+        self.assertGeomsEqual(array.steamroll(), steamroll_elements(array))
+
+    def test_arrayproxy_bbox(self):
+        array = Pixel().array(5, 4, 30, 40).rotate(0.3).move(7, 3)
+
+        bbox = rai.BBox()
+        for polys in steamroll_elements(array).values():
+            for poly in polys:
+                bbox.add_poly(poly)
+
+        self.assertAlmostEqual(array.bbox.min_x, bbox.min_x)
+        self.assertAlmostEqual(array.bbox.min_y, bbox.min_y)
+        self.assertAlmostEqual(array.bbox.max_x, bbox.max_x)
+        self.assertAlmostEqual(array.bbox.max_y, bbox.max_y)
+
+    def test_arrayproxy_empty(self):
+        array = Pixel().array(0, 5, 30, 40)
+
+        self.assertEqual(array.steamroll(), {})
+        self.assertTrue(array.bbox.is_empty())
+
+    def test_arrayproxy_in_compo(self):
+        pixel = Pixel()
+
+        class Detector(rai.Compo):
+            def _make(self):
+                self.subcompos.pixels = pixel.array(10, 10, 30, 40)
+                self.subcompos.label = rai.RectLW(5, 5).proxy().map('TEXT')
+
+        compo = Detector()
+        steamrolled = compo.steamroll()
+        self.assertEqual(len(steamrolled['BODY']), 100)
+        self.assertEqual(len(steamrolled['TEXT']), 1)
+        self.assertEqual(compo.bbox.max_x, 9 * 30 + 5)
+
+        # Steamroll cache notices changes to the lattice
+        pixels = compo.subcompos.pixels
+        assert isinstance(pixels, rai.ArrayProxy)
+        pixels.num_x = 2
+        self.assertEqual(len(compo.steamroll()['BODY']), 20)
+
+    def test_arrayproxy_walk_hier(self):
+        pixel = Pixel()
+
+        class Detector(rai.Compo):
+            def _make(self):
+                self.subcompos.pixels = pixel.array(3, 2, 30, 40)
+
+        compo = Detector()
+        arrays = [
+            proxy for proxy in compo.walk_hier()
+            if isinstance(proxy, rai.ArrayProxy)
+            ]
+        # The array itself, and its body and foot,
+        # which are seen through the array
+        self.assertEqual(len(arrays), 3)
+        for array in arrays:
+            self.assertEqual(len(list(array.lattice())), 6)
+
+        # Subcompos of a proxy see the array too
+        subcompo = compo.proxy().move(5, 5).subcompos.pixels
+        self.assertGeomsEqual(
+            subcompo.steamroll(),
+            compo.proxy().move(5, 5).steamroll(),
+            )
+
+if __name__ == '__main__':
+    unittest.main()
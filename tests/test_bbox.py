@@ -313,6 +313,93 @@ class TestBBox(ArrayApproxEqual, unittest.TestCase, epsilon=0.01):
             (15, 0)
             )
 
+    def assertBBoxOfSteamroll(self, compo: rai.typing.CompoLike) -> None:
+        """Check that bbox of compo matches bbox of its steamroll."""
+        expected = rai.BBox()
+        for polys in compo.steamroll().values():
+            for poly in polys:
+                expected.add_poly(poly)
+
+        self.assertArrayApproxEqual(list(compo.bbox), list(expected))
+
+    def test_bbox_hull_rotated(self):
+        compo = RotatedCircles()
+        proxy = compo.proxy().rotate(radians(30)).scale(2, 1).move(3, 4)
+        tower = proxy.proxy().rotate(radians(-70)).hflip()
+
+        self.assertBBoxOfSteamroll(compo)
+        self.assertBBoxOfSteamroll(proxy)
+        self.assertBBoxOfSteamroll(tower)
+
+    def test_bbox_hull_lmap(self):
+        class Layered(rai.Compo):
+            def _make(self):
+                self.subcompos.small = rai.Circle(1).proxy().map('small')
+                self.subcompos.big = (
+                    rai.Circle(10).proxy().map('big').move(20, 0)
+                    )
+
+        compo = Layered()
+        proxy = compo.proxy().map({'small': 'small', 'big': None})
+
+        self.assertArrayApproxEqual(list(proxy.bbox), [-1, -1, 1, 1])
+        self.assertBBoxOfSteamroll(proxy.proxy().rotate(radians(10)))
+
+    def test_bbox_hull_array(self):
+        array = (
+            RotatedCircles()
+            .array(3, 4, 20, 30)
+            .rotate(radians(20))
+            .move(1, 2)
+            )
+        self.assertBBoxOfSteamroll(array)
+        self.assertBBoxOfSteamroll(array.proxy().rotate(radians(33)))
+
+    def test_bbox_hull_cache(self):
+        compo = TwoCircles()
+        proxy = compo.proxy()
+
+        self.assertArrayApproxEqual(list(proxy.bbox), [-10, -5, 10, 5])
+        assert compo._hull_cache is not None
+        stamp = compo._hull_cache[0]
+        proxy.rotate(radians(90))
+        self.assertArrayApproxEqual(list(proxy.bbox), [-5, -10, 5, 10])
+        self.assertArrayApproxEqual(list(proxy.bbox), [-5, -10, 5, 10])
+
+        # Transforming a proxy does not invalidate the compo's hulls
+        self.assertIs(compo._hull_cache[0], stamp)
+
+        # Hulls are reduced once they are used again
+        self.assertTrue(compo._hull_cache[2])
+        self.assertEqual(len(compo._hull_cache[1]['root']), 1)
+
+        # Transforming a subcompo invalidates them
+        compo.subcompos[0].movex(-10)
+        self.assertArrayApproxEqual(list(compo.bbox), [-20, -5, 10, 5])
+        self.assertIsNot(compo._hull_cache[0], stamp)
+
+        compo.geoms['extra'] = [[(0, 0), (0, 100), (1, 0)]]
+        self.assertArrayApproxEqual(list(compo.bbox), [-20, -5, 10, 100])
+
+    def test_bbox_hull_replaced_poly(self):
+        leaf = rai.CustomPoly([(0, 0), (10, 0), (10, 10), (0, 10)])
+        leaf.geoms['root'].append([(20, 0), (30, 0), (20, 10)])
+
+        class Parent(rai.Compo):
+            def _make(self):
+                self.subcompos.leaf = leaf.proxy().move(5, 5)
+
+        compo = Parent()
+
+        # Twice, so that the hulls of the leaf get reduced and cached
+        self.assertArrayApproxEqual(list(leaf.bbox), [0, 0, 30, 10])
+        self.assertArrayApproxEqual(list(leaf.bbox), [0, 0, 30, 10])
+        self.assertArrayApproxEqual(list(compo.bbox), [5, 5, 35, 15])
+
+        # Same number of polygons, but a different polygon
+        leaf.geoms['root'][1] = [(20, 0), (60, 0), (20, 40)]
+        self.assertArrayApproxEqual(list(leaf.bbox), [0, 0, 60, 40])
+        self.assertArrayApproxEqual(list(compo.bbox), [5, 5, 65, 45])
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+import raimad as rai
+from raimad.types import PolysS
+
+def encode_per_vertex(polys: PolysS, multiplier: float) -> str:
+    return ''.join(
+        '\tP '
+        + ''.join(
+            f'{int(point[0] * multiplier)} {int(point[1] * multiplier)} '
+            for point in poly
+            )
+        + ';\n'
+        for poly in polys
+        )
+
+class TestCIFEncode(unittest.TestCase):
+
+    def test_cif_encode(self):
+        polys: PolysS = [
+            [(0, 0), (1.239, -0.5), (-2.999, 3.001)],
+            rai.Circle(7.3).geoms['root'][0],
+            [],
+            [(-1e-9, 1e6)],
+            ]
+
+        use_numpy = rai.affine.use_numpy
+        try:
+            for rai.affine.use_numpy in {False, use_numpy}:
+                for multiplier in (1, 1e2, 1e3):
+                    self.assertEqual(
+                        rai.cif.encode.encode_polys(polys, multiplier),
+                        encode_per_vertex(polys, multiplier),
+                        )
+        finally:
+            rai.affine.use_numpy = use_numpy
+
+        self.assertEqual(rai.cif.encode.encode_polys([], 1e2), '')
+        self.assertEqual(
+            rai.cif.encode.encode_polys([[(1, 2), (3, 4)]], 1e2),
+            '\tP 100 200 300 400 ;\n',
+            )
+
+if __name__ == '__main__':
+    unittest.main()
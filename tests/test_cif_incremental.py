@@ -0,0 +1,153 @@
+import unittest
+import tempfile
+import shlex
+import subprocess
+import sys
+import warnings
+from pathlib import Path
+
+import raimad as rai
+
+class Pixel(rai.Compo):
+    def _make(self, width: float = 10) -> None:
+        self.subcompos.body = rai.RectLW(width, 20).proxy().map('BODY')
+        self.subcompos.foot = (
+            rai.RectLW(4, 2).proxy().map('FOOT').movey(-11)
+            )
+
+class Detector(rai.Compo):
+    def _make(self):
+        pixel = Pixel()
+        self.subcompos.pixels = pixel.array(2, 3, 30, 40)
+        self.subcompos.single = pixel.proxy().move(100, 0)
+        self.subcompos.append(rai.Circle(5).proxy().map('CIRC'))
+
+class TestCIFIncremental(unittest.TestCase):
+
+    def assertExportsEqual(
+            self,
+            compo: rai.typing.CompoLike,
+            cache: rai.cif.FragmentCache,
+            ) -> None:
+        self.assertEqual(
+            rai.export_cif(compo, fragment_cache=cache),
+            rai.export_cif(compo),
+            )
+
+    def test_cif_incremental_reuse(self):
+        cache = rai.cif.FragmentCache()
+        compo = Detector()
+
+        self.assertExportsEqual(compo, cache)
+        self.assertEqual(cache.hits, 0)
+        num_fragments = len(cache)
+
+        # Nothing changed, the root fragment is reused
+        self.assertExportsEqual(compo, cache)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(cache), num_fragments)
+
+        # NoReuse writes the transform of a proxy into the geometry
+        # of its subcompos, so moving a proxy changes
+        # its own routine, those of its two subcompos,
+        # and the root routine.
+        # The routines of the array and the circle are reused.
+        compo.subcompos.single.move(1, 0)
+        misses = cache.misses
+        hits = cache.hits
+        self.assertExportsEqual(compo, cache)
+        self.assertEqual(cache.misses - misses, 4)
+        self.assertEqual(cache.hits - hits, 2)
+
+    def test_cif_incremental_renumber(self):
+        cache = rai.cif.FragmentCache()
+        compo = Detector()
+        self.assertExportsEqual(compo, cache)
+
+        # All routines after the new subcompo get new numbers
+        compo.subcompos._dict = {
+            'extra': Pixel(5).proxy(),
+            **compo.subcompos._dict,
+            }
+        hits = cache.hits
+        self.assertExportsEqual(compo, cache)
+        self.assertGreater(cache.hits, hits)
+
+    def test_cif_incremental_names(self):
+        cache = rai.cif.FragmentCache()
+        rai.export_cif(Detector(), fragment_cache=cache)
+
+        # Same contents, different subcompo names
+        class Renamed(rai.Compo):
+            def _make(self):
+                detector = Detector()
+                self.subcompos.other = detector.subcompos.pixels
+                self.subcompos.single = detector.subcompos.single
+                self.subcompos.append(detector.subcompos[2])
+
+        compo = Renamed()
+        self.assertEqual(compo.content_hash(), Detector().content_hash())
+        self.assertExportsEqual(compo, cache)
+
+    def test_cif_incremental_enumerator(self):
+        cache = rai.cif.FragmentCache()
+
+        class Layers(rai.Compo):
+            def _make(self, first: str, second: str) -> None:
+                self.subcompos.a = rai.RectLW(1, 1).proxy().map(first)
+                self.subcompos.b = rai.RectLW(2, 2).proxy().map(second)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.assertExportsEqual(Layers('layer_a', 'layer_b'), cache)
+
+            # The numeric CIF names depend on the order of the layers
+            self.assertExportsEqual(Layers('layer_b', 'layer_a'), cache)
+
+    def test_cif_incremental_save_load(self):
+        cache = rai.cif.FragmentCache()
+        compo = Detector()
+        rai.export_cif(compo, fragment_cache=cache)
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder) / 'sub' / 'fragments'
+            cache.save(path)
+            loaded = rai.cif.FragmentCache.load(path)
+
+            path.write_bytes(b'garbage')
+            self.assertEqual(len(rai.cif.FragmentCache.load(path)), 0)
+
+        self.assertEqual(len(loaded), len(cache))
+        self.assertExportsEqual(Detector(), loaded)
+        self.assertEqual((loaded.hits, loaded.misses), (1, 0))
+
+        self.assertEqual(
+            len(rai.cif.FragmentCache.load(Path(folder) / 'missing')),
+            0,
+            )
+
+    def test_cif_incremental_lru(self):
+        cache = rai.cif.FragmentCache(maxsize=2)
+        self.assertExportsEqual(Detector(), cache)
+        self.assertEqual(len(cache), 2)
+
+    def test_cif_incremental_cli(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for _ in range(2):
+                subprocess.run(
+                    shlex.split(f'''
+                        {sys.executable} -m raimad export
+                        raimad:Snowman -o compo.cif
+                        --incremental fragments
+                        '''),
+                    cwd=folder,
+                    check=True,
+                    )
+            cif_string = (Path(folder) / 'compo.cif').read_text()
+            cache = rai.cif.FragmentCache.load(Path(folder) / 'fragments')
+
+        self.assertEqual(cif_string, rai.export_cif(rai.Snowman()))
+        self.assertGreater(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
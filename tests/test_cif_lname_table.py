@@ -0,0 +1,117 @@
+import unittest
+import warnings
+
+import raimad as rai
+
+class Counter:
+    """Layer name transformer that counts how often it was called."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, name):
+        self.calls += 1
+        return name.upper()[:4]
+
+class Pixel(rai.Compo):
+    def _make(self) -> None:
+        self.subcompos.body = rai.RectLW(10, 20).proxy().map('bodylayer')
+        self.subcompos.foot = rai.RectLW(4, 2).proxy().map('foot').movey(-11)
+
+class Detector(rai.Compo):
+    def _make(self) -> None:
+        pixel = Pixel()
+        for index in range(10):
+            self.subcompos.append(pixel.proxy().move(index * 20, 0))
+        self.subcompos.array = pixel.array(3, 3, 20, 30)
+        self.subcompos.append(
+            rai.Circle(5).proxy().map({'root': 'circ'})
+            )
+        self.subcompos.append(
+            rai.RectLW(1, 1).proxy().map({'root': None})
+            )
+
+class TestCIFLNameTable(unittest.TestCase):
+
+    def test_lname_table_memoized(self):
+        counter = Counter()
+        table = rai.cif.LNameTable([counter])
+
+        self.assertEqual(table['foo'], 'FOO')
+        self.assertEqual(table['foo'], 'FOO')
+        self.assertEqual(table['bar'], 'BAR')
+        self.assertEqual(counter.calls, 2)
+        self.assertEqual(table.names, {'foo': 'FOO', 'bar': 'BAR'})
+        self.assertEqual(len(table), 2)
+
+        with self.assertRaises(rai.err.UntransformableLayerName):
+            rai.cif.LNameTable([{}])['foo']
+
+    def test_lname_table_export(self):
+        counter = Counter()
+
+        class Counted(Detector):
+            _experimental_lname_transformers = [counter]
+
+        for exporter in (rai.cif.NoReuse, rai.cif.Reuse):
+            counter.calls = 0
+            exporter(Counted())
+            self.assertEqual(counter.calls, 3)
+
+            # A shared table resolves layer names only once
+            table = rai.cif.LNameTable.for_compo(Counted())
+            counter.calls = 0
+            first = exporter(Counted(), lname_table=table)
+            second = exporter(Counted(), lname_table=table)
+            self.assertEqual(counter.calls, 3)
+            self.assertIs(first.lname_table, table)
+            self.assertEqual(first.cif_string, second.cif_string)
+
+    def test_lname_table_enumerator_warns_once(self):
+        for exporter in (rai.cif.NoReuse, rai.cif.Reuse):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                exporter(Detector())
+
+            self.assertEqual(
+                len([
+                    warning for warning in caught
+                    if issubclass(warning.category, rai.err.CIFLayerNameWarning)
+                    ]),
+                # `bodylayer` and `circ` are fine, `foot` is enumerated
+                1,
+                )
+
+    def test_lname_table_resolve(self):
+        class Enumerated(Detector):
+            # New Enumerator for every export
+            _experimental_lname_transformers = lambda _: [  # type: ignore
+                rai.cif.lname_transformers.Enumerator(),
+                ]
+
+        compo = Enumerated()
+        table = rai.cif.LNameTable.for_compo(compo)
+        table.resolve(compo)
+        self.assertEqual(
+            table.names,
+            {'bodylayer': '0001', 'foot': '0002', 'circ': '0003'},
+            )
+
+        # Resolving up front does not change the CIF layer names
+        self.assertEqual(
+            rai.cif.NoReuse(compo, lname_table=table).cif_string,
+            rai.cif.NoReuse(compo).cif_string,
+            )
+
+        # Layers are resolved after lmaps
+        proxy = compo.proxy().map({
+            'bodylayer': 'body',
+            'foot': None,
+            'circ': 'circ',
+            })
+        table = rai.cif.LNameTable.for_compo(proxy)
+        table.resolve(proxy)
+        self.assertEqual(table.names, {'body': '0001', 'circ': '0002'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+import tempfile
+import shlex
+import subprocess
+import sys
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
+import raimad as rai
+
+class Field(rai.Compo):
+    def _make(self) -> None:
+        for index in range(6):
+            self.subcompos.append(
+                rai.Circle(index + 1).proxy().map(f'L{index % 3}')
+                .move(index * 20, 0)
+                )
+        self.subcompos.grid = rai.Snowman().array(3, 2, 200, 300)
+        self.subcompos.big = (
+            rai.Circle(100, num_points=5000).proxy().rotate(0.1)
+            )
+        self.geoms['root'] = [[(0, 0), (1, 0), (0, 1)]]
+
+class TestCIFParallel(unittest.TestCase):
+
+    def test_cif_parallel(self):
+        compo = Field()
+        serial = rai.export_cif(compo)
+
+        self.assertEqual(rai.export_cif(compo, workers=2), serial)
+
+        # Every layer goes to a worker
+        with patch.object(rai.cif.noreuse, 'PARALLEL_MIN_VERTICES', 0):
+            self.assertEqual(rai.export_cif(compo, workers=3), serial)
+
+            stream = StringIO()
+            rai.stream_cif(compo, stream, workers=2)
+            self.assertEqual(stream.getvalue(), serial)
+
+    def test_cif_parallel_workers(self):
+        compo = rai.RectLW(1, 1)
+        self.assertEqual(rai.cif.NoReuse(compo, lazy=True).workers, 1)
+        self.assertGreaterEqual(
+            rai.cif.NoReuse(compo, lazy=True, workers=0).workers,
+            1,
+            )
+
+    def test_cif_parallel_cli(self):
+        with tempfile.TemporaryDirectory() as folder:
+            subprocess.run(
+                shlex.split(f'''
+                    {sys.executable} -m raimad export
+                    raimad:Snowman -o compo.cif -j 2
+                    '''),
+                cwd=folder,
+                check=True,
+                )
+            cif_string = (Path(folder) / 'compo.cif').read_text()
+
+        self.assertEqual(cif_string, rai.export_cif(rai.Snowman()))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+
+import raimad as rai
+import cift as cf
+
+from .utils import GeomsEqual
+
+class Shapes(rai.Compo):
+    def _make(self) -> None:
+        self.subcompos.box = (
+            rai.RectLW(10, 4).proxy().rotate(rai.quartercircle).move(3, 5)
+            )
+        self.subcompos.tilted = rai.RectLW(10, 4).proxy().rotate(0.3)
+        self.subcompos.circle = rai.Circle(2).proxy().scale(3).move(-7, 1)
+        self.subcompos.oval = rai.Circle(2).proxy().scale(1, 2)
+        self.subcompos.wire = (
+            rai.RectWire((0, 0), (10, 0), 2).proxy().rotate(rai.quartercircle)
+            )
+
+class TestCIFPrimitives(GeomsEqual, unittest.TestCase):
+
+    def test_cif_primitives_encode(self):
+        encode = rai.cif.primitives.encode_primitive
+        move = rai.affine.move(3, 4)
+
+        self.assertEqual(
+            encode(('B', (10, 4)), move, 100),
+            '\tB 1000 400 300 400;\n',
+            )
+        self.assertEqual(
+            encode(('B', (10, 4)), rai.affine.rotate(rai.quartercircle), 1),
+            '\tB 4 10 0 0;\n',
+            )
+        self.assertEqual(
+            encode(('B', (10, 4)), rai.affine.scale(2, 3), 1),
+            '\tB 20 12 0 0;\n',
+            )
+        self.assertIsNone(encode(('B', (10, 4)), rai.affine.rotate(0.3), 1))
+
+        self.assertEqual(
+            encode(
+                ('R', (5, )),
+                rai.affine.matmul(move, rai.affine.scale(-2, 2)),
+                1,
+                ),
+            '\tR 20 3 4;\n',
+            )
+        self.assertIsNone(encode(('R', (5, )), rai.affine.scale(1, 2), 1))
+
+        self.assertEqual(
+            encode(('W', (2, 0, 0, 10, 0)), rai.affine.scale(3, 3), 1),
+            '\tW 6 0 0 30 0;\n',
+            )
+
+    def test_cif_primitives_compos(self):
+        self.assertEqual(rai.RectLW(10, 4)._get_primitive(), ('B', (10, 4)))
+        self.assertEqual(rai.Circle(3)._get_primitive(), ('R', (3, )))
+        self.assertIsNone(rai.Circle(3, num_points=6)._get_primitive())
+        self.assertEqual(
+            rai.RectWire((1, 2), (3, 4), 5)._get_primitive(),
+            ('W', (5.0, 1.0, 2.0, 3.0, 4.0)),
+            )
+
+        # Modified geoms are no longer a primitive
+        rect = rai.RectLW(10, 4)
+        rect.geoms['root'][0][0] = (0, 0)
+        self.assertIsNone(rect._get_primitive())
+        rect = rai.RectLW(10, 4)
+        rect.geoms['other'] = []
+        self.assertIsNone(rect._get_primitive())
+
+    def test_cif_primitives_export(self):
+        compo = Shapes()
+
+        # The oval is written as a polygon.
+        # So is the tilted box with NoReuse,
+        # whereas Reuse writes the box and rotates the call instead.
+        for exporter, num_polys in (
+                (rai.cif.NoReuse, 2),
+                (rai.cif.Reuse, 1),
+                ):
+            self.assertNotIn('\tB', rai.export_cif(compo, exporter=exporter))
+
+            native = rai.export_cif(
+                compo,
+                exporter=exporter,
+                primitives=rai.cif.primitives.ALL,
+                )
+            self.assertEqual(native.count('\tP'), num_polys)
+            self.assertEqual(native.count('\tR'), 1)
+            self.assertEqual(native.count('\tW'), 1)
+
+            boxes_only = rai.export_cif(
+                compo,
+                exporter=exporter,
+                primitives=('B', ),
+                )
+            self.assertEqual(boxes_only.count('\tP'), num_polys + 2)
+
+    def test_cif_primitives_boxes(self):
+        class Boxes(rai.Compo):
+            def _make(self) -> None:
+                self.subcompos.a = rai.RectLW(10, 4).proxy().move(3, 5)
+                self.subcompos.b = rai.RectLW(10, 4).proxy().scale(2, 3)
+
+        # Boxes are read back as the same rectangles.
+        # (cift does not understand `R` and `W`.)
+        for exporter in (rai.cif.NoReuse, rai.cif.Reuse):
+            self.assertGeomsEqual(
+                cf.parse(rai.export_cif(
+                    Boxes(),
+                    exporter=exporter,
+                    primitives=('B', ),
+                    )),
+                cf.parse(rai.export_cif(Boxes(), exporter=exporter)),
+                )
+
+    def test_cif_primitives_noreuse_transform(self):
+        cif_string = rai.cif.NoReuse(
+            Shapes(),
+            multiplier=1,
+            primitives=rai.cif.primitives.ALL,
+            ).cif_string
+
+        self.assertIn('\tB 4 10 3 5;\n', cif_string)
+        self.assertIn('\tR 12 -7 1;\n', cif_string)
+        self.assertIn('\tW 2 0 0 0 10;\n', cif_string)
+
+        # Discarded layers are not written
+        proxy = rai.Circle(2).proxy().map({'root': None})
+        cif_string = rai.cif.NoReuse(
+            proxy,
+            primitives=rai.cif.primitives.ALL,
+            ).cif_string
+        self.assertNotIn('\tR', cif_string)
+        self.assertNotIn('\tL', cif_string)
+
+if __name__ == '__main__':
+    unittest.main()
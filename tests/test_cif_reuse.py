@@ -0,0 +1,220 @@
+import unittest
+
+import raimad as rai
+import cift as cf
+
+from .utils import GeomsEqual
+
+class Pixel(rai.Compo):
+    def _make(self):
+        self.subcompos.body = rai.RectLW(10, 20).proxy().map('BODY')
+        self.subcompos.foot = (
+            rai.RectLW(4, 2).proxy().map('FOOT').movey(-11)
+            )
+
+class Array(rai.Compo):
+    def _make(self, pixel, nx=2, ny=2):
+        for x in range(nx):
+            for y in range(ny):
+                self.subcompos.append(
+                    pixel.proxy().move(x * 30, y * 40)
+                    )
+
+# Both exporters truncate coordinates to integers,
+# but Reuse truncates before rotating while NoReuse truncates after,
+# so results may differ by one unit.
+class TestCIFReuse(GeomsEqual, unittest.TestCase, epsilon=1.5):
+
+    def assertSameAsNoReuse(self, compo):
+        layers_reuse = cf.parse(
+            rai.cif.Reuse(compo, multiplier=1).cif_string
+            )
+        layers_noreuse = cf.parse(
+            rai.cif.NoReuse(compo, multiplier=1).cif_string
+            )
+        self.assertGeomsEqual(layers_reuse, layers_noreuse)
+
+    def test_cif_reuse_rect(self):
+        compo = rai.RectLW(10, 20)
+
+        layers = cf.parse(rai.cif.Reuse(compo, multiplier=1).cif_string)
+
+        self.assertGeomsEqual(
+            layers,
+            {
+                'ROOT': [
+                    [
+                        (-5, -10),
+                        (5, -10),
+                        (5, 10),
+                        (-5, 10),
+                        ],
+                    ]
+                }
+            )
+
+    def test_cif_reuse_proxy(self):
+        compo = (
+            rai.RectLW(10, 20)
+            .proxy()
+            .map('LAYR')
+            .bbox.bot_left.to((0, 0))
+            )
+
+        self.assertSameAsNoReuse(compo)
+
+    def test_cif_reuse_one_routine_per_compo(self):
+        pixel = Pixel()
+        compo = Array(pixel)
+
+        cif_string = rai.cif.Reuse(compo, multiplier=1).cif_string
+
+        # Two rectangles, one pixel, one array
+        self.assertEqual(cif_string.count('DS '), 4)
+        self.assertEqual(cif_string.count('P '), 2)
+        self.assertEqual(cif_string.count('C '), 4 + 2 + 1)
+
+        self.assertSameAsNoReuse(compo)
+
+    def test_cif_reuse_cell_names(self):
+        compo = Array(Pixel())
+
+        named = rai.cif.Reuse(compo, multiplier=1).cif_string
+        self.assertEqual(named.count('\n9 '), 4)
+
+        unnamed = rai.cif.Reuse(
+            compo,
+            multiplier=1,
+            enable_cell_names=False,
+            ).cif_string
+        self.assertNotIn('\n9 ', unnamed)
+        self.assertGeomsEqual(cf.parse(unnamed), cf.parse(named))
+
+    def test_cif_reuse_rotate(self):
+        pixel = Pixel()
+
+        class Rotated(rai.Compo):
+            def _make(self):
+                self.subcompos.a = pixel.proxy().rotate(rai.quartercircle)
+                self.subcompos.b = pixel.proxy().rotate(rai.halfcircle)
+                self.subcompos.c = (
+                    pixel.proxy().rotate(rai.eigthcircle).move(100, 0)
+                    )
+
+        compo = Rotated()
+        cif_string = rai.cif.Reuse(compo, multiplier=1).cif_string
+
+        self.assertIn('C 3 R 0 1;', cif_string)
+        self.assertIn('C 3 R -1 0;', cif_string)
+        self.assertIn('C 3 R 1 1 T 100 0;', cif_string)
+        self.assertEqual(cif_string.count('DS '), 4)
+
+        self.assertSameAsNoReuse(compo)
+
+    def test_cif_reuse_mirror(self):
+        compo = rai.CustomPoly([(0, 0), (10, 0), (0, 20)])
+
+        cif_string = rai.cif.Reuse(
+            compo.proxy().hflip(),
+            multiplier=1,
+            ).cif_string
+        self.assertIn('C 1 M X;', cif_string)
+
+        cif_string = rai.cif.Reuse(
+            compo.proxy().vflip(),
+            multiplier=1,
+            ).cif_string
+        self.assertIn('C 1 M X R -1 0;', cif_string)
+
+    def test_cif_reuse_scale_flattened(self):
+        pixel = Pixel()
+
+        class Scaled(rai.Compo):
+            def _make(self):
+                self.subcompos.a = pixel.proxy().scale(2, 3)
+                self.subcompos.b = pixel.proxy().scale(2).move(100, 0)
+                self.subcompos.c = pixel.proxy().move(0, 100)
+
+        compo = Scaled()
+        cif_string = rai.cif.Reuse(compo, multiplier=1).cif_string
+
+        # Two rectangles, one pixel, one toplevel
+        self.assertEqual(cif_string.count('DS '), 4)
+        self.assertSameAsNoReuse(compo)
+
+        self.assertSameAsNoReuse(pixel.proxy().scale(2, 3))
+
+    def test_cif_reuse_lmap(self):
+        pixel = Pixel()
+
+        class Mapped(rai.Compo):
+            def _make(self):
+                self.subcompos.a = pixel.proxy()
+                self.subcompos.b = pixel.proxy().move(100, 0)
+                self.subcompos.c = pixel.proxy().map('OTHR').move(200, 0)
+                self.subcompos.d = (
+                    pixel.proxy()
+                    .map({'BODY': None, 'FOOT': 'FOOT'})
+                    .move(300, 0)
+                    )
+
+        compo = Mapped()
+        cif_string = rai.cif.Reuse(compo, multiplier=1).cif_string
+
+        # Pixels and body rectangles for three layermaps
+        # (the first two subcompos share one,
+        # the discarded body rectangle is still defined but empty),
+        # foot rectangles for two layermaps
+        # (the last subcompo maps the foot the same way as the first two),
+        # and one toplevel
+        self.assertEqual(cif_string.count('DS '), 3 + 3 + 2 + 1)
+        self.assertSameAsNoReuse(compo)
+
+    def test_cif_reuse_proxy_tower(self):
+        compo = (
+            Pixel()
+            .proxy()
+            .map({'BODY': 'A', 'FOOT': 'B'})
+            .move(5, 5)
+            .proxy()
+            .map({'A': 'C', 'B': None})
+            .rotate(rai.quartercircle)
+            )
+
+        layers = cf.parse(rai.cif.Reuse(compo, multiplier=1).cif_string)
+        self.assertEqual(layers.keys(), {'C'})
+        self.assertSameAsNoReuse(compo)
+
+    def test_cif_reuse_array(self):
+        pixel = Pixel()
+
+        class Detector(rai.Compo):
+            def _make(self):
+                self.subcompos.a = (
+                    pixel.array(3, 2, 30, 40).rotate(rai.quartercircle)
+                    )
+                self.subcompos.b = (
+                    pixel.proxy().array(2, 1, 100, 0)
+                    .proxy().move(0, 300).array(1, 3, 0, 50)
+                    )
+
+        compo = Detector()
+        steamrolled = compo.steamroll()
+
+        # Geometry of the pixel is written once for every array in NoReuse,
+        # and only once in Reuse
+        for exporter, num_polys in (
+                (rai.cif.Reuse, 2),
+                (rai.cif.NoReuse, 4),
+                ):
+            cif_string = exporter(compo, multiplier=1).cif_string
+            self.assertGeomsEqual(cf.parse(cif_string), steamrolled)
+            self.assertEqual(cif_string.count('P '), num_polys)
+
+        cif_string = rai.cif.Reuse(compo, multiplier=1).cif_string
+        self.assertEqual(cif_string.count('C 3 '), 6 + 6)
+
+        self.assertSameAsNoReuse(pixel.array(4, 4, 30, 40).move(5, 5))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import io
+import tempfile
+from pathlib import Path
+
+import raimad as rai
+
+class TestCIFStream(unittest.TestCase):
+
+    def test_cif_stream_noreuse(self):
+        compo = rai.Snowman()
+
+        stream = io.StringIO()
+        rai.stream_cif(compo, stream)
+
+        self.assertEqual(stream.getvalue(), rai.export_cif(compo))
+
+    def test_cif_stream_reuse(self):
+        compo = rai.Snowman().proxy().rotate(rai.quartercircle)
+
+        stream = io.StringIO()
+        rai.stream_cif(compo, stream, rai.cif.Reuse)
+
+        self.assertEqual(
+            stream.getvalue(),
+            rai.export_cif(compo, exporter=rai.cif.Reuse),
+            )
+
+    def test_cif_stream_path(self):
+        compo = rai.Snowman()
+
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder) / 'compo.cif'
+            rai.stream_cif(compo, path)
+            cif_string = path.read_text()
+
+        self.assertEqual(cif_string, rai.export_cif(compo))
+
+    def test_cif_stream_lazy(self):
+        exporter = rai.cif.NoReuse(rai.Snowman(), lazy=True)
+        self.assertFalse(hasattr(exporter, 'cif_string'))
+
+        # The exporter can be run more than once
+        self.assertEqual(
+            ''.join(exporter.yield_cif()),
+            ''.join(exporter.yield_cif()),
+            )
+
+    def test_cif_stream_invalid_dest(self):
+        with self.assertRaises(rai.err.InvalidDestinationError):
+            rai.stream_cif(rai.RectLW(10, 10), 42)  # type: ignore[arg-type]
+
+if __name__ == '__main__':
+    unittest.main()
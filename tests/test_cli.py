@@ -54,6 +54,27 @@ class TestCLI(unittest.TestCase):
 
         self.assertEqual(self.snowman_cif, cif_string)
 
+    def test_cli_export_gds_file(self):
+        with tempfile.TemporaryDirectory() as folder:
+            subprocess.run(
+                shlex.split(f'''
+                    {sys.executable} -m raimad export
+                    raimad:Snowman -o compo.gds
+                    '''),
+                cwd=folder,
+                check=True
+                )
+
+            gds_bytes = (Path(folder) / 'compo.gds').read_bytes()
+
+        # Timestamps differ, but everything else is the same
+        self.assertEqual(
+            len(gds_bytes),
+            len(rai.export_gds(rai.Snowman())),
+            )
+        self.assertTrue(gds_bytes.startswith(bytes.fromhex('000600020258')))
+        self.assertTrue(gds_bytes.endswith(bytes.fromhex('00040400')))
+
     def test_cli_export_opts(self):
         with tempfile.TemporaryDirectory() as folder:
             subprocess.run(
@@ -172,6 +193,87 @@ class TestCLI(unittest.TestCase):
             map(lambda s: s.strip(), rai.fortunes_politics)
             )
 
+    def test_cli_export_sweep(self):
+        with tempfile.TemporaryDirectory() as folder:
+            subprocess.run(
+                [
+                    f"{sys.executable}", "-m", "raimad", "export",
+                    "raimad:RectLW",
+                    "-o", "sweep.cif",
+                    "--sweep", "length", "[10, 20]", "width", "[1, 2]",
+                    "-j", "2",
+                    ],
+                check=True,
+                cwd=folder,
+                )
+
+            cif_string = (Path(folder) / 'sweep.cif').read_text()
+
+        grid = rai.sweep.SweepGrid(
+            rai.RectLW,
+            rai.sweep.cartesian(length=[10, 20], width=[1, 2]),
+            )
+        self.assertEqual(rai.export_cif(grid), cif_string)
+
+    def test_cli_export_sweep_each(self):
+        with tempfile.TemporaryDirectory() as folder:
+            subprocess.run(
+                [
+                    f"{sys.executable}", "-m", "raimad", "export",
+                    "raimad:RectLW",
+                    "-o", "{name}_{variant}.cif",
+                    "--opts", "width", "6.9",
+                    "--sweep", "length", "[420, 42]",
+                    ],
+                check=True,
+                cwd=folder,
+                )
+
+            self.assertEqual(
+                sorted(path.name for path in Path(folder).iterdir()),
+                ['RectLW_length=42.cif', 'RectLW_length=420.cif'],
+                )
+            cif_string = (Path(folder) / 'RectLW_length=420.cif').read_text()
+
+        self.assertEqual(self.rectlw_cif, cif_string)
+
+    def test_cli_export_sweep_zip(self):
+        with tempfile.TemporaryDirectory() as folder:
+            subprocess.run(
+                [
+                    f"{sys.executable}", "-m", "raimad", "export",
+                    "raimad:RectLW",
+                    "-o", "{variant}.gds",
+                    "--sweep", "length", "[1, 2]", "width", "[3, 4]",
+                    "--zip",
+                    ],
+                check=True,
+                cwd=folder,
+                )
+
+            self.assertEqual(
+                sorted(path.name for path in Path(folder).iterdir()),
+                ['length=1_width=3.gds', 'length=2_width=4.gds'],
+                )
+
+    def test_cli_export_sweep_uneven(self):
+        with tempfile.TemporaryDirectory() as folder:
+            result = subprocess.run(
+                [
+                    f"{sys.executable}", "-m", "raimad", "export",
+                    "raimad:Circle",
+                    "-o", "{variant}.cif",
+                    "--sweep", "radius", "[1, 2]", "num_points",
+                    ],
+                capture_output=True,
+                cwd=folder,
+                )
+
+            self.assertEqual(list(Path(folder).iterdir()), [])
+
+        self.assertEqual(result.returncode, 2)
+        self.assertIn('num_points', result.stderr.decode('utf-8'))
+
 # TODO other formats? svg?
 
 if __name__ == '__main__':
@@ -0,0 +1,110 @@
+import unittest
+
+import raimad as rai
+
+class Counted(rai.Compo):
+    builds = 0
+
+    class Options:
+        width = rai.Option('Width')
+        layers = rai.Option('Layers')
+
+    def _make(
+            self,
+            width: float = 10,
+            layers: tuple[str, ...] = ('root', ),
+            ) -> None:
+        type(self).builds += 1
+        for layer in layers:
+            self.geoms[layer] = [[(0, 0), (width, 0), (0, width)]]
+
+class TestCompoCache(unittest.TestCase):
+
+    def setUp(self):
+        Counted.builds = 0
+
+    def test_compocache_reuse(self):
+        cache = rai.CompoCache()
+
+        first = cache.get(Counted, 5)
+        self.assertIs(cache.get(Counted, 5), first)
+        self.assertIs(cache.get(Counted, width=5), first)
+        self.assertIs(cache.get(Counted, 5.0), first)
+        self.assertIs(cache.get(Counted, 5, ('root', )), first)
+
+        self.assertIsNot(cache.get(Counted, 6), first)
+        self.assertIsNot(cache.get(Counted, 5, ('a', 'b')), first)
+
+        self.assertEqual(Counted.builds, 3)
+        self.assertEqual(cache.hits, 4)
+        self.assertEqual(cache.misses, 3)
+
+    def test_compocache_lru(self):
+        cache = rai.CompoCache(maxsize=2)
+
+        one = cache.get(Counted, 1)
+        cache.get(Counted, 2)
+        cache.get(Counted, 1)
+        cache.get(Counted, 3)
+
+        # 2 was the least recently used one
+        self.assertEqual(len(cache), 2)
+        self.assertIs(cache.get(Counted, 1), one)
+        self.assertEqual(Counted.builds, 3)
+        cache.get(Counted, 2)
+        self.assertEqual(Counted.builds, 4)
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_compocache_modified(self):
+        cache = rai.CompoCache()
+
+        first = cache.get(Counted, 5)
+        first.geoms['root'][0] = [(0, 0), (1, 0), (0, 1)]
+
+        second = cache.get(Counted, 5)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.geoms['root'][0][1], (5, 0))
+
+    def test_compocache_uncacheable(self):
+        cache = rai.CompoCache()
+
+        class Wrapper(rai.Compo):
+            def _make(self, proxy):
+                self.subcompos.inner = proxy
+
+        proxy = rai.RectLW(1, 1).proxy()
+        self.assertIsNot(cache.get(Wrapper, proxy), cache.get(Wrapper, proxy))
+        self.assertEqual(len(cache), 0)
+
+    def test_compocache_cached(self):
+        rai.compocache.compo_cache.clear()
+        circle = rai.Circle.cached(7)
+
+        self.assertIs(rai.Circle.cached(radius=7), circle)
+        self.assertIsNot(rai.Circle(7), circle)
+
+        # Compos used in many places become one cell
+        class Pair(rai.Compo):
+            def _make(self):
+                self.subcompos.a = rai.Circle.cached(7).proxy()
+                self.subcompos.b = rai.Circle.cached(7).proxy().move(20, 0)
+
+        cif_string = rai.cif.Reuse(Pair()).cif_string
+        self.assertEqual(cif_string.count('P '), 1)
+
+    def test_compocache_partial(self):
+        partial = Counted.partial(width=3)
+
+        self.assertIsNot(partial(), partial())
+
+        rai.compocache.cache_partials = True
+        try:
+            self.assertIs(partial(), partial())
+            self.assertIs(partial(), Counted.cached(3))
+        finally:
+            rai.compocache.cache_partials = False
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+import raimad as rai
+
+class Pixel(rai.Compo):
+    def _make(self, width=10):
+        self.subcompos.body = rai.RectLW(width, 20).proxy().map('BODY')
+        self.subcompos.foot = (
+            rai.RectLW(4, 2).proxy().map('FOOT').movey(-11)
+            )
+        self.marks.top = (0, 10)
+
+class TestContentHash(unittest.TestCase):
+
+    def test_content_hash_equal(self):
+        self.assertEqual(Pixel().content_hash(), Pixel().content_hash())
+        self.assertEqual(
+            rai.Circle(5).proxy().move(1, 2).content_hash(),
+            rai.Circle(5).proxy().move(1, 2).content_hash(),
+            )
+        self.assertRegex(Pixel().content_hash(), '^[0-9a-f]{32}$')
+
+        # Stable between runs of Python
+        self.assertEqual(
+            rai.CustomPoly([(0, 0), (1, 0), (0, 1)]).content_hash(),
+            '9b40aa3331f204d9c601454cc8454b1c',
+            )
+
+        # Different classes with the same contents
+        self.assertEqual(
+            rai.RectLW(2, 4).content_hash(),
+            rai.CustomPoly(rai.RectLW(2, 4).geoms['root'][0]).content_hash(),
+            )
+
+    def test_content_hash_different(self):
+        pixel = Pixel()
+        hashes = {
+            pixel.content_hash(),
+            Pixel(width=11).content_hash(),
+            pixel.proxy().content_hash(),
+            pixel.proxy().move(1, 0).content_hash(),
+            pixel.proxy().map({'BODY': 'A', 'FOOT': 'B'}).content_hash(),
+            pixel.proxy().map('A').content_hash(),
+            pixel.array(2, 2, 30, 40).content_hash(),
+            pixel.array(2, 3, 30, 40).content_hash(),
+            }
+        self.assertEqual(len(hashes), 8)
+
+    def test_content_hash_changes(self):
+        pixel = Pixel()
+        parent = rai.Snowman()
+        parent.subcompos.pixel = pixel.proxy()
+        before = parent.content_hash()
+        cache = pixel._content_hash_cache
+
+        # Cached as long as nothing changes
+        self.assertEqual(parent.content_hash(), before)
+        self.assertIs(pixel._content_hash_cache, cache)
+
+        pixel.subcompos.foot.move(1, 0)
+        self.assertNotEqual(parent.content_hash(), before)
+
+        pixel.subcompos.foot.move(-1, 0)
+        self.assertEqual(parent.content_hash(), before)
+
+        pixel.marks.bottom = (0, -10)
+        self.assertNotEqual(parent.content_hash(), before)
+        del pixel.marks._dict['bottom']
+        self.assertEqual(parent.content_hash(), before)
+
+        body = pixel.subcompos.body.compo
+        assert isinstance(body, rai.Compo)
+        body.geoms['root'][0] = [(0, 0), (1, 0), (0, 1)]
+        self.assertNotEqual(parent.content_hash(), before)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import unittest
+import tempfile
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+
+import raimad as rai
+
+from .utils import GeomsEqual
+
+class Resonator(rai.Compo):
+    builds = 0
+
+    class Options:
+        length = rai.Option('Length')
+
+    def _make(self, length: float = 10, layer: str = 'root') -> None:
+        type(self).builds += 1
+        self.subcompos.body = rai.RectLW(length, 2).proxy().map(layer)
+        self.subcompos.coupler = rai.Circle(3).proxy().movex(length)
+        self.subcompos.append(
+            rai.RectLW(1, 1).proxy().proxy().rotate(0.3).map('side')
+            )
+        self.subcompos.array = rai.Circle(1).array(2, 3, 4, 5)
+        self.marks.end = (length, 0)
+        self.marks.append((0, 1))
+
+class TestDiskCache(GeomsEqual, unittest.TestCase):
+
+    def setUp(self):
+        Resonator.builds = 0
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = rai.DiskCache(self.tmpdir.name)
+
+    def test_diskcache_roundtrip(self):
+        built = self.cache.get(Resonator, 20)
+        loaded = self.cache.get(Resonator, length=20.0)
+
+        self.assertEqual(Resonator.builds, 1)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertIsNot(loaded, built)
+        self.assertIsInstance(loaded, Resonator)
+
+        self.assertEqual(loaded.content_hash(), built.content_hash())
+        self.assertGeomsEqual(loaded.steamroll(), built.steamroll())
+        self.assertEqual(loaded.marks.end, (20, 0))
+        self.assertEqual(
+            list(loaded.subcompos.keys()),
+            ['body', 'coupler', 2, 'array'],
+            )
+        self.assertIsInstance(loaded.subcompos.array, rai.ArrayProxy)
+        self.assertIsInstance(loaded.subcompos.coupler.compo, rai.Circle)
+        self.assertEqual(
+            loaded.subcompos.coupler.final()._get_primitive(),
+            ('R', (3, )),
+            )
+
+        # Another cache in the same directory, as in another run
+        other = rai.DiskCache(self.tmpdir.name)
+        self.assertEqual(
+            other.get(Resonator, 20).content_hash(),
+            built.content_hash(),
+            )
+        self.assertEqual(other.hits, 1)
+
+    def test_diskcache_different_options(self):
+        self.cache.get(Resonator, 20)
+        self.cache.get(Resonator, 21)
+        self.cache.get(Resonator, 20, layer='other')
+        self.assertEqual(Resonator.builds, 3)
+        self.assertEqual(len(self.cache), 3)
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.cache.get(Resonator, 20)
+        self.assertEqual(Resonator.builds, 4)
+
+    def test_diskcache_stale_source(self):
+        self.cache.get(Resonator, 20)
+        (entry, ) = Path(self.tmpdir.name).glob('*.raic')
+
+        # Pretend that a subcompo class has been edited
+        data = entry.read_bytes().replace(
+            rai.diskcache._source_hash(rai.Circle).encode(),
+            b'0' * 32,
+            )
+        entry.write_bytes(data)
+
+        self.cache.get(Resonator, 20)
+        self.assertEqual(Resonator.builds, 2)
+
+        # Corrupt entries are rebuilt as well
+        entry.write_bytes(b'garbage')
+        self.cache.get(Resonator, 20)
+        self.assertEqual(Resonator.builds, 3)
+
+    def test_diskcache_eviction(self):
+        cache = rai.DiskCache(self.tmpdir.name, max_size=1)
+        cache.get(Resonator, 1)
+        cache.get(Resonator, 2)
+        self.assertEqual(len(cache), 0)
+
+        cache.max_size = 10 ** 6
+        for length in range(3):
+            cache.get(Resonator, length)
+        self.assertEqual(len(cache), 3)
+
+        size = sum(path.stat().st_size for path in cache._entries())
+        cache.max_size = size - 1
+        cache._evict()
+        self.assertEqual(len(cache), 2)
+
+    def test_diskcache_eviction_scans(self):
+        scans = 0
+        entries = rai.DiskCache._entries
+
+        def counting_entries(cache: rai.DiskCache) -> list[Path]:
+            nonlocal scans
+            scans += 1
+            return entries(cache)
+
+        cache = rai.DiskCache(self.tmpdir.name, max_size=10 ** 6)
+        cache._entries = counting_entries.__get__(cache)  # type: ignore[method-assign]
+
+        # Only the first write scans the directory
+        for length in range(10):
+            cache.get(Resonator, length)
+        self.assertEqual(scans, 1)
+
+        # Going over the maximum size scans it again
+        size = sum(path.stat().st_size for path in entries(cache))
+        cache.max_size = size
+        cache.get(Resonator, 10)
+        self.assertEqual(scans, 2)
+        self.assertEqual(len(entries(cache)), 10)
+
+    def test_diskcache_unstorable(self):
+        class Local(rai.Compo):
+            def _make(self):
+                self.geoms['root'] = [[(0, 0), (1, 0), (0, 1)]]
+
+        self.cache.get(Local)
+        self.cache.get(Resonator, 5, layer=lambda: None)
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.misses, 2)
+
+    def test_diskcache_cli(self):
+        with tempfile.TemporaryDirectory() as folder:
+            for _ in range(2):
+                subprocess.run(
+                    shlex.split(f'''
+                        {sys.executable} -m raimad export
+                        raimad:Snowman -o compo.cif
+                        --build-cache {self.tmpdir.name}
+                        '''),
+                    cwd=folder,
+                    check=True,
+                    )
+            cif_string = (Path(folder) / 'compo.cif').read_text()
+
+        self.assertEqual(cif_string, rai.export_cif(rai.Snowman()))
+        self.assertEqual(len(self.cache), 1)
+
+if __name__ == '__main__':
+    unittest.main()
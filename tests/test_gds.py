@@ -0,0 +1,321 @@
+from typing import Any
+import unittest
+import tempfile
+import struct
+from datetime import datetime
+from io import BytesIO
+from math import radians
+from pathlib import Path
+
+import raimad as rai
+from raimad.types import Geoms, PolysS
+
+from .utils import GeomsEqual
+
+TIMESTAMP = datetime(2024, 1, 2, 3, 4, 5)
+
+def parse_real8(data: bytes) -> float:
+    sign = -1 if data[0] & 0x80 else 1
+    exponent = (data[0] & 0x7F) - 64
+    mantissa = int.from_bytes(data[1:8], 'big')
+    return sign * mantissa / 2 ** 56 * 16.0 ** exponent
+
+def parse_records(data: bytes) -> list[tuple[int, bytes]]:
+    """Split a GDSII file into (record type, payload) tuples."""
+    records = []
+    offset = 0
+    while offset < len(data):
+        length, record_type = struct.unpack_from('>HH', data, offset)
+        records.append((record_type, data[offset + 4:offset + length]))
+        offset += length
+    return records
+
+def parse_structs(data: bytes) -> dict[str, list[dict[Any, Any]]]:
+    """Parse a GDSII file into name -> list of elements."""
+    structs: dict[str, list[dict[Any, Any]]] = {}
+    element: dict[Any, Any] = {}
+    for record_type, payload in parse_records(data):
+        if record_type == rai.gds.records.STRNAME:
+            elements = structs[payload.rstrip(b'\0').decode()] = []
+        elif record_type in (
+                rai.gds.records.BOUNDARY,
+                rai.gds.records.SREF,
+                rai.gds.records.AREF,
+                ):
+            element = {'type': record_type}
+        elif record_type == rai.gds.records.ENDEL:
+            elements.append(element)
+        elif record_type == rai.gds.records.XY:
+            element['xy'] = struct.unpack(f'>{len(payload) // 4}i', payload)
+        elif record_type in (
+                rai.gds.records.LAYER,
+                rai.gds.records.DATATYPE,
+                rai.gds.records.COLROW,
+                rai.gds.records.STRANS,
+                ):
+            element[record_type] = struct.unpack(
+                f'>{len(payload) // 2}H',
+                payload,
+                )
+        elif record_type == rai.gds.records.SNAME:
+            element['sname'] = payload.rstrip(b'\0').decode()
+        elif record_type in (rai.gds.records.MAG, rai.gds.records.ANGLE):
+            element[record_type] = parse_real8(payload)
+    return structs
+
+def flatten(
+        structs: dict[str, list[dict[Any, Any]]],
+        name: str,
+        affine: rai.typing.Affine,
+        geoms: dict[int, PolysS],
+        ) -> None:
+    """Flatten a structure, adding its polygons to geoms."""
+    for element in structs[name]:
+        if element['type'] == rai.gds.records.BOUNDARY:
+            layer = element[rai.gds.records.LAYER][0]
+            poly = rai.affine.transform_poly(
+                affine,
+                [(x, y) for x, y in rai.couples(element['xy'])][:-1],
+                )
+            geoms.setdefault(layer, []).append(poly)
+            continue
+
+        strans = element.get(rai.gds.records.STRANS, (0, ))[0]
+        mag = element.get(rai.gds.records.MAG, 1)
+        angle = radians(element.get(rai.gds.records.ANGLE, 0))
+        linear = rai.affine.matmul(
+            rai.affine.rotate(angle),
+            rai.affine.scale(mag, mag),
+            rai.affine.scale(1, -1 if strans & 0x8000 else 1),
+            )
+
+        xy = element['xy']
+        if element['type'] == rai.gds.records.SREF:
+            offsets = [(xy[0], xy[1])]
+        else:
+            cols, rows = element[rai.gds.records.COLROW]
+            col = ((xy[2] - xy[0]) / cols, (xy[3] - xy[1]) / cols)
+            row = ((xy[4] - xy[0]) / rows, (xy[5] - xy[1]) / rows)
+            offsets = [
+                (
+                    xy[0] + i * col[0] + j * row[0],
+                    xy[1] + i * col[1] + j * row[1],
+                    )
+                for j in range(rows)
+                for i in range(cols)
+                ]
+
+        for offset in offsets:
+            flatten(
+                structs,
+                element['sname'],
+                rai.affine.matmul(affine, rai.affine.move(*offset), linear),
+                geoms,
+                )
+
+def read_gds(
+        data: bytes,
+        layer_numbers: dict[str, tuple[int, int]],
+        database_unit: float = 1e-3,
+        ) -> Geoms:
+    """Read back the geometry of a GDSII file written by rai.gds."""
+    structs = parse_structs(data)
+    referenced = {
+        element['sname']
+        for elements in structs.values()
+        for element in elements
+        if 'sname' in element
+        }
+    top, = set(structs.keys()) - referenced
+
+    numbers: dict[int, PolysS] = {}
+    flatten(
+        structs,
+        top,
+        rai.affine.scale(database_unit, database_unit),
+        numbers,
+        )
+    names = {number: name for name, (number, _) in layer_numbers.items()}
+    return {names[number]: polys for number, polys in numbers.items()}
+
+class Pixel(rai.Compo):
+    def _make(self) -> None:
+        self.subcompos.body = rai.RectLW(10, 20).proxy().map('body')
+        self.subcompos.foot = (
+            rai.RectLW(4, 2).proxy().map('foot').movey(-11).rotate(0.2)
+            )
+
+class Detector(rai.Compo):
+    def _make(self) -> None:
+        pixel = Pixel()
+        self.subcompos.pixels = pixel.array(3, 2, 30, 40).rotate(0.5)
+        self.subcompos.rotated = pixel.proxy().rotate(1).move(100, 3)
+        self.subcompos.flipped = pixel.proxy().hflip().move(-50, 0)
+        self.subcompos.scaled = pixel.proxy().scale(2).move(0, -80)
+        self.subcompos.stretched = pixel.proxy().scale(1, 2).move(0, 80)
+        self.subcompos.nested = (
+            pixel.array(2, 2, 15, 25).array(2, 1, 50, 0).move(0, 200)
+            )
+        self.subcompos.discarded = (
+            pixel.proxy().map({'body': None, 'foot': 'foot'}).move(9, 9)
+            )
+        self.subcompos.append(rai.Circle(5).proxy().map('circ'))
+
+class TestGDS(GeomsEqual, unittest.TestCase, epsilon=0.002):
+
+    def assertReadsBack(
+            self,
+            compo: rai.typing.CompoLike,
+            **kwargs: Any,
+            ) -> rai.gds.Reuse:
+        exporter = rai.gds.Reuse(compo, timestamp=TIMESTAMP, **kwargs)
+        self.assertGeomsEqual(
+            read_gds(
+                exporter.gds_bytes,
+                exporter.layer_numbers,
+                exporter.database_unit,
+                ),
+            compo.steamroll(),
+            )
+        return exporter
+
+    def test_gds_real8(self):
+        real8 = rai.gds.records.real8
+        self.assertEqual(real8(0), bytes(8))
+        self.assertEqual(real8(1), bytes.fromhex('4110000000000000'))
+        self.assertEqual(real8(-2), bytes.fromhex('C120000000000000'))
+        for value in (1e-3, 1e-9, 0.5, 123.456, 360 - 1e-6):
+            self.assertAlmostEqual(
+                parse_real8(real8(value)) / value,
+                1,
+                places=14,
+                )
+
+    def test_gds_geometry(self):
+        self.assertReadsBack(Detector())
+        self.assertReadsBack(rai.Snowman())
+        self.assertReadsBack(Detector(), database_unit=1e-4)
+
+        # Transformed toplevel proxies
+        self.assertReadsBack(Detector().proxy().rotate(0.3).hflip())
+        self.assertReadsBack(Detector().proxy().scale(1, 3))
+        self.assertReadsBack(Pixel().array(2, 3, 20, 30))
+
+    def test_gds_reuse(self):
+        exporter = self.assertReadsBack(Detector())
+        structs = parse_structs(exporter.gds_bytes)
+
+        # Pixel is written once for every distinct layermap
+        self.assertEqual(
+            sorted(structs.keys()),
+            [
+                'Circle',
+                'Detector',
+                'Pixel',
+                'Pixel$1',
+                'RectLW',
+                'RectLW$1',
+                'RectLW$2',
+                ],
+            )
+
+        elements = structs['Detector']
+        arefs = [
+            element for element in elements
+            if element['type'] == rai.gds.records.AREF
+            ]
+        self.assertEqual(len(arefs), 1)
+        self.assertEqual(arefs[0][rai.gds.records.COLROW], (3, 2))
+
+        # The stretched pixel is flattened,
+        # the nested array is placed with one SREF per element
+        self.assertEqual(
+            sum(
+                element['type'] == rai.gds.records.BOUNDARY
+                for element in elements
+                ),
+            2,
+            )
+        self.assertEqual(
+            sum(
+                element['type'] == rai.gds.records.SREF
+                for element in elements
+                ),
+            3 + 8 + 1 + 1,
+            )
+
+    def test_gds_layers(self):
+        exporter = self.assertReadsBack(
+            Detector(),
+            layers={'foot': 1, 'circ': (7, 3)},
+            )
+        self.assertEqual(
+            exporter.layer_numbers,
+            {'foot': (1, 0), 'circ': (7, 3), 'body': (2, 0)},
+            )
+
+        datatypes = {
+            (element[rai.gds.records.LAYER], element[rai.gds.records.DATATYPE])
+            for elements in parse_structs(exporter.gds_bytes).values()
+            for element in elements
+            if element['type'] == rai.gds.records.BOUNDARY
+            }
+        self.assertEqual(datatypes, {((1, ), (0, )), ((2, ), (0, )), ((7, ), (3, ))})
+
+    def test_gds_records(self):
+        records = parse_records(
+            rai.gds.Reuse(rai.RectLW(1, 2), timestamp=TIMESTAMP).gds_bytes
+            )
+        self.assertEqual(
+            [record_type for record_type, _ in records],
+            [
+                rai.gds.records.HEADER,
+                rai.gds.records.BGNLIB,
+                rai.gds.records.LIBNAME,
+                rai.gds.records.UNITS,
+                rai.gds.records.BGNSTR,
+                rai.gds.records.STRNAME,
+                rai.gds.records.BOUNDARY,
+                rai.gds.records.LAYER,
+                rai.gds.records.DATATYPE,
+                rai.gds.records.XY,
+                rai.gds.records.ENDEL,
+                rai.gds.records.ENDSTR,
+                rai.gds.records.ENDLIB,
+                ],
+            )
+        self.assertEqual(
+            struct.unpack('>12h', records[1][1]),
+            (2024, 1, 2, 3, 4, 5) * 2,
+            )
+        self.assertAlmostEqual(parse_real8(records[3][1][:8]), 1e-3)
+        self.assertAlmostEqual(parse_real8(records[3][1][8:]) / 1e-9, 1)
+
+        # Polygons are closed
+        self.assertEqual(
+            struct.unpack('>10i', records[9][1]),
+            (-500, -1000, 500, -1000, 500, 1000, -500, 1000, -500, -1000),
+            )
+
+    def test_gds_polygon_too_large(self):
+        with self.assertRaises(rai.err.PolygonTooLargeError):
+            rai.gds.Reuse(rai.Circle(10, num_points=10000))
+
+    def test_gds_dest(self):
+        compo = Detector()
+        gds_bytes = rai.export_gds(compo, timestamp=TIMESTAMP)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / 'detector.gds'
+            rai.export_gds(compo, path, timestamp=TIMESTAMP)
+            self.assertEqual(path.read_bytes(), gds_bytes)
+
+            rai.stream_gds(compo, str(path), timestamp=TIMESTAMP)
+            self.assertEqual(path.read_bytes(), gds_bytes)
+
+        stream = BytesIO()
+        rai.stream_gds(compo, stream, timestamp=TIMESTAMP)
+        self.assertEqual(stream.getvalue(), gds_bytes)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import re
+
+import raimad as rai
+from raimad.types import Geoms
+
+class Row(rai.Compo):
+    def _make(self) -> None:
+        square = rai.RectLW(0.3, 0.3)
+        for index in range(50):
+            self.subcompos.append(
+                square.proxy().rotate(rai.quartercircle).move(index * 0.1, 0)
+                )
+
+class TestGrid(unittest.TestCase):
+
+    def setUp(self):
+        self.unit = rai.grid.unit
+        self.use_numpy = rai.affine.use_numpy
+        rai.grid.unit = 1e-3
+
+    def tearDown(self):
+        rai.grid.unit = self.unit
+        rai.affine.use_numpy = self.use_numpy
+
+    def assertOnGrid(self, geoms: Geoms) -> None:
+        assert rai.grid.unit is not None
+        for polys in geoms.values():
+            for poly in polys:
+                for point in poly:
+                    for coord in (float(point[0]), float(point[1])):
+                        self.assertEqual(
+                            coord,
+                            round(coord / rai.grid.unit) * rai.grid.unit,
+                            )
+
+    def test_grid_snap(self):
+        self.assertEqual(rai.grid.snap(0.12345), 0.123)
+        self.assertEqual(rai.grid.snap(-0.0125), -0.012)
+        self.assertEqual(
+            rai.grid.snap_poly([(0.0004, 0.0006)]),
+            [(0.0, 0.001)],
+            )
+
+        self.assertEqual(rai.grid.to_int(2.9999999), 3)
+        self.assertEqual(rai.grid.to_int(-2.9999999), -3)
+        rai.grid.unit = None
+        self.assertEqual(rai.grid.to_int(2.9999999), 2)
+
+    def test_grid_geoms(self):
+        for use_numpy in (False, rai.affine.HAS_NUMPY):
+            rai.affine.use_numpy = use_numpy
+
+            circle = rai.Circle(1 / 3)
+            self.assertOnGrid(circle.geoms)
+            self.assertOnGrid(
+                circle.proxy().rotate(0.1).move(1 / 7, 0).steamroll()
+                )
+            self.assertOnGrid(Row().steamroll())
+
+    def test_grid_manhattan(self):
+        # Moves by multiples of the grid and quarter turns
+        # give the same result as integer arithmetic
+        steamrolled = Row().steamroll()['root']
+        for index, poly in enumerate(steamrolled):
+            self.assertEqual(
+                poly,
+                [
+                    (x * 1e-3, y * 1e-3)
+                    for x, y in (
+                        (150 + index * 100, -150),
+                        (150 + index * 100, 150),
+                        (-150 + index * 100, 150),
+                        (-150 + index * 100, -150),
+                        )
+                    ],
+                )
+
+    def test_grid_export(self):
+        # Every instance is written with the same size
+        for exporter in (rai.cif.NoReuse, rai.cif.Reuse):
+            cif_string = rai.export_cif(
+                Row().proxy().move(0.1, 0.1),
+                exporter=exporter,
+                multiplier=1e3,
+                )
+            sizes = set()
+            for match in re.finditer(r'\tP ([-\d ]+);', cif_string):
+                coords = [int(coord) for coord in match[1].split()]
+                sizes.add((
+                    max(coords[0::2]) - min(coords[0::2]),
+                    max(coords[1::2]) - min(coords[1::2]),
+                    ))
+            self.assertEqual(sizes, {(300, 300)}, exporter)
+
+        cif_string = rai.export_cif(Row(), multiplier=1e3)
+        self.assertIn('\tP 150 -150 150 150 -150 150 -150 -150 ;', cif_string)
+        self.assertIn('\tP 4050 -150 4050 150 3750 150 3750 -150 ;', cif_string)
+
+    def test_grid_fragment_cache(self):
+        rai.grid.unit = None
+        compo = rai.CustomPoly([(0, 0), (4007e-3, 0), (4007e-3, 4007e-3)])
+        fragment_cache = rai.cif.FragmentCache()
+        truncated = rai.export_cif(compo, fragment_cache=fragment_cache)
+        self.assertIn('P 0 0 400 0 400 400', truncated)
+
+        # Switching grid mode on does not reuse the truncated coordinates
+        rai.grid.unit = 1e-3
+        rounded = rai.export_cif(compo, fragment_cache=fragment_cache)
+        self.assertIn('P 0 0 401 0 401 401', rounded)
+        self.assertEqual(rounded, rai.export_cif(compo))
+
+    def test_grid_content_hash(self):
+        self.assertEqual(
+            rai.RectLW(1.0000001, 2).content_hash(),
+            rai.RectLW(1, 2).content_hash(),
+            )
+
+        rai.grid.unit = None
+        self.assertNotEqual(
+            rai.RectLW(1.0000001, 2).content_hash(),
+            rai.RectLW(1, 2).content_hash(),
+            )
+
+    def test_grid_compo_cache(self):
+        cache = rai.CompoCache()
+        snapped = cache.get(rai.Circle, 1 / 3)
+        rai.grid.unit = None
+        self.assertIsNot(cache.get(rai.Circle, 1 / 3), snapped)
+
+        rai.grid.unit = 1e-3
+        self.assertIs(cache.get(rai.Circle, 1 / 3), snapped)
+
+    def test_grid_primitive(self):
+        self.assertEqual(
+            rai.RectLW(1 / 3, 1)._get_primitive(),
+            ('B', (1 / 3, 1.0)),
+            )
+
+if __name__ == '__main__':
+    unittest.main()
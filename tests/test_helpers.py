@@ -46,6 +46,48 @@ class TestPolys(ArrayApproxEqual, unittest.TestCase):
             (-100, 0)
             )
 
+    def test_arc_num_points(self):
+        # A quarter circle has a sagitta of r * (1 - cos(pi / 4))
+        sagitta = 10 * (1 - sqrt(2) / 2)
+        self.assertEqual(rai.arc_num_points(10, radians(90), sagitta), 1)
+        self.assertEqual(rai.arc_num_points(10, radians(360), sagitta), 4)
+        self.assertEqual(
+            rai.arc_num_points(10, radians(360), sagitta * 0.99),
+            5
+            )
+
+        # Bigger radius needs more points
+        self.assertLess(
+            rai.arc_num_points(1, radians(360), 0.001),
+            rai.arc_num_points(1000, radians(360), 0.001),
+            )
+
+        # Huge tolerance never makes segments longer than half a circle
+        self.assertEqual(rai.arc_num_points(1, radians(360), 100), 2)
+        self.assertEqual(
+            rai.arc_num_points(1, radians(360), 100, min_points=3),
+            3
+            )
+        self.assertEqual(rai.arc_num_points(0, radians(360), 1), 1)
+
+        with self.assertRaises(ValueError):
+            rai.arc_num_points(1, radians(360), 0)
+
+    def test_convex_hull(self):
+        self.assertEqual(
+            rai.convex_hull([
+                (0, 0), (2, 0), (2, 2), (0, 2),
+                (1, 1), (1, 0), (0, 0),
+                ]),
+            [(0, 0), (2, 0), (2, 2), (0, 2)],
+            )
+        self.assertEqual(
+            rai.convex_hull([(0, 0), (1, 1), (2, 2)]),
+            [(0, 0), (2, 2)],
+            )
+        self.assertEqual(rai.convex_hull([(1, 1)]), [(1, 1)])
+        self.assertEqual(rai.convex_hull([]), [])
+
     def test_is_rotated(self):
         self.assertTrue(rai.iters.is_rotated(
             'abc',
@@ -0,0 +1,157 @@
+from typing import Any
+import unittest
+
+import raimad as rai
+
+class Variant(rai.Compo):
+    builds = 0
+
+    def _make(self, length: float = 10, width: float = 2) -> None:
+        Variant.builds += 1
+        self.subcompos.body = rai.RectLW(length, width).proxy().map('body')
+        self.marks.tip = (length / 2, 0)
+
+    def _make_footprint(
+            self,
+            length: float = 10,
+            width: float = 2,
+            ) -> rai.BBox:
+        self.marks.tip = (length / 2, 0)
+        return rai.BBox([(-length / 2, -width / 2), (length / 2, width / 2)])
+
+class Plain(rai.Compo):
+    builds = 0
+
+    def _make(self, radius: float = 1) -> None:
+        Plain.builds += 1
+        self.geoms['root'] = [[(0, 0), (radius, 0), (0, radius)]]
+        self.marks.corner = (radius, 0)
+
+class Sweep(rai.Compo):
+    def _make(self, num_variants: int = 100) -> None:
+        previous = None
+        for index in range(num_variants):
+            proxy = Variant.lazy(length=10 + index).proxy().rotate(0.1)
+            if previous is not None:
+                proxy.snap_right(previous)
+            self.subcompos.append(proxy)
+            previous = proxy
+
+class Parent(rai.Compo):
+    def _make(self) -> None:
+        self.subcompos.a = Variant.lazy(length=2).proxy()
+        self.subcompos.b = Variant.lazy(length=4).proxy().move(10, 0)
+        self.subcompos.c = (
+            Variant.lazy(length=6).proxy().rotate(rai.quartercircle).map('x')
+            )
+        self.subcompos.d = rai.RectLW(1, 1).proxy().map('d').move(0, 5)
+
+class TestLazy(unittest.TestCase):
+
+    def assertBBoxAlmostEqual(self, bbox: rai.BBox, expected: list[float]) -> None:
+        for coord, expected_coord in zip(bbox.as_list(), expected, strict=True):
+            self.assertAlmostEqual(coord, expected_coord)
+
+    def setUp(self):
+        Variant.builds = 0
+        Plain.builds = 0
+
+    def test_lazy_build_on_access(self):
+        lazy = Plain.lazy(2)
+        self.assertFalse(lazy.is_built())
+        self.assertEqual(Plain.builds, 0)
+
+        self.assertEqual(lazy.marks.corner, (2, 0))
+        self.assertTrue(lazy.is_built())
+        self.assertEqual(Plain.builds, 1)
+
+        self.assertEqual(lazy.steamroll(), Plain(2).steamroll())
+        self.assertEqual(Plain.builds, 2)
+
+        lazy = Plain.lazy(radius=3)
+        lazy.proxy().move(1, 1)
+        self.assertFalse(lazy.is_built())
+        lazy.content_hash()
+        self.assertTrue(lazy.is_built())
+
+        lazy = Plain.lazy(radius=3)
+        lazy.subcompos
+        self.assertTrue(lazy.is_built())
+
+        with self.assertRaises(AttributeError):
+            lazy.nonexistent  # type: ignore[attr-defined]
+
+    def test_lazy_footprint(self):
+        lazy = Variant.lazy(length=20)
+        self.assertEqual(lazy.marks.tip, (10, 0))
+        self.assertEqual(lazy.bbox.as_list(), [-10, -1, 10, 1])
+
+        proxy = lazy.proxy().rotate(rai.quartercircle).move(5, 0)
+        self.assertAlmostEqual(float(proxy.marks.tip[0]), 5)
+        self.assertAlmostEqual(float(proxy.marks.tip[1]), 10)
+        bbox = proxy.bbox
+        self.assertAlmostEqual(bbox.left, 4)
+        self.assertAlmostEqual(bbox.right, 6)
+        self.assertAlmostEqual(bbox.top, 10)
+
+        array = lazy.array(3, 2, 30, 5)
+        self.assertEqual(array.bbox.as_list(), [-10, -1, 70, 6])
+        self.assertEqual(Variant.builds, 0)
+
+        # The footprint is replaced by the real geometry when built
+        lazy.steamroll()
+        self.assertEqual(Variant.builds, 1)
+        self.assertEqual(lazy.bbox.as_list(), [-10, -1, 10, 1])
+        self.assertEqual(lazy.marks.tip, (10, 0))
+
+    def test_lazy_parent_bbox(self):
+        parent = Parent()
+        self.assertBBoxAlmostEqual(parent.bbox, [-1, -3, 12, 5.5])
+        self.assertAlmostEqual(parent.proxy().move(1, 0).bbox.left, 0)
+        self.assertEqual(Variant.builds, 0)
+
+        # The footprints are not put in any layer
+        hulls, footprints = parent._get_hulls()
+        self.assertEqual(list(hulls.keys()), ['d'])
+        self.assertEqual(len(footprints), 1)
+
+        # Building a child replaces its footprint in the bbox of the parent
+        parent.subcompos.a.compo.steamroll()
+        self.assertEqual(Variant.builds, 1)
+        self.assertIn('body', parent._get_hulls()[0].keys())
+        self.assertBBoxAlmostEqual(parent.bbox, [-1, -3, 12, 5.5])
+
+        parent.steamroll()
+        self.assertEqual(Variant.builds, 3)
+        self.assertBBoxAlmostEqual(parent.bbox, [-1, -3, 12, 5.5])
+
+    def test_lazy_sweep(self):
+        # Variants are placed without being built
+        sweep = Sweep(num_variants=100)
+        self.assertEqual(Variant.builds, 0)
+
+        # Only the variants that are exported are built
+        sweep.subcompos[0].steamroll()
+        sweep.subcompos[1].steamroll()
+        self.assertEqual(Variant.builds, 2)
+
+        sweep.steamroll()
+        self.assertEqual(Variant.builds, 100)
+        bboxes = [
+            subcompo.bbox.as_list() for subcompo in sweep.subcompos.values()
+            ]
+        for left, right in zip(bboxes, bboxes[1:]):
+            self.assertAlmostEqual(right[0], left[2])
+
+    def test_lazy_partial(self):
+        partial = Variant.partial(width=4)
+        lazy = partial.lazy(length=6)
+        self.assertIsInstance(lazy, Variant)
+        self.assertEqual(lazy.bbox.as_list(), [-3, -2, 3, 2])
+        self.assertEqual(Variant.builds, 0)
+
+        kwargs: dict[str, Any] = {'length': 6, 'width': 4}
+        self.assertEqual(lazy.steamroll(), Variant(**kwargs).steamroll())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+import tempfile
+from datetime import datetime
+
+import raimad as rai
+from raimad.types import PolysS
+
+TIMESTAMP = datetime(2024, 1, 2, 3, 4, 5)
+
+def meander_polys(num_turns: int) -> PolysS:
+    polys: PolysS = []
+    for turn in range(num_turns):
+        x = turn * 3
+        polys.append([(x, 0), (x + 1, 0), (x + 1, 20), (x, 20)])
+        polys.append([(x + 1, 19), (x + 3, 19), (x + 3, 20), (x + 1, 20)])
+    polys.append(rai.Circle(2).geoms['root'][0])
+    return polys
+
+class Meander(rai.Compo):
+    def _make(self, num_turns: int = 20, packed: bool = True) -> None:
+        polys = meander_polys(num_turns)
+        self.geoms['wire'] = rai.PackedPolys(polys) if packed else polys
+
+class Chip(rai.Compo):
+    def _make(self, packed: bool = True) -> None:
+        meander = Meander(packed=packed)
+        self.subcompos.append(meander.proxy().rotate(0.3).move(10, 5))
+        self.subcompos.append(meander.array(3, 2, 100, 50).map('metal'))
+        self.subcompos.append(meander.proxy().map({'wire': None}))
+        self.subcompos.append(rai.RectLW(10, 20).proxy().map('metal'))
+
+class Holder(rai.Compo):
+    def _make(self, compo: rai.Compo) -> None:
+        self.subcompos.append(compo.proxy().move(1, 0))
+
+class TestPackedPolys(unittest.TestCase):
+
+    def setUp(self):
+        self.use_numpy = rai.affine.use_numpy
+
+    def tearDown(self):
+        rai.affine.use_numpy = self.use_numpy
+
+    def test_packedpolys_sequence(self):
+        polys = [[(0, 0), (1, 0), (1, 1)], [(2, 2), (3, 2), (3, 3), (2, 3)]]
+        packed = rai.PackedPolys(polys)
+
+        self.assertEqual(len(packed), 2)
+        self.assertEqual(packed.num_vertices, 7)
+        self.assertEqual(packed.lengths(), [3, 4])
+        self.assertEqual(packed[0], [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0)])
+        self.assertEqual(packed[-1], polys[1])
+        self.assertEqual(packed[1:], polys[1:])
+        self.assertEqual(packed, polys)
+        self.assertEqual(polys, packed)
+        self.assertEqual(list(packed), polys)
+        self.assertEqual(list(packed.points()), polys[0] + polys[1])
+        self.assertEqual(memoryview(packed.coords).format, 'd')
+        with self.assertRaises(IndexError):
+            packed[2]
+
+        packed[0] = [(5, 5), (6, 5)]
+        self.assertEqual(packed, [[(5, 5), (6, 5)], polys[1]])
+        packed[0] = polys[0]
+        self.assertEqual(packed, polys)
+
+        copied = packed.copy()
+        packed.extend(packed)
+        packed.append([(7, 7), (8, 8), (9, 7)])
+        self.assertEqual(packed, polys + polys + [[(7, 7), (8, 8), (9, 7)]])
+        self.assertEqual(copied, polys)
+
+        self.assertEqual(
+            rai.PackedPolys.from_arrays(packed.coords, packed.offsets),
+            packed,
+            )
+        with self.assertRaises(ValueError):
+            rai.PackedPolys.from_arrays([0, 0, 1, 1], [0, 1])
+
+    def test_packedpolys_transformed(self):
+        polys = meander_polys(5)
+        packed = rai.PackedPolys(polys)
+        matrix = rai.affine.matmul(
+            rai.affine.move(3, -2),
+            rai.affine.rotate(0.7),
+            rai.affine.scale(2, 1),
+            )
+        expected = [rai.affine.transform_poly(matrix, poly) for poly in polys]
+
+        for use_numpy in (False, rai.affine.HAS_NUMPY):
+            rai.affine.use_numpy = use_numpy
+            transformed = packed.transformed(matrix)
+            self.assertIsInstance(transformed, rai.PackedPolys)
+            for poly, expected_poly in zip(transformed, expected):
+                for point, expected_point in zip(poly, expected_poly):
+                    self.assertAlmostEqual(point[0], expected_point[0])
+                    self.assertAlmostEqual(point[1], expected_point[1])
+
+    def test_packedpolys_steamroll(self):
+        for use_numpy in (False, rai.affine.HAS_NUMPY):
+            rai.affine.use_numpy = use_numpy
+
+            steamrolled = Chip().steamroll()
+            expected = Chip(packed=False).steamroll()
+            self.assertIsInstance(steamrolled['wire'], rai.PackedPolys)
+            self.assertIsInstance(steamrolled['metal'], rai.PackedPolys)
+            self.assertEqual(steamrolled.keys(), expected.keys())
+            for layer, polys in expected.items():
+                self.assertEqual(len(steamrolled[layer]), len(polys))
+                for poly, expected_poly in zip(steamrolled[layer], polys):
+                    for point, expected_point in zip(poly, expected_poly):
+                        self.assertAlmostEqual(point[0], expected_point[0])
+                        self.assertAlmostEqual(point[1], expected_point[1])
+
+    def test_packedpolys_steamroll_cache(self):
+        meander = Meander()
+        holder = Holder(meander)
+
+        steamrolled = holder.steamroll()
+        self.assertEqual(holder.steamroll(), steamrolled)
+
+        meander.geoms['wire'].append([(0, 0), (1, 0), (0, 1)])
+        self.assertEqual(
+            len(holder.steamroll()['wire']),
+            len(steamrolled['wire']) + 1,
+            )
+
+        meander.geoms['wire'][0] = [(0, 0), (1, 0), (0, 2)]
+        self.assertEqual(
+            holder.steamroll()['wire'][0],
+            [(1.0, 0.0), (2.0, 0.0), (1.0, 2.0)],
+            )
+
+    def test_packedpolys_exporters(self):
+        # numpy may round the last bit differently,
+        # and whether it is used depends on the layout of the polygons
+        rai.affine.use_numpy = False
+        packed = Chip()
+        unpacked = Chip(packed=False)
+
+        self.assertEqual(packed.bbox.as_list(), unpacked.bbox.as_list())
+        self.assertEqual(rai.export_svg(packed), rai.export_svg(unpacked))
+        self.assertEqual(packed.content_hash(), unpacked.content_hash())
+        for exporter in (rai.cif.NoReuse, rai.cif.Reuse):
+            self.assertEqual(
+                rai.export_cif(packed, exporter=exporter),
+                rai.export_cif(unpacked, exporter=exporter),
+                )
+        self.assertEqual(
+            rai.export_gds(packed, timestamp=TIMESTAMP),
+            rai.export_gds(unpacked, timestamp=TIMESTAMP),
+            )
+
+    def test_packedpolys_diskcache(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = rai.DiskCache(tmpdir)
+            built = cache.get(Meander, 5)
+            loaded = cache.get(Meander, 5)
+
+        self.assertIsNot(loaded, built)
+        self.assertIsInstance(loaded.geoms['wire'], rai.PackedPolys)
+        self.assertEqual(loaded.geoms['wire'], built.geoms['wire'])
+
+    def test_packedpolys_grid(self):
+        unit = rai.grid.unit
+        rai.grid.unit = 1e-3
+        try:
+            meander = Meander()
+            self.assertIsInstance(meander.geoms['wire'], rai.PackedPolys)
+            self.assertEqual(
+                meander.geoms['wire'],
+                rai.grid.snap_polys(meander_polys(20)),
+                )
+        finally:
+            rai.grid.unit = unit
+
+if __name__ == '__main__':
+    unittest.main()
@@ -32,6 +32,51 @@ class TestPolys(GeomsEqual, ArrayApproxEqual, unittest.TestCase):
                 69
                 )
 
+    def test_circle_tolerance(self):
+        tolerance = 0.01
+        for radius in (1, 69, 5000):
+            circle = rai.Circle(radius, tolerance=tolerance)
+            points = circle.geoms['root'][0]
+
+            # The middle of every edge is within tolerance of the circle
+            for point1, point2 in rai.duplets(points + points[:1]):
+                self.assertLessEqual(
+                    radius - rai.distance_between(
+                        (0, 0),
+                        rai.midpoint(point1, point2),
+                        ),
+                    tolerance + 1e-9,
+                    )
+
+        self.assertLess(
+            len(rai.Circle(1, tolerance=tolerance).geoms['root'][0]),
+            len(rai.Circle(69, tolerance=tolerance).geoms['root'][0]),
+            )
+
+        # Explicit number of points takes precedence
+        self.assertEqual(
+            len(rai.Circle(1, 12, tolerance=1).geoms['root'][0]),
+            12,
+            )
+
+    def test_circle_tolerance_global(self):
+        self.assertEqual(len(rai.Circle(1).geoms['root'][0]), 200)
+
+        rai.helpers.arc_tolerance = 0.1
+        try:
+            self.assertEqual(
+                len(rai.Circle(1).geoms['root'][0]),
+                rai.arc_num_points(1, rai.fullcircle, 0.1, min_points=3),
+                )
+
+            # Per-compo tolerance takes precedence
+            self.assertGreater(
+                len(rai.Circle(1, tolerance=0.001).geoms['root'][0]),
+                len(rai.Circle(1).geoms['root'][0]),
+                )
+        finally:
+            rai.helpers.arc_tolerance = None
+
     def test_custompoly(self):
         """
         Test CustomPoly
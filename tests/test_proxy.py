@@ -157,6 +157,36 @@ class TestProxy(GeomsEqual, unittest.TestCase):
             {'root': [[(-10, -10), (10, -10), (10, 10), (-10, 10)]]}
             )
 
+    def test_proxy_flat_transform_lmap(self):
+        compo = rai.RectLW(2, 4)
+        tower = (
+            compo.proxy()
+            .map('a')
+            .move(10, 0)
+            .proxy()
+            .map({'a': 'b'})
+            .rotate(rai.quartercircle)
+            )
+
+        flat = compo.proxy()
+        flat.transform = tower.get_flat_transform()
+        flat.lmap = tower.get_flat_lmap()
+
+        self.assertEqual(flat.lmap.shorthand, 'b')
+        self.assertGeomsEqual(flat, tower)
+
+    def test_proxy_flat_lmap_dict(self):
+        inner = rai.RectLW(2, 4).proxy().map({'root': 'b'})
+        tower = inner.proxy().map({'b': 'c'})
+
+        self.assertEqual(tower.get_flat_lmap().shorthand, {'root': 'c'})
+
+        # Flattening must not change the lmaps in the tower
+        self.assertEqual(inner.lmap.shorthand, {'root': 'b'})
+        self.assertEqual(tower.lmap.shorthand, {'b': 'c'})
+        self.assertEqual(inner.steamroll().keys(), {'b'})
+        self.assertEqual(tower.steamroll().keys(), {'c'})
+
 
 if __name__ == '__main__':
     unittest.main()
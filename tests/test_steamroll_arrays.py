@@ -0,0 +1,64 @@
+import unittest
+
+import numpy as np
+
+import raimad as rai
+
+from .utils import GeomsEqual
+
+class Pixel(rai.Compo):
+    def _make(self) -> None:
+        self.subcompos.body = rai.RectLW(10, 20).proxy().map('body')
+        self.subcompos.dot = rai.Circle(3).proxy().map('dot').move(0, 5)
+
+class Sensor(rai.Compo):
+    def _make(self) -> None:
+        pixel = Pixel()
+        self.subcompos.pixels = pixel.array(4, 3, 30, 40).rotate(0.5)
+        self.subcompos.flipped = pixel.proxy().hflip().move(-50, 0)
+        self.subcompos.hidden = pixel.proxy().map({'body': None, 'dot': 'dot'})
+        self.geoms['body'] = [[(0, 0), (1, 0), (1, 1)]]
+
+class TestSteamrollArrays(GeomsEqual, unittest.TestCase):
+
+    def setUp(self):
+        self.use_numpy = rai.affine.use_numpy
+
+    def tearDown(self):
+        rai.affine.use_numpy = self.use_numpy
+
+    def test_steamroll_arrays(self):
+        for use_numpy in (False, True):
+            rai.affine.use_numpy = use_numpy
+
+            for compo in (
+                    Sensor(),
+                    Sensor().proxy().rotate(1).move(3, 4),
+                    Pixel().array(2, 2, 20, 20).map({'body': 'b', 'dot': 'd'}),
+                    ):
+                arrays = compo.steamroll_arrays()
+                for polys in arrays.values():
+                    self.assertIsInstance(polys, rai.PackedPolys)
+                self.assertGeomsEqual(arrays, compo.steamroll())
+
+                # Twice, so that the cached steamroll is used
+                self.assertGeomsEqual(compo.steamroll_arrays(), arrays)
+
+    def test_steamroll_arrays_buffer(self):
+        arrays = Sensor().steamroll_arrays()
+        dots = arrays['dot']
+
+        vertices = dots.to_array()
+        self.assertEqual(vertices.shape, (dots.num_vertices, 2))
+        self.assertTrue(np.shares_memory(vertices, np.asarray(dots.coords)))
+
+        view = memoryview(dots.coords)
+        self.assertEqual((view.format, view.itemsize), ('d', 8))
+        self.assertEqual(list(view[:2]), list(dots[0][0]))
+        view.release()
+
+        self.assertEqual(list(dots.offsets[:2]), [0, len(dots[0])])
+        self.assertEqual(dots.offsets[-1], dots.num_vertices)
+
+if __name__ == '__main__':
+    unittest.main()
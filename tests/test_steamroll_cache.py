@@ -0,0 +1,187 @@
+import unittest
+
+import raimad as rai
+from raimad.types import GeomsS
+
+from .utils import GeomsEqual
+
+class Pair(rai.Compo):
+    def _make(self):
+        self.geoms['root'] = [[(0, 0), (1, 0), (0, 1)]]
+        self.subcompos.left = rai.RectLW(2, 2).proxy().map('root')
+        self.subcompos.right = rai.RectLW(2, 2).proxy().map('other')
+
+class TestSteamrollCache(GeomsEqual, unittest.TestCase):
+
+    def assertCacheValid(self, compo: rai.typing.Compo) -> None:
+        """Check that cached steamroll matches a fresh one."""
+        cached = compo.steamroll()
+        compo._steamroll_cache = None
+        self.assertGeomsEqual(cached, compo.steamroll())
+
+    def test_steamroll_cache_reused(self):
+        compo = Pair()
+        compo.steamroll()
+        cache = compo._steamroll_cache
+
+        compo.steamroll()
+        compo.bbox
+        compo.proxy().steamroll()
+        self.assertIs(compo._steamroll_cache, cache)
+
+    def test_steamroll_cache_transform(self):
+        compo = Pair()
+        compo.steamroll()
+
+        compo.subcompos.left.move(10, 0)
+        self.assertCacheValid(compo)
+        self.assertEqual(compo.bbox.right, 11)
+
+    def test_steamroll_cache_lmap(self):
+        compo = Pair()
+        compo.steamroll()
+
+        compo.subcompos.right.map({'root': None})
+        self.assertCacheValid(compo)
+        self.assertEqual(compo.steamroll().keys(), {'root'})
+
+    def test_steamroll_cache_subcompos(self):
+        compo = Pair()
+        compo.steamroll()
+
+        compo.subcompos.extra = rai.RectLW(1, 1).proxy().map('extra')
+        self.assertCacheValid(compo)
+        self.assertIn('extra', compo.steamroll().keys())
+
+    def test_steamroll_cache_geoms(self):
+        compo = Pair()
+        compo.steamroll()
+
+        compo.geoms['root'].append([(0, 0), (5, 0), (0, 5)])
+        self.assertCacheValid(compo)
+        self.assertEqual(len(compo.steamroll()['root']), 3)
+
+        compo.geoms['new'] = [[(0, 0), (5, 0), (0, 5)]]
+        self.assertCacheValid(compo)
+        self.assertIn('new', compo.steamroll().keys())
+
+    def test_steamroll_cache_replaced_poly(self):
+        compo = Pair()
+        parent = rai.Snowman()
+        parent.subcompos.pair = compo.proxy().move(100, 0)
+        parent.steamroll()
+
+        # Same number of polygons, but a different polygon
+        compo.geoms['root'][0] = [(0, 0), (50, 0), (0, 1000)]
+        self.assertCacheValid(compo)
+        self.assertCacheValid(parent)
+        self.assertIn(
+            [(100, 0), (150, 0), (100, 1000)],
+            [list(poly) for poly in parent.steamroll()['root']],
+            )
+
+    def test_steamroll_cache_nested(self):
+        pair = Pair()
+        parent = rai.Snowman()
+        parent.subcompos.pair = pair.proxy().proxy().map('snow')
+        parent.steamroll()
+
+        # Change deep in the hierarchy
+        pair.subcompos.left.move(100, 0)
+        self.assertCacheValid(parent)
+        self.assertEqual(parent.bbox.right, 101)
+
+        # Change in the middle of a proxy tower
+        parent.subcompos.pair.compo.move(0, 1000)
+        self.assertCacheValid(parent)
+        self.assertEqual(parent.bbox.top, 1001)
+
+    def test_steamroll_single_pass(self):
+        # Reference implementation that flattens one level at a time
+        def steamroll_nested(compo: rai.typing.CompoLike) -> GeomsS:
+            geoms = {
+                layer: list(polys)
+                for layer, polys in compo.geoms.items()
+                }
+            for subcompo in compo.subcompos.values():
+                for layer, polys in steamroll_nested(subcompo).items():
+                    geoms.setdefault(layer, []).extend(polys)
+            return geoms
+
+        compo: rai.typing.Compo = Pair()
+        for _ in range(4):
+            wrapper = rai.Snowman()
+            wrapper.subcompos.inner = (
+                compo.proxy()
+                .map({
+                    'root': 'snow',
+                    'other': None,
+                    'snow': 'carrot',
+                    'carrot': 'carrot',
+                    'pebble': 'pebble',
+                    })
+                .scale(0.5)
+                .proxy()
+                .rotate(rai.quartercircle / 3)
+                .move(7, 3)
+                )
+            compo = wrapper
+
+        self.assertGeomsEqual(compo.steamroll(), steamroll_nested(compo))
+
+        proxy = compo.proxy().map({'snow': 'a', 'carrot': 'b', 'pebble': 'c'})
+        self.assertGeomsEqual(proxy.steamroll(), steamroll_nested(proxy))
+
+    def test_steamroll_numpy(self):
+        class Grid(rai.Compo):
+            def _make(self):
+                circle = rai.Circle(10)
+                for i in range(4):
+                    self.subcompos.append(
+                        circle.proxy().rotate(i).move(i * 30, 0)
+                        )
+
+        compo = Grid()
+
+        use_numpy = rai.affine.use_numpy
+        rai.affine.use_numpy = False
+        try:
+            expected = Grid().steamroll()
+        finally:
+            rai.affine.use_numpy = use_numpy
+
+        self.assertGeomsEqual(compo.steamroll(), expected)
+
+        # Steamroll again after invalidating the cache,
+        # now the polys of the circle have been converted to an array
+        compo._steamroll_cache = None
+        self.assertGeomsEqual(compo.steamroll(), expected)
+
+        # Replacing a polygon of the circle drops the stale array
+        circle = compo.subcompos[0].compo
+        assert isinstance(circle, rai.Compo)
+        circle.geoms['root'][0] = rai.Circle(20).geoms['root'][0]
+        self.assertCacheValid(compo)
+        self.assertAlmostEqual(
+            max(x for poly in compo.steamroll()['root'] for x, _ in poly),
+            3 * 30 + 20,
+            delta=0.1,
+            )
+
+    def test_steamroll_merge_layers(self):
+        compo = Pair().proxy().map('merged')
+
+        self.assertEqual(len(compo.steamroll()['merged']), 3)
+        self.assertEqual(len(compo.geoms['merged']), 1)
+
+    def test_steamroll_doesnt_modify_geoms(self):
+        compo = Pair()
+
+        compo.steamroll()['root'].append([(0, 0), (5, 0), (0, 5)])
+        compo.steamroll()
+
+        self.assertEqual(len(compo.geoms['root']), 1)
+        self.assertEqual(len(compo.steamroll()['root']), 2)
+
+if __name__ == '__main__':
+    unittest.main()
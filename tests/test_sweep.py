@@ -0,0 +1,131 @@
+import unittest
+import tempfile
+from pathlib import Path
+from itertools import combinations
+
+import raimad as rai
+
+class Notch(rai.Compo):
+    def _make(
+            self,
+            length: float = 10,
+            width: float = 2,
+            notch: float = 1,
+            ) -> None:
+        self.subcompos.body = rai.RectLW(length, width).proxy().map('body')
+        self.subcompos.notch = rai.RectLW(notch, notch).proxy().map('notch')
+        self.subcompos.notch.bbox.mid.to(self.subcompos.body.bbox.top_mid)
+
+class TestSweep(unittest.TestCase):
+
+    def test_sweep_variants(self):
+        self.assertEqual(
+            rai.sweep.cartesian(length=[1, 2], width=(3, 4)),
+            [
+                {'length': 1, 'width': 3},
+                {'length': 1, 'width': 4},
+                {'length': 2, 'width': 3},
+                {'length': 2, 'width': 4},
+                ],
+            )
+        self.assertEqual(
+            rai.sweep.zipped(length=[1, 2], width=(3, 4)),
+            [{'length': 1, 'width': 3}, {'length': 2, 'width': 4}],
+            )
+        self.assertEqual(rai.sweep.cartesian(), [{}])
+        with self.assertRaises(ValueError):
+            rai.sweep.zipped(length=[1, 2], width=[3])
+
+        self.assertEqual(
+            rai.sweep.label({'length': 1.5, 'layer': 'a b/c'}),
+            'length=1.5_layer=a_b_c',
+            )
+        self.assertEqual(rai.sweep.label({}), 'default')
+
+    def test_sweep_build(self):
+        variants = rai.sweep.cartesian(length=[10, 20, 30], width=[1, 2])
+
+        serial = rai.sweep.build(rai.RectLW, variants)
+        parallel = rai.sweep.build(rai.RectLW, variants, workers=2)
+        self.assertEqual(len(parallel), len(variants))
+        for variant, built, loaded in zip(variants, serial, parallel):
+            self.assertEqual(built.content_hash(), loaded.content_hash())
+            self.assertEqual(
+                built.content_hash(),
+                rai.RectLW(**variant).content_hash(),
+                )
+
+        with self.assertRaises(rai.err.UnknownOptionError):
+            rai.sweep.build(rai.RectLW, [{'length': 1, 'height': 2}])
+
+        # Options of a partial are overridden by the variants
+        short, long = rai.sweep.build(
+            Notch.partial(notch=3, width=5),
+            [{'length': 12}, {'length': 14, 'width': 6}],
+            )
+        self.assertEqual(short.bbox.as_list(), [-6, -2.5, 6, 4])
+        self.assertEqual(long.bbox.as_list(), [-7, -3, 7, 4.5])
+
+        with self.assertRaises(rai.err.UnknownOptionError):
+            rai.sweep.build(Notch.partial(width=5), [{'radius': 1}])
+
+    def test_sweep_grid(self):
+        variants = rai.sweep.zipped(length=[10, 20, 30, 40, 50], width=[1] * 5)
+        grid = rai.sweep.SweepGrid(Notch, variants, spacing=5)
+
+        self.assertEqual(
+            list(grid.subcompos.keys()),
+            [rai.sweep.label(variant) for variant in variants],
+            )
+
+        # Three columns and two rows, with cells made for the longest variant
+        expected = [(0, 0), (55, 0), (110, 0), (0, -6.5), (55, -6.5)]
+        for proxy, (x, y) in zip(grid.subcompos.values(), expected):
+            self.assertAlmostEqual(float(proxy.bbox.mid[0]), x)
+            self.assertAlmostEqual(float(proxy.bbox.mid[1]), y)
+
+        bboxes = [proxy.bbox for proxy in grid.subcompos.values()]
+        for first, second in combinations(bboxes, 2):
+            self.assertTrue(
+                first.max_x < second.min_x
+                or second.max_x < first.min_x
+                or first.max_y < second.min_y
+                or second.max_y < first.min_y
+                )
+
+        grid = rai.sweep.SweepGrid(Notch, variants, columns=1)
+        for proxy in grid.subcompos.values():
+            self.assertAlmostEqual(float(proxy.bbox.mid[0]), 0)
+
+        with self.assertRaises(ValueError):
+            rai.sweep.SweepGrid(Notch, [{'length': 1}, {'length': 1}])
+
+        self.assertEqual(len(rai.sweep.SweepGrid(Notch, []).subcompos), 0)
+
+    def test_sweep_export_each(self):
+        variants = rai.sweep.cartesian(length=[10, 20], width=[1, 2])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for extension in ('cif', 'gds'):
+                paths = rai.sweep.export_each(
+                    rai.RectLW,
+                    variants,
+                    f'{tmpdir}/rect_{{variant}}.{extension}',
+                    workers=2,
+                    )
+                self.assertEqual(
+                    paths[0],
+                    f'{tmpdir}/rect_length=10_width=1.{extension}',
+                    )
+                for path in paths:
+                    self.assertTrue(Path(path).is_file())
+
+            self.assertEqual(
+                Path(paths[-1].replace('.gds', '.cif')).read_text(),
+                rai.export_cif(rai.RectLW(20, 2)),
+                )
+
+            with self.assertRaises(ValueError):
+                rai.sweep.export_each(rai.RectLW, variants, f'{tmpdir}/rect.cif')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+
+import raimad as rai
+from raimad.types import GeomsS
+
+from .utils import GeomsEqual
+
+class Pixel(rai.Compo):
+    def _make(self):
+        self.subcompos.body = rai.RectLW(10, 20).proxy().map('BODY')
+        self.subcompos.foot = (
+            rai.RectLW(4, 2).proxy().map('FOOT').movey(-11)
+            )
+
+class Detector(rai.Compo):
+    def _make(self):
+        pixel = Pixel()
+        self.subcompos.pixels = pixel.array(2, 3, 30, 40).rotate(0.2)
+        self.subcompos.single = (
+            pixel.proxy()
+            .map({'BODY': 'A', 'FOOT': None})
+            .move(100, 0)
+            .proxy()
+            .map({'A': 'B'})
+            .rotate(rai.quartercircle)
+            )
+        self.subcompos.append(rai.Circle(5).proxy().map('CIRC'))
+
+def steamroll_walk(compo: rai.typing.CompoLike) -> GeomsS:
+    """Steamroll a compo by transforming the raw geoms of every node."""
+    geoms: GeomsS = {}
+    for _path, node, affine, lmap in compo.walk():
+        for layer, polys in node.geoms.items():
+            mapped = lmap[layer]
+            if mapped is None:
+                continue
+            geoms.setdefault(mapped, []).extend(
+                rai.affine.transform_poly(affine, poly) for poly in polys
+                )
+    return geoms
+
+class TestWalk(GeomsEqual, unittest.TestCase):
+
+    def test_walk_steamroll(self):
+        compo = Detector()
+        self.assertGeomsEqual(steamroll_walk(compo), compo.steamroll())
+
+        proxy = (
+            compo.proxy()
+            .map({'BODY': 'X', 'FOOT': 'X', 'B': 'B', 'CIRC': None})
+            .hflip()
+            .move(5, 5)
+            )
+        self.assertGeomsEqual(steamroll_walk(proxy), proxy.steamroll())
+
+    def test_walk_paths(self):
+        compo = Detector()
+        paths = [path for path, *_ in compo.walk()]
+
+        self.assertEqual(paths[0], ())
+        self.assertEqual(paths[1:4], [
+            ('pixels', (0, 0)),
+            ('pixels', (0, 0), 'body'),
+            ('pixels', (0, 0), 'foot'),
+            ])
+        self.assertIn(('pixels', (1, 2), 'foot'), paths)
+        self.assertIn(('single', 'body'), paths)
+        self.assertIn((2, ), paths)
+
+        # Root, 6 pixels, 1 pixel, 3 rectangles each, 1 circle
+        self.assertEqual(len(paths), 1 + 7 * 3 + 1)
+
+    def test_walk_no_copies(self):
+        compo = Detector()
+        single = compo.subcompos.single.compo
+        assert isinstance(single, rai.Proxy)
+        lmap = single.lmap.shorthand
+
+        for _ in compo.walk():
+            pass
+
+        # Lmaps of proxies are not modified by composing them
+        self.assertEqual(lmap, {'BODY': 'A', 'FOOT': None})
+
+        nodes = {path: node for path, node, *_ in compo.walk()}
+        pixel = compo.subcompos.pixels.compo
+        self.assertIs(nodes[('pixels', (1, 1))], pixel)
+        self.assertIs(nodes[('single', )], pixel)
+
+if __name__ == '__main__':
+    unittest.main()